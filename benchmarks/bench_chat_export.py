@@ -0,0 +1,77 @@
+# =====================================================
+# 📊 MICRO-BENCHMARK: STRING-BUILT vs STREAMING CHAT EXPORT
+# =====================================================
+# Exports a conversation of N messages the old way (chat_text += ... for
+# every message) and with the streaming exporter (chunks joined once into
+# bytes), and reports time and peak Python memory of each.
+#
+# Run from the repository root:
+#     python benchmarks/bench_chat_export.py
+
+import io
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "chatbot"))
+
+from chat_export import export_bytes, export_chunks, gzip_chunks, read_export  # noqa: E402
+from message_record import MessageRecord, Role  # noqa: E402
+
+SIZES = (1000, 10000)
+ANSWER = "Here is a reasonably long answer with some detail. " * 20  # ~1 KB
+
+
+def conversation(n):
+    return [MessageRecord(Role.USER, f"Question {i}?") if i % 2 else
+            MessageRecord(Role.ASSISTANT, f"{i}: {ANSWER}", model="llama-3.1-8b-instant",
+                          response_time=1.2)
+            for i in range(n)]
+
+
+def old_export(messages):
+    chat_text = "CypherNova Chat Export\n"
+    chat_text += "=" * 60 + "\n\n"
+    for msg in messages:
+        role_emoji = "👤" if msg["role"] == "user" else "🤖"
+        chat_text += f"{role_emoji} {msg['role'].upper()}: {msg['content']}\n\n"
+    return chat_text.encode()
+
+
+def measure(export, messages):
+    """Milliseconds (untraced run), peak traced MB (second run) and the export"""
+    start = time.perf_counter()
+    export(messages)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    result = export(messages)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed * 1000, peak / 1e6, result
+
+
+def main():
+    header = {"analytics": {"total_messages": 0}}
+    exports = {
+        "old text (+=)": old_export,
+        "markdown stream": lambda m: export_bytes(export_chunks(m, header, "Markdown")),
+        "jsonl stream": lambda m: export_bytes(export_chunks(m, header, "JSONL")),
+        "jsonl.gz stream": lambda m: export_bytes(gzip_chunks(export_chunks(m, header, "JSONL"))),
+    }
+    print(f"{'messages':>9}  {'export':<18}{'ms':>9}{'peak MB':>10}{'size KB':>10}")
+    for n in SIZES:
+        messages = conversation(n)
+        for name, export in exports.items():
+            ms, peak, result = measure(export, messages)
+            print(f"{n:>9}  {name:<18}{ms:>9.1f}{peak:>10.1f}{len(result) / 1024:>10.0f}")
+
+        data = io.BytesIO(export_bytes(gzip_chunks(export_chunks(messages, header, "JSONL"))))
+        start = time.perf_counter()
+        restored = sum(1 for _ in read_export(data)) - 1
+        print(f"{n:>9}  {'import jsonl.gz':<18}{(time.perf_counter() - start) * 1000:>9.1f}"
+              f"{'':>10}{restored:>10} messages")
+
+
+if __name__ == "__main__":
+    main()
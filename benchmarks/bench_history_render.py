@@ -0,0 +1,74 @@
+# =====================================================
+# 📊 MICRO-BENCHMARK: CHAT HISTORY RERUN COST
+# =====================================================
+# Measures the server-side time of one Streamlit rerun that renders a chat
+# history of 10, 100 and 1000 messages, using Streamlit's AppTest harness:
+#   - before: every message with st.columns([10, 1]) + st.markdown + a keyed
+#     st.button("📋") (the original chatbot.py loop)
+#   - after:  chat_history.render_history (newest HISTORY_WINDOW messages, one
+#     client-side copy script)
+#
+# Run from the repository root:
+#     python benchmarks/bench_history_render.py
+
+import statistics
+import time
+from pathlib import Path
+
+from streamlit.testing.v1 import AppTest
+
+CHATBOT_DIR = Path(__file__).resolve().parent.parent / "chatbot"
+
+SETUP = f"""
+import sys
+sys.path.insert(0, {str(CHATBOT_DIR)!r})
+import streamlit as st
+if "messages" not in st.session_state:
+    st.session_state.messages = [
+        {{"role": "user" if i % 2 else "assistant",
+          "content": f"Message {{i}}: **markdown** with a list\\n\\n- one\\n- two\\n\\n`code`"}}
+        for i in range(COUNT)
+    ]
+"""
+
+BEFORE = """
+for i, msg in enumerate(st.session_state.messages):
+    with st.chat_message(msg["role"]):
+        col1, col2 = st.columns([10, 1])
+        with col1:
+            st.markdown(msg["content"])
+        with col2:
+            if st.button("📋", key=f"copy_{i}", help="Copy message"):
+                st.toast("Message copied! 📋", icon="✅")
+"""
+
+AFTER = """
+from chat_history import render_history
+render_history(st.session_state.messages)
+"""
+
+
+def time_reruns(body, count, reruns=5):
+    """Median seconds per rerun (after a warm-up run), chat messages and buttons rendered"""
+    app = AppTest.from_string(SETUP.replace("COUNT", str(count)) + body, default_timeout=120)
+    app.run()  # First run: imports and session setup
+    timings = []
+    for _ in range(reruns):
+        start = time.perf_counter()
+        app.run()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), len(app.chat_message), len(app.button)
+
+
+def main():
+    print(f"{'messages':>9}{'before ms':>12}{'after ms':>11}{'speed-up':>10}"
+          f"{'buttons before/after':>24}")
+    for count in (10, 100, 1000):
+        before, _, buttons_before = time_reruns(BEFORE, count)
+        after, _, buttons_after = time_reruns(AFTER, count)
+        print(f"{count:>9}{before * 1000:>12.1f}{after * 1000:>11.1f}{before / after:>9.1f}x"
+              f"{f'{buttons_before}/{buttons_after}':>24}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# =====================================================
+# 📊 MICRO-BENCHMARK: RESPONSE-TIME LISTS vs STREAMING STATISTICS
+# =====================================================
+# For a session that has recorded N response times, compares:
+#   - memory: the old list of floats vs StreamingStats
+#   - per-rerun cost: the old sum()/len() over the list vs reading the mean
+#     and p50/p95/p99 from StreamingStats
+#   - accuracy of the histogram percentiles against exact ones
+#
+# Run from the repository root:
+#     python benchmarks/bench_latency_stats.py
+
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "chatbot"))
+
+from latency_stats import StreamingStats  # noqa: E402
+from model_scoreboard import percentile  # noqa: E402
+
+SIZES = (100, 1000, 10000, 100000)
+
+
+def samples(n, seed=7):
+    # Log-normal, like real latencies: mostly ~1s with a long tail
+    rng = random.Random(seed)
+    return [rng.lognormvariate(0.0, 0.6) for _ in range(n)]
+
+
+def traced_bytes(build):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, result
+
+
+def per_rerun_us(read, repeats=200):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        read()
+    return (time.perf_counter() - start) / repeats * 1e6
+
+
+def main():
+    print(f"{'samples':>8}{'list KB':>10}{'stats KB':>10}{'list us':>10}{'stats us':>10}"
+          f"{'p95 err':>9}{'p99 err':>9}")
+    for n in SIZES:
+        values = samples(n)
+        list_bytes, times = traced_bytes(lambda: [float(v) for v in values])
+
+        def build_stats():
+            stats = StreamingStats()
+            for v in values:
+                stats.add(v)
+            return stats
+
+        stats_bytes, stats = traced_bytes(build_stats)
+        old = per_rerun_us(lambda: sum(times) / len(times))
+        new = per_rerun_us(lambda: (stats.mean, stats.quantiles(0.5, 0.95, 0.99)))
+        ordered = sorted(values)
+        errors = [abs(stats.quantile(q) - percentile(ordered, q)) / percentile(ordered, q)
+                  for q in (0.95, 0.99)]
+        print(f"{n:>8}{list_bytes / 1024:>10.1f}{stats_bytes / 1024:>10.1f}{old:>10.1f}{new:>10.1f}"
+              f"{errors[0]:>9.2%}{errors[1]:>9.2%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# =====================================================
+# 📊 MICRO-BENCHMARK: MESSAGE DICTS vs SLOTTED RECORDS
+# =====================================================
+# Compares, for a session holding N messages:
+#   - memory per message: the old message dicts (isoformat timestamp string,
+#     model/cached/response_time keys) vs MessageRecord
+#   - per-rerun cost: the old "clean up corrupted messages" pass that walked
+#     and copied the whole list on every rerun vs the one-time format check
+#     that replaced it
+#
+# Run from the repository root:
+#     python benchmarks/bench_message_records.py
+
+import datetime
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "chatbot"))
+
+from message_record import MESSAGE_FORMAT, MessageRecord, Role  # noqa: E402
+
+SIZES = (100, 1000, 10000)
+MODEL = "llama-3.1-8b-instant"
+
+
+def text(i):
+    # A fresh string per message, like text arriving from the browser or the model
+    return "".join(["Answer number ", str(i), " with a few words of content."])
+
+
+def make_dicts(n):
+    messages = []
+    for i in range(n):
+        if i % 2:
+            messages.append({"role": "user", "content": text(i),
+                             "timestamp": datetime.datetime.now().isoformat()})
+        else:
+            messages.append({"role": "assistant", "content": text(i),
+                             "timestamp": datetime.datetime.now().isoformat(),
+                             "response_time": 1.0 + i / n, "model": "".join(MODEL),
+                             "cached": False})
+    return messages
+
+
+def make_records(n):
+    messages = []
+    for i in range(n):
+        if i % 2:
+            messages.append(MessageRecord(Role.USER, text(i)))
+        else:
+            messages.append(MessageRecord(Role.ASSISTANT, text(i), response_time=1.0 + i / n,
+                                          model="".join(MODEL)))
+    return messages
+
+
+def bytes_per_message(factory, n):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    messages = factory(n)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert len(messages) == n
+    return (after - before) / n
+
+
+def old_cleanup(state):
+    """The per-rerun pass removed from chatbot.py"""
+    if state["messages"]:
+        cleaned_messages = []
+        for msg in state["messages"]:
+            if isinstance(msg.get("content"), str):
+                cleaned_messages.append(msg)
+            elif hasattr(msg.get("content"), "content"):
+                cleaned_msg = msg.copy()
+                cleaned_msg["content"] = msg["content"].content
+                cleaned_messages.append(cleaned_msg)
+        state["messages"] = cleaned_messages
+
+
+def new_check(state):
+    """What every rerun does now (the conversion itself runs once per session)"""
+    if state.get("message_format") != MESSAGE_FORMAT:
+        raise AssertionError("session should already be converted")
+
+
+def per_rerun_us(check, state, repeats=200):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        check(state)
+    return (time.perf_counter() - start) / repeats * 1e6
+
+
+def main():
+    print(f"{'messages':>9}{'dict B/msg':>12}{'record B/msg':>14}"
+          f"{'old cleanup us':>16}{'new check us':>14}")
+    for n in SIZES:
+        dict_bytes = bytes_per_message(make_dicts, n)
+        record_bytes = bytes_per_message(make_records, n)
+        old = per_rerun_us(old_cleanup, {"messages": make_dicts(n)})
+        new = per_rerun_us(new_check, {"messages": make_records(n), "message_format": MESSAGE_FORMAT})
+        print(f"{n:>9}{dict_bytes:>12.0f}{record_bytes:>14.0f}{old:>16.1f}{new:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# =====================================================
+# 📊 MICRO-BENCHMARK: SHARDED METRICS vs ONE GLOBAL LOCK
+# =====================================================
+# Measures what a metrics update costs on the chat path, with 1 and 8
+# threads writing at once:
+#   - MetricsRegistry: per-thread shards, no lock after a thread's first sample
+#   - a single dict guarded by one lock (the straightforward alternative)
+# and how long a scrape (Prometheus text for all series) takes.
+#
+# Run from the repository root:
+#     python benchmarks/bench_metrics_registry.py
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "chatbot"))
+
+from metrics_registry import MetricsRegistry  # noqa: E402
+
+UPDATES = 50_000
+MODELS = ("llama-3.1-8b-instant", "ollama:llama3.2", "gpt-3.5-turbo")
+
+
+class LockedRegistry:
+    """Counters in one dict behind one lock"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+
+def hammer(registry, threads):
+    """Nanoseconds per update with `threads` threads each doing UPDATES updates"""
+    def work():
+        for i in range(UPDATES):
+            registry.inc("chatbot_llm_requests_total", frontend="chatbot", model=MODELS[i % 3])
+
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return (time.perf_counter() - start) / (UPDATES * threads) * 1e9
+
+
+def main():
+    print(f"{'threads':>8}{'sharded ns/update':>20}{'locked ns/update':>19}")
+    for threads in (1, 8):
+        sharded = hammer(MetricsRegistry(), threads)
+        locked = hammer(LockedRegistry(), threads)
+        print(f"{threads:>8}{sharded:>20.0f}{locked:>19.0f}")
+
+    registry = MetricsRegistry()
+    hammer(registry, 8)
+    for i in range(1000):
+        registry.observe("chatbot_llm_request_duration_seconds", (i % 50) / 10,
+                         frontend="chatbot", model=MODELS[i % 3])
+    start = time.perf_counter()
+    text = registry.exposition()
+    elapsed = (time.perf_counter() - start) * 1000
+    total = sum(v for (name, _), v in registry.snapshot().counters.items())
+    assert total == 8 * UPDATES, total
+    print(f"scrape: {elapsed:.2f} ms for {text.count(chr(10))} lines (no updates lost)")
+
+
+if __name__ == "__main__":
+    main()
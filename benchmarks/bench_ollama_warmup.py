@@ -0,0 +1,74 @@
+# =====================================================
+# 📊 MICRO-BENCHMARK: OLLAMA COLD START VS WARM
+# =====================================================
+# Runs OllamaWarmer against the local Ollama stub (benchmarks/ollama_stub.py)
+# and measures time to first token for:
+#   - a cold request (model unloaded, no warm-up)
+#   - a request after the startup warm-up
+#   - a request after a short keep_alive expired, with and without heartbeat
+#
+# Run from the repository root:
+#     python benchmarks/bench_ollama_warmup.py [load_seconds]
+
+import sys
+import time
+import types
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "chatbot"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import httpx  # noqa: E402
+
+try:
+    import streamlit  # noqa: F401,E402
+except ImportError:  # The warmer only needs st.cache_resource at import time
+    sys.modules["streamlit"] = types.SimpleNamespace(cache_resource=lambda **_: (lambda f: f))
+
+from ollama_client import OllamaWarmer  # noqa: E402
+from ollama_stub import start_in_background  # noqa: E402
+
+MODEL = "llama3.2"
+
+
+def first_token(base_url, keep_alive):
+    """Seconds until the first streamed token of a chat request"""
+    start = time.perf_counter()
+    body = {"model": MODEL, "keep_alive": keep_alive,
+            "messages": [{"role": "user", "content": "Hi there"}]}
+    with httpx.stream("POST", f"{base_url}/api/chat", json=body, timeout=60) as response:
+        for _ in response.iter_lines():
+            return time.perf_counter() - start
+
+
+def main(load_seconds=2.0):
+    server, base_url = start_in_background(load_seconds=load_seconds, token_seconds=0.005)
+    print(f"Stub at {base_url}, simulated load time {load_seconds:.1f}s\n")
+    print(f"{'scenario':<44}{'first token':>12}")
+
+    cold = first_token(base_url, keep_alive="1s")
+    print(f"{'cold (no warm-up)':<44}{cold:>11.2f}s")
+
+    time.sleep(1.2)  # keep_alive of the cold request expires
+    warmer = OllamaWarmer(MODEL, base_url=base_url, keep_alive="2s")
+    warmer.warm_up()
+    warm = first_token(base_url, keep_alive="2s")
+    print(f"{'after startup warm-up':<44}{warm:>11.2f}s")
+
+    time.sleep(2.5)  # Idle longer than keep_alive, no heartbeat
+    expired = first_token(base_url, keep_alive="2s")
+    print(f"{'idle past keep_alive, no heartbeat':<44}{expired:>11.2f}s")
+
+    warmer = OllamaWarmer(MODEL, base_url=base_url, keep_alive="2s", heartbeat_interval=1.0)
+    warmer.start()
+    time.sleep(load_seconds + 2.5)  # Startup warm-up, then idle past keep_alive
+    kept = first_token(base_url, keep_alive="2s")
+    warmer.stop()
+    stats = warmer.snapshot()
+    print(f"{'idle past keep_alive, heartbeat every 1s':<44}{kept:>11.2f}s"
+          f"   ({stats['heartbeats']} heartbeats)")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 2.0)
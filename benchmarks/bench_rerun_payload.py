@@ -0,0 +1,136 @@
+# =====================================================
+# 📊 MICRO-BENCHMARK: PER-RERUN PAYLOAD OF chatbot.py
+# =====================================================
+# Runs chatbot.py under Streamlit's AppTest harness and reports, for each
+# scenario, the bytes of the ForwardMsgs the server would send to the browser
+# and the server-side rerun time:
+#   - first load
+#   - an idle rerun (e.g. any widget interaction that changes nothing visible)
+#   - a theme toggle
+#   - fragment-only reruns of sidebar sections, when the page uses st.fragment
+#     (what the browser triggers when a widget inside a fragment changes)
+#
+# No Groq request is made; a dummy GROQ_API_KEY is enough.
+#
+# Run from the repository root:
+#     python benchmarks/bench_rerun_payload.py
+
+import dataclasses
+import os
+import statistics
+import time
+from pathlib import Path
+
+from streamlit.testing.v1 import AppTest
+from streamlit.testing.v1.local_script_runner import LocalScriptRunner
+
+CHATBOT = Path(__file__).resolve().parent.parent / "chatbot" / "chatbot.py"
+
+_payload = []  # Bytes sent by the last run
+_fragment_queue = []  # Fragment ids to rerun instead of the whole script (next run only)
+_original_run = LocalScriptRunner.run
+_original_request_rerun = LocalScriptRunner.request_rerun
+
+
+def _measured_run(self, *args, **kwargs):
+    tree = _original_run(self, *args, **kwargs)
+    _payload.append(sum(msg.ByteSize() for msg in self.forward_msgs()))
+    return tree
+
+
+def _fragment_request_rerun(self, rerun_data):
+    accepted = _original_request_rerun(self, rerun_data)
+    if _fragment_queue:
+        # A fresh runner already holds a pending full-app request that would absorb
+        # a fragment request, so the queue is set on the pending request itself
+        requests = self._requests
+        requests._rerun_data = dataclasses.replace(
+            requests._rerun_data, fragment_id_queue=list(_fragment_queue))
+        _fragment_queue.clear()
+    return accepted
+
+
+LocalScriptRunner.run = _measured_run
+LocalScriptRunner.request_rerun = _fragment_request_rerun
+
+
+def fragment_ids(app):
+    """Fragment id per decorated function name, from the last full run"""
+    ids = {}
+    for fragment_id, fragment in app._fragment_storage._fragments.items():
+        for cell in fragment.__closure__ or ():
+            name = getattr(cell.cell_contents, "__name__", None)
+            if callable(cell.cell_contents) and name and name != "wrapped_fragment":
+                ids.setdefault(name, fragment_id)
+    return ids
+
+
+def rerun_fragment(fragment_id):
+    def action(app):
+        _fragment_queue.append(fragment_id)
+        return app
+    return action
+
+
+def measure(app, action=None, repeats=5, full_run_between=False):
+    """Median payload bytes, rerun milliseconds and script milliseconds of an interaction"""
+    sizes, timings, script = [], [], []
+    for _ in range(repeats):
+        if full_run_between:
+            # AppTest only resends the widgets of the last run; the browser resends all
+            app.run()
+        start = time.perf_counter()
+        (action(app) if action else app).run()
+        timings.append((time.perf_counter() - start) * 1000)
+        sizes.append(_payload[-1])
+        script.append(script_ms(app))
+    return (statistics.median(sizes), statistics.median(timings),
+            None if None in script else statistics.median(script))
+
+
+def script_ms(app):
+    """Time of the last run as recorded by the page itself (rerun_timing), if available"""
+    try:
+        return app.session_state["rerun_log"][-1]["ms"]
+    except KeyError:
+        return None
+
+
+def row(label, size, ms, script):
+    script = f"{script:>11.1f}" if script is not None else f"{'-':>11}"
+    print(f"{label:<32}{size:>15,.0f}{ms:>10.1f}{script}")
+
+
+def toggle_theme(app):
+    return app.button(key="theme_toggle").click()
+
+
+def main():
+    os.environ.setdefault("GROQ_API_KEY", "benchmark")
+    app = AppTest.from_file(str(CHATBOT), default_timeout=60)
+    app.session_state.messages = [
+        {"role": "user" if i % 2 else "assistant", "content": f"Message {i}"} for i in range(20)
+    ]
+    print(f"{'scenario':<32}{'payload bytes':>15}{'rerun ms':>10}{'script ms':>11}")
+    start = time.perf_counter()
+    app.run()
+    row("first load", _payload[-1], (time.perf_counter() - start) * 1000, script_ms(app))
+    for label, action in (("idle rerun", None), ("theme toggle (full run)", toggle_theme)):
+        row(label, *measure(app, action))
+
+    for name, fragment_id in sorted(fragment_ids(app).items()):
+        row(f"fragment {name}", *measure(app, rerun_fragment(fragment_id), full_run_between=True))
+
+    try:
+        import sys
+        sys.path.insert(0, str(CHATBOT.parent))
+        from static_assets import StaticAssets
+    except ImportError:  # Before the static asset pipeline
+        return
+    print(f"\n{'asset':<16}{'source bytes':>15}{'built bytes':>13}")
+    for name, (source, built) in StaticAssets().sizes.items():
+        print(f"{name:<16}{source:>15,}{built:>13,}")
+
+
+if __name__ == "__main__":
+    main()
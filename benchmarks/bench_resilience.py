@@ -0,0 +1,117 @@
+# =====================================================
+# 📊 RETRIES, BACKOFF & CIRCUIT BREAKER AGAINST A FAKE GROQ
+# =====================================================
+# Sends real ChatGroq requests (pooled client, rate limiter, streaming) to the
+# local Groq stub (benchmarks/groq_stub.py) while it returns 429/503 errors,
+# and checks what the resilience layer does:
+#   - 429 with Retry-After: retried after at least the requested delay
+#   - 503 without Retry-After: retried with exponential backoff
+#   - Retry-After longer than LLM_BACKOFF_MAX: fails fast, no sleep
+#   - sustained 503: the circuit opens, later calls fail without a request,
+#     and one trial request closes it again after the reset timeout
+#
+# Run from the repository root:
+#     python benchmarks/bench_resilience.py
+
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "chatbot"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from groq_stub import start_in_background  # noqa: E402
+
+server, base_url = start_in_background(token_seconds=0.001)
+os.environ["GROQ_API_BASE"] = base_url  # Read when groq_client is imported
+os.environ.setdefault("LLM_BACKOFF_MAX", "5")
+
+from langchain_core.messages import HumanMessage  # noqa: E402
+
+from llm_backends import GroqBackend  # noqa: E402
+from resilience import (  # noqa: E402
+    LLM_BACKOFF_MAX, CircuitBreaker, LLMCallError, call_with_retries
+)
+
+MESSAGES = [HumanMessage(content="Hello")]
+
+
+def ask(breaker, max_retries=3):
+    """
+    One routed-style request: open the stream and read the first chunk under
+    call_with_retries (as LLMRouter does), then drain the rest
+
+    Returns:
+        tuple: (answer or error kind, seconds, [retry delays])
+    """
+    backend = GroqBackend("stub-key", "llama-3.1-8b-instant")
+    delays = []
+
+    def open_stream():
+        chunks = backend.stream(MESSAGES, 0.0, 64)
+        return chunks, next(chunks, None)
+
+    start = time.perf_counter()
+    try:
+        chunks, first = call_with_retries(open_stream, breaker=breaker, max_retries=max_retries,
+                                          on_retry=lambda error, attempt, delay: delays.append(delay))
+        answer = (first or "") + "".join(chunks)
+    except LLMCallError as error:
+        answer = f"<{error.kind}>"
+    return answer, time.perf_counter() - start, delays
+
+
+def report(name, result, requests):
+    answer, seconds, delays = result
+    shown = answer if answer.startswith("<") else f"{len(answer)} chars"
+    print(f"{name:<34}{shown:>16}{seconds:>8.2f}s  requests={requests}  "
+          f"delays={[round(d, 2) for d in delays]}")
+
+
+def sent_since(count):
+    return server.state.statuses()[count:]
+
+
+def main():
+    state = server.state
+    print(f"Groq stub at {base_url}, LLM_BACKOFF_MAX={LLM_BACKOFF_MAX:g}s\n")
+
+    mark = len(state.statuses())
+    state.fail(429, count=2, retry_after=1)
+    result = ask(CircuitBreaker("retry-after"))
+    report("429 x2, Retry-After: 1", result, sent_since(mark))
+    assert sent_since(mark) == [429, 429, 200] and all(d >= 1 for d in result[2])
+
+    mark = len(state.statuses())
+    state.fail(503, count=2)
+    result = ask(CircuitBreaker("backoff"))
+    report("503 x2, no Retry-After", result, sent_since(mark))
+    assert sent_since(mark) == [503, 503, 200] and all(d <= LLM_BACKOFF_MAX for d in result[2])
+
+    mark = len(state.statuses())
+    state.fail(429, retry_after=LLM_BACKOFF_MAX * 10)
+    result = ask(CircuitBreaker("fail-fast"))
+    report(f"429, Retry-After: {LLM_BACKOFF_MAX * 10:g}", result, sent_since(mark))
+    assert result[0] == "<rate_limit>" and result[1] < 1 and not result[2]
+
+    breaker = CircuitBreaker("breaker", failure_threshold=3, reset_timeout=1.0)
+    mark = len(state.statuses())
+    state.fail(503, count=10)
+    report("503 sustained, no retries", ask(breaker, max_retries=0), sent_since(mark))
+    for _ in range(2):
+        ask(breaker, max_retries=0)
+    mark = len(state.statuses())
+    report("circuit open", ask(breaker), sent_since(mark))
+    assert breaker.state == "open" and not sent_since(mark)
+
+    time.sleep(1.0)
+    state.failures.clear()
+    mark = len(state.statuses())
+    report("after reset timeout (trial)", ask(breaker), sent_since(mark))
+    assert breaker.state == "closed" and sent_since(mark) == [200]
+    print("\nAll resilience checks passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# =====================================================
+# 📊 MICRO-BENCHMARK: STREAM HANDLER RENDER COST
+# =====================================================
+# Compares the original per-token StreamHandler with ThrottledMarkdownWriter
+# for a simulated 1k-token answer. Reports how many times the placeholder is
+# redrawn and how many bytes are pushed to the browser.
+#
+# Run from the repository root:
+#     python benchmarks/bench_stream_handler.py
+
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "chatbot"))
+
+from streaming import ThrottledMarkdownWriter  # noqa: E402
+
+
+class FakeContainer:
+    """Stand-in for st.empty() that only counts what would be sent"""
+
+    def __init__(self):
+        self.calls = 0
+        self.bytes = 0
+
+    def markdown(self, text):
+        self.calls += 1
+        self.bytes += len(text.encode("utf-8"))
+
+
+class FakeClock:
+    """Deterministic clock advanced by the simulated token arrival times"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_tokens(count, seed=0):
+    """Generate tokens with a realistic length distribution (~4 chars each)"""
+    rng = random.Random(seed)
+    words = ["the", " model", " answer", " stream", "ing", " token", ",", ".", "\n", " Groq"]
+    return [rng.choice(words) for _ in range(count)]
+
+
+def run_naive(tokens):
+    """Original handler: re-render the full text on every token"""
+    container = FakeContainer()
+    text = ""
+    for token in tokens:
+        text += token
+        container.markdown(text)
+    return container.calls, container.bytes
+
+
+def run_throttled(tokens, tokens_per_second, fps):
+    """ThrottledMarkdownWriter driven by a fake clock"""
+    container = FakeContainer()
+    clock = FakeClock()
+    writer = ThrottledMarkdownWriter(container, fps=fps, clock=clock)
+    for token in tokens:
+        clock.now += 1.0 / tokens_per_second
+        writer.write(token)
+    writer.close()
+    return writer.render_calls, writer.bytes_sent
+
+
+def main(token_count=1000):
+    tokens = make_tokens(token_count)
+    answer_bytes = len("".join(tokens).encode("utf-8"))
+    print(f"Answer: {token_count} tokens, {answer_bytes:,} bytes\n")
+    print(f"{'handler':<32}{'render calls':>14}{'bytes sent':>14}{'cpu ms':>10}")
+
+    start = time.perf_counter()
+    calls, sent = run_naive(tokens)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"{'per-token (before)':<32}{calls:>14,}{sent:>14,}{elapsed:>10.2f}")
+
+    # Groq serves roughly 100-800 tokens/s depending on the model
+    for tps in (100, 250, 800):
+        for fps in (12, 30):
+            start = time.perf_counter()
+            calls, sent = run_throttled(tokens, tps, fps)
+            elapsed = (time.perf_counter() - start) * 1000
+            label = f"throttled {fps}fps @ {tps} tok/s"
+            print(f"{label:<32}{calls:>14,}{sent:>14,}{elapsed:>10.2f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
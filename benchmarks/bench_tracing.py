@@ -0,0 +1,66 @@
+# =====================================================
+# 📊 MICRO-BENCHMARK: COST OF TRACING SPANS
+# =====================================================
+# What tracing adds to a page run: the cost of one span (context manager and
+# start/end forms) and of finishing a trace the size of a chatbot.py run
+# (~12 spans) and serializing it to OTLP/JSON (done on the exporter thread).
+#
+# Run from the repository root:
+#     python benchmarks/bench_tracing.py
+
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "chatbot"))
+
+from tracing import finish_trace, span, start_trace  # noqa: E402
+
+REPEATS = 20_000
+PHASES = ("sidebar · theme", "theme css", "sidebar · model settings", "sidebar · chat actions",
+          "chat init", "history render", "prompt build", "cache lookup", "llm call",
+          "markdown render", "sidebar · analytics")
+
+
+def per_call_us(func, repeats=REPEATS):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        func()
+    return (time.perf_counter() - start) / repeats * 1e6
+
+
+def with_span():
+    with span("phase", messages=10):
+        pass
+
+
+def start_end():
+    span("phase").end()
+
+
+def page_run():
+    start_trace("chatbot · full page")
+    for name in PHASES:
+        with span(name):
+            pass
+    return finish_trace()
+
+
+def main():
+    start_trace("benchmark")
+    print(f"span() context manager: {per_call_us(with_span):.2f} us")
+    print(f"span().end():           {per_call_us(start_end):.2f} us")
+    finish_trace()
+
+    print(f"trace of a page run:    {per_call_us(page_run, 2000):.1f} us ({len(PHASES) + 1} spans)")
+    trace = page_run()
+    print(f"summary for the panel:  {per_call_us(trace.summary, 2000):.1f} us")
+    line = json.dumps(trace.to_otlp(), separators=(",", ":"))
+    print(f"OTLP/JSON line:         "
+          f"{per_call_us(lambda: json.dumps(trace.to_otlp(), separators=(',', ':')), 2000):.1f} us, "
+          f"{len(line)} bytes (exporter thread)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+# =====================================================
+# 🧪 LOCAL FAKE OF THE GROQ CHAT COMPLETIONS API
+# =====================================================
+# A tiny stand-in for api.groq.com, so retries, backoff, Retry-After handling
+# and the circuit breaker can be exercised without a key or a quota. It serves
+# POST /openai/v1/chat/completions (streamed as server-sent events, like the
+# real API) and fails on demand:
+#   - queue failures with state.fail(status, count, retry_after), or
+#   - start it with --fail 429,503 --retry-after 2 (each listed status once)
+# Failed requests return the status with an OpenAI-style error body and, if
+# set, a Retry-After header.
+#
+# Run it on its own and point the app at it:
+#     python benchmarks/groq_stub.py --port 8008 --fail 429,429 --retry-after 1
+#     GROQ_API_BASE=http://127.0.0.1:8008 streamlit run chatbot/streamlit_app.py
+
+import argparse
+import collections
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPLY = "Hello from the Groq stub! This answer is streamed token by token."
+
+
+class StubState:
+    """Queued failures and every request received, for inspection"""
+
+    def __init__(self, token_seconds):
+        self.token_seconds = token_seconds
+        self.failures = collections.deque()  # (status, retry_after) per upcoming request
+        self.requests = []                   # (time, status) of every completion request
+        self.lock = threading.Lock()
+
+    def fail(self, status, count=1, retry_after=None):
+        """Make the next `count` requests fail with `status` (and Retry-After, if given)"""
+        with self.lock:
+            self.failures.extend([(status, retry_after)] * count)
+
+    def next_outcome(self):
+        """(status, retry_after) for the request being served"""
+        with self.lock:
+            outcome = self.failures.popleft() if self.failures else (200, None)
+            self.requests.append((time.time(), outcome[0]))
+            return outcome
+
+    def statuses(self):
+        with self.lock:
+            return [status for _, status in self.requests]
+
+
+def make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass  # Keep benchmark output clean
+
+        def _json(self, payload, status=200, headers=None):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+            if self.path != "/openai/v1/chat/completions":
+                self._json({"error": {"message": "not found"}}, 404)
+                return
+
+            status, retry_after = state.next_outcome()
+            if status != 200:
+                kind = "rate_limit_exceeded" if status == 429 else "service_unavailable"
+                headers = {"Retry-After": f"{retry_after:g}"} if retry_after is not None else {}
+                self._json({"error": {"message": f"Stub failure {status}", "type": kind,
+                                      "code": kind}}, status, headers)
+                return
+
+            model = body.get("model", "stub")
+            tokens = [word + " " for word in REPLY.split()]
+            limit = body.get("max_tokens") or body.get("max_completion_tokens")
+            if limit and limit > 0:
+                tokens = tokens[:limit]
+            created = int(time.time())
+
+            def chunk(delta, finish_reason=None):
+                return {"id": "chatcmpl-stub", "object": "chat.completion.chunk",
+                        "created": created, "model": model,
+                        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+
+            if not body.get("stream"):
+                for _ in tokens:
+                    time.sleep(state.token_seconds)
+                self._json({"id": "chatcmpl-stub", "object": "chat.completion",
+                            "created": created, "model": model,
+                            "choices": [{"index": 0, "finish_reason": "stop",
+                                         "message": {"role": "assistant",
+                                                     "content": "".join(tokens)}}],
+                            "usage": {"prompt_tokens": 0, "completion_tokens": len(tokens),
+                                      "total_tokens": len(tokens)}})
+                return
+
+            # Server-sent events with chunked transfer encoding, like the real API
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            try:
+                self._write_event(chunk({"role": "assistant", "content": ""}))
+                for token in tokens:
+                    time.sleep(state.token_seconds)
+                    self._write_event(chunk({"content": token}))
+                self._write_event(chunk({}, "stop"))
+                self._write_event("[DONE]")
+                self.wfile.write(b"0\r\n\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                self.close_connection = True  # Client stopped reading (e.g. cancelled)
+
+        def _write_event(self, payload):
+            data = payload if isinstance(payload, str) else json.dumps(payload)
+            event = f"data: {data}\n\n".encode()
+            self.wfile.write(f"{len(event):X}\r\n".encode() + event + b"\r\n")
+            self.wfile.flush()
+
+    return Handler
+
+
+def make_server(port=0, token_seconds=0.01):
+    """
+    Create (but do not start) a stub server
+
+    Args:
+        port (int): Port to listen on (0 = any free port)
+        token_seconds (float): Simulated time per generated token
+
+    Returns:
+        ThreadingHTTPServer: Server with a .state attribute (StubState)
+    """
+    state = StubState(token_seconds)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    server.daemon_threads = True
+    server.state = state
+    return server
+
+
+def start_in_background(**kwargs):
+    """Start a stub server on a daemon thread; returns (server, base_url)"""
+    server = make_server(**kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local fake of the Groq chat completions API")
+    parser.add_argument("--port", type=int, default=8008)
+    parser.add_argument("--token-seconds", type=float, default=0.02)
+    parser.add_argument("--fail", default="", help="Statuses for the first requests, e.g. 429,503")
+    parser.add_argument("--retry-after", type=float, default=None)
+    args = parser.parse_args()
+    server = make_server(args.port, args.token_seconds)
+    for status in filter(None, args.fail.split(",")):
+        server.state.fail(int(status), retry_after=args.retry_after)
+    print(f"Groq stub listening on http://127.0.0.1:{args.port}")
+    server.serve_forever()
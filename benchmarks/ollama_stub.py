@@ -0,0 +1,229 @@
+# =====================================================
+# 🧪 LOCAL STUB OF THE OLLAMA HTTP API
+# =====================================================
+# A tiny stand-in for an Ollama server, so warm-up, keep-alive and streaming
+# can be exercised without a GPU or a real model. It simulates:
+#   - a model load delay on the first request after the model was unloaded
+#   - keep_alive expiry ("30m", "10s", seconds, or -1 = forever)
+#   - POST /api/generate (empty prompt = preload), POST /api/chat, GET /api/ps
+#   - Ollama's timing fields (load_duration, prompt_eval_*, eval_*)
+#
+# Run it on its own and point the app at it:
+#     python benchmarks/ollama_stub.py --port 11435 --load-seconds 3
+#     OLLAMA_BASE_URL=http://127.0.0.1:11435 streamlit run chatbot/myollama.py
+
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_KEEP_ALIVE = 300  # Ollama's default: 5 minutes
+
+REPLY = "Hello from the Ollama stub! This answer is streamed token by token."
+
+
+def parse_keep_alive(value):
+    """Convert an Ollama keep_alive value to seconds (None = forever)"""
+    if value is None:
+        return DEFAULT_KEEP_ALIVE
+    if isinstance(value, (int, float)):
+        return None if value < 0 else float(value)
+    match = re.fullmatch(r"(-?\d+(?:\.\d+)?)([smh]?)", str(value).strip())
+    if not match:
+        return DEFAULT_KEEP_ALIVE
+    number = float(match.group(1))
+    if number < 0:
+        return None
+    return number * {"": 1, "s": 1, "m": 60, "h": 3600}[match.group(2)]
+
+
+class StubState:
+    """Loaded models and the last prompt seen per model (for KV-prefix reuse)"""
+
+    def __init__(self, load_seconds, token_seconds, prompt_token_seconds):
+        self.load_seconds = load_seconds
+        self.token_seconds = token_seconds
+        self.prompt_token_seconds = prompt_token_seconds
+        self.loaded = {}        # model -> expiry time (None = never)
+        self.last_prompt = {}   # model -> list of prompt "tokens" of the last request
+        self.requests = []      # (path, body) of every request, for inspection
+        self.lock = threading.Lock()
+
+    def ensure_loaded(self, model, keep_alive):
+        """Load the model if needed; returns the load time in seconds"""
+        with self.lock:
+            expiry = self.loaded.get(model, 0)
+            resident = model in self.loaded and (expiry is None or expiry > time.time())
+        load = 0.0
+        if not resident:
+            time.sleep(self.load_seconds)
+            load = self.load_seconds
+            with self.lock:
+                self.last_prompt.pop(model, None)  # KV cache is lost on unload
+        seconds = parse_keep_alive(keep_alive)
+        with self.lock:
+            self.loaded[model] = None if seconds is None else time.time() + seconds
+            if seconds == 0:
+                del self.loaded[model]
+        return load
+
+    def evaluate_prompt(self, model, tokens):
+        """Simulate prompt evaluation; tokens matching the cached prefix are free"""
+        with self.lock:
+            previous = self.last_prompt.get(model, [])
+            self.last_prompt[model] = tokens
+        reused = 0
+        for old, new in zip(previous, tokens):
+            if old != new:
+                break
+            reused += 1
+        count = len(tokens) - reused
+        time.sleep(count * self.prompt_token_seconds)
+        return count, count * self.prompt_token_seconds
+
+    def resident_models(self):
+        now = time.time()
+        with self.lock:
+            return [model for model, expiry in self.loaded.items() if expiry is None or expiry > now]
+
+
+def make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass  # Keep benchmark output clean
+
+        def _json(self, payload, status=200):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/api/ps":
+                self._json({"models": [{"name": m, "model": m} for m in state.resident_models()]})
+            elif self.path in ("/", "/api/version"):
+                self._json({"version": "stub"})
+            else:
+                self._json({"error": "not found"}, 404)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+            state.requests.append((self.path, body))
+            model = body.get("model", "stub")
+
+            if self.path == "/api/generate":
+                prompt = body.get("prompt", "")
+                text = prompt.split()
+            elif self.path == "/api/chat":
+                text = [w for m in body.get("messages", []) for w in
+                        [f"<{m.get('role')}>", *m.get("content", "").split()]]
+            else:
+                self._json({"error": "not found"}, 404)
+                return
+
+            start = time.perf_counter()
+            load = state.ensure_loaded(model, body.get("keep_alive"))
+            if self.path == "/api/generate" and not text:
+                # Empty prompt: only load the model (this is how clients preload)
+                self._json({"model": model, "response": "", "done": True,
+                            "done_reason": "load", "load_duration": int(load * 1e9),
+                            "total_duration": int((time.perf_counter() - start) * 1e9)})
+                return
+
+            prompt_count, prompt_seconds = state.evaluate_prompt(model, text)
+            tokens = [word + " " for word in REPLY.split()]
+            limit = (body.get("options") or {}).get("num_predict")
+            if limit and limit > 0:
+                tokens = tokens[:limit]
+
+            def chunk(token, done=False):
+                payload = {"model": model, "done": done}
+                if self.path == "/api/chat":
+                    payload["message"] = {"role": "assistant", "content": token}
+                else:
+                    payload["response"] = token
+                if done:
+                    payload.update({
+                        "done_reason": "stop",
+                        "total_duration": int((time.perf_counter() - start) * 1e9),
+                        "load_duration": int(load * 1e9),
+                        "prompt_eval_count": prompt_count,
+                        "prompt_eval_duration": int(prompt_seconds * 1e9),
+                        "eval_count": len(tokens),
+                        "eval_duration": int(len(tokens) * state.token_seconds * 1e9),
+                    })
+                return payload
+
+            if body.get("stream", True) is False:
+                for _ in tokens:
+                    time.sleep(state.token_seconds)
+                final = chunk("".join(tokens), done=True)
+                self._json(final)
+                return
+
+            # NDJSON stream with chunked transfer encoding, like the real server
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            try:
+                for token in tokens:
+                    time.sleep(state.token_seconds)
+                    self._write_chunk(chunk(token))
+                self._write_chunk(chunk("", done=True))
+                self.wfile.write(b"0\r\n\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                self.close_connection = True  # Client stopped reading (e.g. cancelled)
+
+        def _write_chunk(self, payload):
+            data = json.dumps(payload).encode() + b"\n"
+            self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+    return Handler
+
+
+def make_server(port=0, load_seconds=2.0, token_seconds=0.01, prompt_token_seconds=0.002):
+    """
+    Create (but do not start) a stub server
+
+    Args:
+        port (int): Port to listen on (0 = any free port)
+        load_seconds (float): Simulated model load time
+        token_seconds (float): Simulated time per generated token
+        prompt_token_seconds (float): Simulated time per evaluated prompt token
+
+    Returns:
+        ThreadingHTTPServer: Server with a .state attribute (StubState)
+    """
+    state = StubState(load_seconds, token_seconds, prompt_token_seconds)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    server.daemon_threads = True
+    server.state = state
+    return server
+
+
+def start_in_background(**kwargs):
+    """Start a stub server on a daemon thread; returns (server, base_url)"""
+    server = make_server(**kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stub of the Ollama HTTP API")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--load-seconds", type=float, default=2.0)
+    parser.add_argument("--token-seconds", type=float, default=0.02)
+    parser.add_argument("--prompt-token-seconds", type=float, default=0.002)
+    args = parser.parse_args()
+    server = make_server(args.port, args.load_seconds, args.token_seconds, args.prompt_token_seconds)
+    print(f"Ollama stub listening on http://127.0.0.1:{args.port}")
+    server.serve_forever()
@@ -5,18 +5,23 @@
 
 
 # importing the required libraries
-from langchain_openai import ChatOpenAI   # ✅ Correct import
-from langchain.prompts import ChatPromptTemplate
-from langchain.schema import StrOutputParser
-from langchain.callbacks.base import BaseCallbackHandler
-
 import streamlit as st
 
 from dotenv import load_dotenv
 import os
+import time
+
+from llm_backends import OpenAIBackend, fallback_backends
+from llm_router import LLMRouter
+from metrics_registry import instrument_stream, observe_rerun, track_page
+from prompt_cache import to_langchain_message
+from streaming import ThrottledMarkdownWriter
 
 load_dotenv()
 
+# Process-wide metrics: this session is active, and the page run is timed
+page_start = track_page()
+
 api_key = os.getenv("LANGSMITH_API_KEY")
 if not api_key:
     raise EnvironmentError("LANGSMITH_API_KEY is missing in the .env file.")
@@ -32,15 +37,8 @@ os.environ["LANGSMITH_API_KEY"] = api_key
 # os.environ["LANGCHAIN_TRACING_V2"] = "true"
 # os.environ["LANGCHAIN_API_KEY"] = os.getenv("LANGCHAIN_API_KEY")
 
-# --- Streaming Callback ---
-class StreamHandler(BaseCallbackHandler):
-    def __init__(self, container):
-        self.container = container
-        self.text = ""
-
-    def on_llm_new_token(self, token, **kwargs):
-        self.text += token
-        self.container.markdown(self.text)
+# Redraws per second while streaming (higher = smoother, more websocket traffic)
+STREAM_FPS = float(os.getenv("STREAM_FPS", "12"))
 
 # --- Streamlit App ---
 st.title("⚡ Fast Chatbot with LangChain + Streamlit")
@@ -53,24 +51,23 @@ if input_text:
     # Placeholder for streaming output
     response_container = st.empty()
 
-    # Attach streaming handler
-    stream_handler = StreamHandler(response_container)
-
-    # Use a smaller/faster model if available (swap llama3.2 → llama3.1:8b or mistral)
-    llm = ChatOpenAI(
-        model="gpt-3.5-turbo",   # 🔄 replace with "llama3.1:8b" if using Ollama
-        temperature=0.3,
-        streaming=True,
-        callbacks=[stream_handler]
-    )
-
-    # Prompt template
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", "You are a helpful assistant."),
-        ("user", "Question: {Question}")
-    ])
-
-    chain = prompt | llm | StrOutputParser()
-
-    # Run chain
-    chain.invoke({"Question": input_text})
+    # Coalesce streamed tokens into at most STREAM_FPS redraws a second
+    writer = ThrottledMarkdownWriter(response_container, fps=STREAM_FPS)
+
+    messages = [
+        to_langchain_message("system", "You are a helpful assistant."),
+        to_langchain_message("user", f"Question: {input_text}"),
+    ]
+
+    # OpenAI first; other backends only if configured with LLM_FALLBACKS
+    # (🔄 e.g. LLM_FALLBACKS=ollama to fall back to a local llama3.1:8b or mistral)
+    router = LLMRouter([OpenAIBackend("gpt-3.5-turbo"), *fallback_backends("openai")])
+    try:
+        for text in instrument_stream(router.stream(messages, temperature=0.3, max_tokens=1024),
+                                      router, messages):
+            writer.write(text)
+    finally:
+        # Final flush without the cursor, keeping whatever was generated visible
+        writer.close()
+
+observe_rerun(time.perf_counter() - page_start)
@@ -0,0 +1,218 @@
+# =====================================================
+# 📌 STREAMING CHAT EXPORT & IMPORT (JSONL, MARKDOWN, GZIP)
+# =====================================================
+# Exports are produced as a stream of chunks - one message at a time - and
+# joined once into bytes, instead of growing one string message by message.
+# st.download_button keeps its whole payload in memory whatever it is given
+# (a file object is read in full), so the bytes are not spooled to disk.
+#   - JSONL: a header line (session analytics and summary) followed by one
+#     line per message with its metadata (model, response_time, cached,
+#     error kind); this is the format that can be imported again
+#   - Markdown: for reading
+#   - either one optionally gzip-compressed, also chunk by chunk
+# read_export() streams a JSONL export (plain or gzip) back: the header
+# first, then validated MessageRecords, so a conversation can be continued.
+
+import datetime
+import gzip
+import json
+import zlib
+
+from message_record import MessageRecord, Role
+
+EXPORT_VERSION = 1
+
+# Format name -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    "Markdown": ("md", "text/markdown"),
+    "JSONL": ("jsonl", "application/x-ndjson"),
+}
+
+ROLE_HEADINGS = {Role.USER: "👤 User", Role.ASSISTANT: "🤖 Assistant", Role.SYSTEM: "⚙️ System"}
+
+
+def _json_default(value):
+    """JSON for analytics values that are not plain JSON types"""
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    if hasattr(value, "to_dict"):
+        return value.to_dict()
+    raise TypeError(f"Cannot export {type(value).__name__}")
+
+
+def _records(messages):
+    """Records from message records or dicts (stored pages), skipping unreadable ones"""
+    for message in messages:
+        try:
+            yield MessageRecord.from_dict(message)
+        except (AttributeError, KeyError, TypeError, ValueError):
+            continue
+
+
+def jsonl_chunks(messages, header):
+    """
+    Yield a JSONL export: the header line, then one line per message
+
+    Args:
+        messages (iterable): Message records or dicts, oldest first
+        header (dict): Session information (analytics, summary, session_id...)
+    """
+    yield json.dumps({"type": "session", "version": EXPORT_VERSION, **header},
+                     default=_json_default, ensure_ascii=False) + "\n"
+    for record in _records(messages):
+        yield json.dumps({"type": "message", **record.to_dict()}, ensure_ascii=False) + "\n"
+
+
+def markdown_chunks(messages, header):
+    """
+    Yield a readable Markdown export, one message per chunk
+
+    Args:
+        messages (iterable): Message records or dicts, oldest first
+        header (dict): Session information (analytics, summary, exported_at...)
+    """
+    yield (f"# CypherNova Chat Export\n\n"
+           f"_Exported {header['exported_at'][:16].replace('T', ' ')}_\n\n")
+    for record in _records(messages):
+        details = [datetime.datetime.fromtimestamp(record.timestamp).strftime("%Y-%m-%d %H:%M")]
+        if record.model:
+            details.append(record.model)
+        if record.response_time is not None:
+            details.append(f"{record.response_time:.1f}s")
+        if record.cached:
+            details.append("cached")
+        if record.error:
+            details.append(f"error: {record.error_kind}")
+        yield f"### {ROLE_HEADINGS[record.role]} · {' · '.join(details)}\n\n{record.content}\n\n"
+
+    if header.get("summary"):
+        yield f"---\n\n## Conversation Summary\n\n{header['summary']}\n\n"
+
+    analytics = header.get("analytics") or {}
+    yield "---\n\n## Chat Analytics\n\n"
+    for label, key in (("Total Messages", "total_messages"), ("User Messages", "user_messages"),
+                       ("Bot Messages", "bot_messages")):
+        if key in analytics:
+            yield f"- {label}: {analytics[key]}\n"
+    if header.get("session_duration"):
+        yield f"- Session Duration: {header['session_duration']}\n"
+
+
+def export_chunks(messages, header, fmt="Markdown"):
+    """
+    Yield an export in one of EXPORT_FORMATS as text chunks
+
+    Args:
+        messages (iterable): Message records or dicts, oldest first
+        header (dict): Session information; exported_at is filled in if missing
+        fmt (str): "Markdown" or "JSONL"
+    """
+    header = {"exported_at": datetime.datetime.now().isoformat(timespec="seconds"), **header}
+    chunks = jsonl_chunks if fmt == "JSONL" else markdown_chunks
+    yield from chunks(messages, header)
+
+
+def gzip_chunks(chunks, encoding="utf-8"):
+    """
+    Gzip-compress a stream of text chunks
+
+    Yields:
+        bytes: Compressed data, as soon as the compressor emits it
+    """
+    compressor = zlib.compressobj(level=6, wbits=31)  # wbits=31: gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode(encoding))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_bytes(chunks, encoding="utf-8"):
+    """
+    Join chunks (text or bytes) into the payload for st.download_button
+
+    Returns:
+        bytes: The whole export
+    """
+    return b"".join(chunk.encode(encoding) if isinstance(chunk, str) else chunk
+                    for chunk in chunks)
+
+
+def read_export(fileobj):
+    """
+    Stream a JSONL export (plain or gzip-compressed) back into records
+
+    Lines are decoded one at a time; fileobj is left open for the caller.
+
+    Args:
+        fileobj: Binary file-like object (e.g. a Streamlit UploadedFile)
+
+    Yields:
+        dict, then MessageRecord: The session header first, then each message
+
+    Raises:
+        ValueError: If the file is not a CypherNova JSONL export
+    """
+    start = fileobj.read(2)
+    fileobj.seek(0)
+    if start == b"\x1f\x8b":  # gzip magic number
+        fileobj = gzip.GzipFile(fileobj=fileobj, mode="rb")
+    lines = iter(fileobj)  # Binary lines; a TextIOWrapper would close fileobj when collected
+
+    try:
+        header = json.loads(next(lines, b"").decode("utf-8") or "null")
+    except (json.JSONDecodeError, UnicodeDecodeError, OSError) as e:
+        raise ValueError("Not a CypherNova JSONL export") from e
+    if not isinstance(header, dict) or header.get("type") != "session":
+        raise ValueError("Not a CypherNova JSONL export (missing session header)")
+    if header.get("version", 0) > EXPORT_VERSION:
+        raise ValueError(f"Export version {header['version']} is newer than this app supports")
+    yield header
+
+    for number, line in enumerate(lines, start=2):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line.decode("utf-8"))
+            if data.pop("type", "message") != "message":
+                continue
+            yield MessageRecord.from_dict(data)
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Line {number} is not a valid message: {e}") from e
+
+
+def restore_analytics(fresh, saved):
+    """
+    Copy exported analytics into a fresh analytics dict
+
+    Only keys the current version knows are restored, with the types of the
+    fresh values (e.g. session_start is parsed back into a datetime).
+
+    Args:
+        fresh (dict): New analytics counters (modified in place)
+        saved (dict): "analytics" from an export header
+
+    Returns:
+        dict: fresh
+    """
+    for key, default in fresh.items():
+        if key not in saved or saved[key] is None:
+            continue
+        value = saved[key]
+        try:
+            if isinstance(default, datetime.datetime):
+                value = datetime.datetime.fromisoformat(value)
+            elif isinstance(default, (set, frozenset)):
+                value = type(default)(value)
+            elif hasattr(default, "from_dict"):
+                value = type(default).from_dict(value)
+        except (AttributeError, KeyError, TypeError, ValueError):
+            continue
+        # Skip values whose shape changed between versions (e.g. the lists of
+        # response times that older exports carry instead of statistics)
+        if isinstance(value, (list, dict)) and type(value) is not type(default):
+            continue
+        fresh[key] = value
+    return fresh
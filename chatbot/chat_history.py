@@ -0,0 +1,133 @@
+# =====================================================
+# 📌 WINDOWED CHAT HISTORY RENDERING
+# =====================================================
+# Streamlit re-executes the page on every interaction, so rendering the whole
+# conversation makes each rerun slower (and the browser heavier) as the chat
+# grows. Only the newest HISTORY_WINDOW messages are rendered; a "load older"
+# button pages earlier messages in on demand - from memory, or from the
+# conversation store for resumed sessions whose older messages were never
+# loaded. Copying is done entirely in the browser by one small script that
+# adds a copy button to every chat message, instead of one server-side
+# st.button (and a rerun per click) per message.
+
+import os
+
+import streamlit as st
+
+from render_cache import install_code_styles, show_markdown
+from static_assets import run_page_script
+
+# Messages rendered by default (newest first) and added per "load older" click
+HISTORY_WINDOW = int(os.getenv("HISTORY_WINDOW", "40"))
+HISTORY_PAGE = int(os.getenv("HISTORY_PAGE", "40"))
+
+# Adds a 📋 button to every chat message in the parent page and copies the
+# message's markdown source on click (the hidden .cn-source element written by
+# show_markdown; the rendered text when there is none). Installed once per
+# browser tab; a MutationObserver decorates messages as Streamlit adds them.
+COPY_BUTTONS_SCRIPT = """
+<script>
+(function () {
+  const doc = window.parent.document;
+  if (doc.__cypherNovaCopy) return;
+  doc.__cypherNovaCopy = true;
+
+  const style = doc.createElement("style");
+  style.textContent = `
+    [data-testid="stChatMessage"] { position: relative; }
+    .cn-copy { position: absolute; top: 6px; right: 6px; opacity: 0; cursor: pointer;
+               background: transparent; border: 1px solid rgba(128,128,128,.4);
+               border-radius: 4px; padding: 2px 6px; font-size: 12px; }
+    [data-testid="stChatMessage"]:hover .cn-copy { opacity: 1; }
+    .cn-source { display: none; }`;
+  doc.head.appendChild(style);
+
+  function decorate() {
+    doc.querySelectorAll('[data-testid="stChatMessage"]').forEach(function (message) {
+      if (message.querySelector(":scope > .cn-copy")) return;
+      const button = doc.createElement("button");
+      button.type = "button";
+      button.className = "cn-copy";
+      button.title = "Copy message";
+      button.textContent = "📋";
+      message.appendChild(button);
+    });
+  }
+
+  doc.addEventListener("click", function (event) {
+    const button = event.target.closest(".cn-copy");
+    if (!button) return;
+    const message = button.parentElement;
+    const source = message.querySelector(".cn-source");
+    const content = message.querySelector('[data-testid="stChatMessageContent"]') || message;
+    const text = source ? source.textContent : content.innerText;
+    window.parent.navigator.clipboard.writeText(text).then(function () {
+      button.textContent = "✅";
+      setTimeout(function () { button.textContent = "📋"; }, 1200);
+    });
+  });
+
+  let pending = false;
+  new MutationObserver(function () {
+    if (pending) return;
+    pending = true;
+    window.parent.requestAnimationFrame(function () { pending = false; decorate(); });
+  }).observe(doc.body, { childList: true, subtree: true });
+  decorate();
+})();
+</script>
+"""
+
+
+def install_copy_buttons():
+    """Add the client-side copy buttons (installs once per tab; cheap to repeat)"""
+    run_page_script(COPY_BUTTONS_SCRIPT)
+
+
+def _load_older(window_key):
+    """Button callback: runs before the rerun, so the new window applies immediately"""
+    st.session_state[window_key] += HISTORY_PAGE
+
+
+def reset_history_window(window_key="history_window"):
+    """Go back to showing only the newest messages (e.g. after Clear Chat)"""
+    st.session_state[window_key] = HISTORY_WINDOW
+
+
+def render_history(messages, window_key="history_window", older=0, fetch_older=None):
+    """
+    Render the newest messages with a control to page in older ones
+
+    Args:
+        messages (list): Message dicts with "role" and "content", oldest first
+        window_key (str): Session state key holding how many messages to render
+        older (int): Earlier messages that are only in the conversation store
+        fetch_older (callable): fetch_older(count) returns the last `count` of those
+            messages, oldest first (read on every rerun, not kept in memory)
+
+    Returns:
+        int: Index of the first rendered message in `messages`
+    """
+    if window_key not in st.session_state:
+        reset_history_window(window_key)
+    window = st.session_state[window_key]
+    start = max(len(messages) - window, 0)
+    stored = min(max(window - len(messages), 0), older) if fetch_older else 0
+    hidden = start + (older - stored if fetch_older else 0)
+
+    if hidden:
+        st.button(
+            f"⬆️ Load {min(hidden, HISTORY_PAGE)} older message(s) ({hidden} hidden)",
+            key=f"{window_key}_older",
+            on_click=_load_older,
+            args=(window_key,),
+            width="stretch",
+        )
+
+    install_code_styles()
+    for msg in (fetch_older(stored) if stored else []) + messages[start:]:
+        with st.chat_message(msg["role"]):
+            show_markdown(msg["content"])  # Cached HTML, rendered once per message
+
+    install_copy_buttons()
+    return start
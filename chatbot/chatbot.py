@@ -2,23 +2,60 @@
 # 📌 IMPORT REQUIRED LIBRARIES
 # =====================================================
 # LangChain imports for AI model integration and prompt handling
-from langchain.prompts import ChatPromptTemplate  # For creating structured prompts
-from langchain_core.output_parsers import StrOutputParser  # For parsing model responses
-from langchain_groq import ChatGroq  # Groq AI model integration (fast inference)
+from langchain_core.messages import SystemMessage  # System prompt message object
 
 # Standard Python libraries
 import os  # For environment variable access
 import streamlit as st  # Streamlit web app framework
 from dotenv import load_dotenv  # For loading environment variables from .env file
-import json  # For JSON data handling
 import datetime  # For timestamp and duration tracking
-from io import StringIO  # For string buffer operations
+import collections  # Bounded window of imported messages
 import time  # For response time measurement
-from pathlib import Path  # For robust path handling
+
+# Local helpers
+from streaming import ThrottledMarkdownWriter  # Frame-rate limited token rendering
+from chat_history import render_history, reset_history_window  # Windowed history, client-side copy
+from render_cache import get_render_cache, show_markdown  # Messages rendered to HTML once
+from static_assets import apply_theme, get_static_assets  # Minified themes, encoded logo
+from rerun_timing import FULL_PAGE, record_run, show_rerun_log, timed_fragment  # Fragment reruns
+from metrics_registry import instrument_stream, record_cache_hit, track_page  # Prometheus metrics
+from tracing import (  # Per-phase spans, exported as OpenTelemetry JSON
+    SPAN_KIND_CLIENT, finish_trace, show_trace_summary, span, start_trace
+)
+from rerun_profiler import show_profile_controls  # Opt-in capture of one rerun (streamlit_app.py)
+from groq_client import get_client_registry, get_groq_llm  # Pooled Groq clients
+from llm_backends import GroqBackend, fallback_backends  # Common streaming interface
+from llm_router import LLMRouter, backend_health  # Latency-aware routing with fallback
+from message_record import MESSAGE_FORMAT, MessageRecord, Role, upgrade_messages  # Slotted messages
+from conversation_store import (  # Durable history, resumable by session ID
+    RESUME_WINDOW, current_session_id, get_conversation_store, new_session_id, switch_session
+)
+from chat_export import (  # Streaming JSONL/Markdown/gzip export and JSONL import
+    EXPORT_FORMATS, export_bytes, export_chunks, gzip_chunks, read_export, restore_analytics
+)
+from context_window import ContextWindowManager, count_tokens  # Token-budgeted history selection
+from latency_stats import PerModelStats, StreamingStats  # Constant-memory percentiles per model
+from prompt_cache import PromptCache  # Messages converted to LangChain objects once
+from summarizer import RollingSummary, SUMMARY_MODEL, SUMMARY_MAX_TOKENS  # Old-turn summary
+from response_cache import (  # Exact-match cache for low-temperature answers
+    RESPONSE_CACHE_MAX_TEMPERATURE, get_response_cache, make_cache_key
+)
+from rate_limiter import get_rate_limiter  # Shared requests/tokens per minute buckets
+from resilience import classify_error, user_message  # Typed errors for helpful messages
+from semantic_cache import (  # Near-duplicate question cache
+    SEMANTIC_CACHE_MAX_TEMPERATURE, get_semantic_cache, is_standalone
+)
 
 # Load environment variables from .env file
 load_dotenv()
 
+# Wall time of this page run (fragment-only reruns are timed separately);
+# also marks this session as active in the process-wide metrics
+rerun_start = track_page()
+
+# Trace this run's phases
+start_trace("chatbot · full page")
+
 # =====================================================
 # 📌 ENVIRONMENT VARIABLES CONFIGURATION
 # =====================================================
@@ -42,16 +79,152 @@ if "dark_theme" not in st.session_state:
 
 # Initialize chat analytics tracking (Phase 1 feature)
 # This dictionary stores various metrics about the chat session
-if "chat_analytics" not in st.session_state:
-    st.session_state.chat_analytics = {
+def new_chat_analytics():
+    """
+    Build a fresh analytics dictionary for a new chat session
+
+    Returns:
+        dict: Empty analytics counters with the session start time set to now
+    """
+    return {
         "total_messages": 0,           # Total messages exchanged
         "user_messages": 0,            # Messages sent by user
         "bot_messages": 0,             # Messages sent by bot
         "session_start": datetime.datetime.now(),  # Session start time
-        "models_used": [],             # List of AI models used in session
-        "avg_response_time": []        # List of response times for analytics
+        "models_used": {},             # Answers per AI model used in session
+        "response_time": StreamingStats(),        # Total response times (mean, p50/p95/p99)
+        "time_to_first_token": StreamingStats(),  # Times until the first streamed token
+        "per_model": PerModelStats(),  # TTFT, response time, tokens/sec, prompt tokens per model
+        "prompt_build_time": None,     # Prompt build time of the last turn (seconds)
+        "prompt_tokens": None,         # Estimated prompt tokens sent in the last turn
+        "turns_dropped": 0,            # History messages left out of the last prompt
+        "cache_lookups": 0,            # Requests eligible for the response cache
+        "cache_hits": 0,               # Requests answered from the response cache
+        "semantic_lookup_ms": None,    # Latency of the last semantic cache lookup
+        "rate_limit_wait": 0.0         # Seconds spent queued for Groq quota
     }
 
+def upgrade_chat_analytics(old):
+    """
+    Convert analytics from a session started before streaming statistics
+    (which kept every response time in a list)
+    
+    Args:
+        old (dict): Analytics with sample lists
+    
+    Returns:
+        dict: Analytics in the current format, with the samples folded in
+    """
+    analytics = new_chat_analytics()
+    for key, value in old.items():
+        if key in analytics and (analytics[key] is None or type(value) is type(analytics[key])):
+            analytics[key] = value
+    for seconds in old.get("avg_response_time", []):
+        analytics["response_time"].add(seconds)
+    for seconds in old.get("time_to_first_token", []):
+        analytics["time_to_first_token"].add(seconds)
+    for model in old.get("models_used", []):
+        analytics["models_used"].setdefault(model, 0)
+    for key in ("prompt_build_time", "prompt_tokens"):
+        if isinstance(old.get(key), list):
+            analytics[key] = old[key][-1] if old[key] else None
+    return analytics
+
+if "chat_analytics" not in st.session_state:
+    st.session_state.chat_analytics = new_chat_analytics()
+elif not isinstance(st.session_state.chat_analytics.get("response_time"), StreamingStats):
+    st.session_state.chat_analytics = upgrade_chat_analytics(st.session_state.chat_analytics)
+
+# Running summary of turns that no longer fit the context budget
+if "rolling_summary" not in st.session_state:
+    st.session_state.rolling_summary = RollingSummary()
+
+# Durable conversation store (None when disabled with CONVERSATION_DB=off)
+# and this browser session's conversation ID (kept in the URL to resume it)
+conversation_store = get_conversation_store()
+session_id = current_session_id()
+
+# Number of earlier messages of a resumed conversation that were not loaded
+if "stored_before" not in st.session_state:
+    st.session_state.stored_before = 0
+
+def fetch_stored(count):
+    """The `count` stored messages just before the loaded ones (for the history view)"""
+    first = st.session_state.stored_before
+    return conversation_store.load_range(session_id, first - count, first)
+
+def start_conversation(messages, stored_before=0, analytics=None):
+    """
+    Replace this session's conversation (Clear Chat, import)
+    
+    Args:
+        messages (list): Message records kept in memory, oldest first
+        stored_before (int): Older messages that are only in the conversation store
+        analytics (dict): Analytics to continue from (default: fresh counters)
+    """
+    st.session_state.messages = messages
+    st.session_state.stored_before = stored_before
+    st.session_state.prompt_cache = PromptCache()
+    st.session_state.prompt_cache.rebuild(messages)
+    st.session_state.rolling_summary = RollingSummary()
+    st.session_state.chat_analytics = analytics or new_chat_analytics()
+    reset_history_window()
+
+def export_header():
+    """Session details written at the top of an export"""
+    analytics = st.session_state.chat_analytics
+    return {
+        "session_id": session_id,
+        "model": st.session_state.groq_model,
+        "summary": st.session_state.rolling_summary.text,
+        "session_duration": str(datetime.datetime.now() - analytics["session_start"]).split(".")[0],
+        "analytics": analytics,
+    }
+
+def import_conversation(upload):
+    """
+    Continue a conversation from a JSONL export
+    
+    The file is streamed: with the conversation store enabled, messages go
+    into a new stored session (the current one stays resumable under its ID)
+    and only the newest RESUME_WINDOW are kept in memory. Nothing changes if
+    the file turns out to be invalid.
+    
+    Args:
+        upload: Uploaded file (plain or gzip-compressed JSONL)
+    
+    Raises:
+        ValueError: If the file is not a valid export
+    """
+    records = read_export(upload)
+    header = next(records)
+    analytics = restore_analytics(new_chat_analytics(), header.get("analytics") or {})
+    
+    if conversation_store is None:
+        start_conversation(list(records), analytics=analytics)
+        return
+    
+    target = new_session_id()
+    recent = collections.deque(maxlen=RESUME_WINDOW)
+    total = 0
+    try:
+        for record in records:
+            conversation_store.append(target, record.to_dict())
+            recent.append(record)
+            total += 1
+    except ValueError:
+        conversation_store.clear(target)
+        raise
+    switch_session(target)
+    start_conversation(list(recent), stored_before=total - len(recent), analytics=analytics)
+
+def all_messages():
+    """Every message of the conversation, oldest first (stored pages are streamed)"""
+    if conversation_store is not None and st.session_state.stored_before:
+        yield from conversation_store.iter_messages(session_id)
+        return
+    yield from st.session_state.messages
+
 # =====================================================
 # 📌 STREAMLIT PAGE CONFIGURATION
 # =====================================================
@@ -64,390 +237,48 @@ st.set_page_config(
 )
 
 # =====================================================
-# 📌 THEME MANAGEMENT SYSTEM (PHASE 1 FEATURE)
+# 📌 LLM ROUTER (GROQ FIRST, AUTOMATIC FALLBACK)
 # =====================================================
-def apply_theme():
+
+def build_router(model_name, on_wait=None):
     """
-    Apply custom CSS styling based on the selected theme (dark/light)
-    This function injects CSS into the Streamlit app to customize appearance
+    Create the router for this page: the selected Groq model first, then the
+    fallback backends configured with LLM_FALLBACKS (e.g. local Ollama)
+    
+    Clients, connection pools and backend health are process-wide, so building
+    a router on every rerun is cheap.
+    
+    Args:
+        model_name (str): Name of the Groq model to use
+        on_wait (callable): Called as on_wait(seconds, position) while queued for Groq quota
+    
+    Returns:
+        LLMRouter: Router over the Groq backend and its fallbacks
     """
-    if st.session_state.dark_theme:
-        # COMPREHENSIVE DARK THEME STYLING
-        st.markdown("""
-        <style>
-        /* Force dark theme on entire app */
-        .stApp {
-            background-color: #0e1117 !important;
-            color: #fafafa !important;
-        }
-        
-        /* Main container */
-        .main .block-container {
-            background-color: #0e1117 !important;
-            color: #fafafa !important;
-        }
-        
-        /* Header and toolbar */
-        .stAppHeader, .stToolbar {
-            background-color: #262730 !important;
-        }
-        
-        /* Sidebar complete styling */
-        .stSidebar {
-            background-color: #262730 !important;
-        }
-        
-        .stSidebar > div {
-            background-color: #262730 !important;
-        }
-        
-        /* All text elements */
-        .stMarkdown, .stText, p, h1, h2, h3, h4, h5, h6, span, div {
-            color: #fafafa !important;
-        }
-        
-        /* Input elements */
-        .stSelectbox > div > div, .stSelectbox select {
-            background-color: #262730 !important;
-            color: #fafafa !important;
-            border: 1px solid #4a4a4a !important;
-        }
-        
-        .stSlider > div > div {
-            background-color: #262730 !important;
-        }
-        
-        .stTextInput > div > div > input {
-            background-color: #262730 !important;
-            color: #fafafa !important;
-            border: 1px solid #4a4a4a !important;
-        }
-        
-        /* Buttons */
-        .stButton > button {
-            background-color: #262730 !important;
-            color: #fafafa !important;
-            border: 1px solid #4a4a4a !important;
-        }
-        
-        .stButton > button:hover {
-            background-color: #363740 !important;
-            color: #ffffff !important;
-        }
-        
-        /* Chat messages */
-        .stChatMessage {
-            background-color: #1e1e2e !important;
-            border: 1px solid #4a4a4a !important;
-        }
-        
-        /* Chat input - Comprehensive coverage including outer containers */
-        .stChatInput {
-            background-color: #0e1117 !important;
-        }
-        
-        .stChatInput > div {
-            background-color: #0e1117 !important;
-        }
-        
-        .stChatInput > div > div {
-            background-color: #262730 !important;
-            border: 1px solid #4a4a4a !important;
-        }
-        
-        .stChatInput input {
-            background-color: #262730 !important;
-            color: #fafafa !important;
-        }
-        
-        /* Chat input using data-testid - all containers */
-        div[data-testid="stChatInput"] {
-            background-color: #0e1117 !important;
-        }
-        
-        div[data-testid="stChatInput"] > div {
-            background-color: #0e1117 !important;
-        }
-        
-        div[data-testid="stChatInput"] > div > div {
-            background-color: #262730 !important;
-            border: 1px solid #4a4a4a !important;
-        }
-        
-        div[data-testid="stChatInput"] input {
-            background-color: #262730 !important;
-            color: #fafafa !important;
-            border: 1px solid #4a4a4a !important;
-        }
-        
-        /* Chat input textarea */
-        div[data-testid="stChatInput"] textarea {
-            background-color: #262730 !important;
-            color: #fafafa !important;
-            border: 1px solid #4a4a4a !important;
-        }
-        
-        /* All possible chat input wrapper containers */
-        .stBottom {
-            background-color: #0e1117 !important;
-        }
-        
-        .stBottom > div {
-            background-color: #0e1117 !important;
-        }
-        
-        /* Chat input form containers */
-        form[data-testid="stChatInput"] {
-            background-color: #0e1117 !important;
-        }
-        
-        form[data-testid="stChatInput"] > div {
-            background-color: #0e1117 !important;
-        }
-        
-        /* Fixed bottom container */
-        .stAppBottom {
-            background-color: #0e1117 !important;
-        }
-        
-        /* Chat input placeholder text */
-        div[data-testid="stChatInput"] input::placeholder,
-        div[data-testid="stChatInput"] textarea::placeholder {
-            color: #888888 !important;
-        }
-        
-        /* Metrics */
-        .metric-container {
-            background-color: #262730 !important;
-        }
-        
-        /* Dividers */
-        .stDivider > div {
-            border-color: #4a4a4a !important;
-        }
-        
-        /* Download button */
-        .stDownloadButton > button {
-            background-color: #262730 !important;
-            color: #fafafa !important;
-            border: 1px solid #4a4a4a !important;
-        }
-        
-        /* Info boxes */
-        .stInfo, .stSuccess, .stWarning, .stError {
-            background-color: #262730 !important;
-            color: #fafafa !important;
-        }
-        </style>
-        """, unsafe_allow_html=True)
-    else:
-        # COMPREHENSIVE LIGHT THEME STYLING (Mobile-Friendly)
-        st.markdown("""
-        <style>
-        /* Light theme - ensure proper text visibility on all devices */
-        .stApp {
-            background-color: #ffffff !important;
-            color: #262730 !important;
-        }
-        
-        .main .block-container {
-            background-color: #ffffff !important;
-            color: #262730 !important;
-        }
-        
-        /* Sidebar styling for light theme */
-        .stSidebar {
-            background-color: #f0f2f6 !important;
-        }
-        
-        .stSidebar > div {
-            background-color: #f0f2f6 !important;
-        }
-        
-        /* All text elements - ensure dark text on light background */
-        .stMarkdown, .stText, p, h1, h2, h3, h4, h5, h6, span, div {
-            color: #262730 !important;
-        }
-        
-        /* Input elements for light theme */
-        .stSelectbox > div > div, .stSelectbox select {
-            background-color: #ffffff !important;
-            color: #262730 !important;
-            border: 1px solid #d1d5db !important;
-        }
-        
-        .stSlider > div > div {
-            background-color: #ffffff !important;
-        }
-        
-        .stTextInput > div > div > input {
-            background-color: #ffffff !important;
-            color: #262730 !important;
-            border: 1px solid #d1d5db !important;
-        }
-        
-        /* Buttons for light theme */
-        .stButton > button {
-            background-color: #ffffff !important;
-            color: #262730 !important;
-            border: 1px solid #d1d5db !important;
-        }
-        
-        .stButton > button:hover {
-            background-color: #f9fafb !important;
-            color: #111827 !important;
-        }
-        
-        /* Chat messages for light theme */
-        .stChatMessage {
-            background-color: #f9fafb !important;
-            border: 1px solid #e5e7eb !important;
-            color: #262730 !important;
-        }
-        
-        /* Chat input comprehensive styling for light theme */
-        .stChatInput {
-            background-color: #ffffff !important;
-        }
-        
-        .stChatInput > div {
-            background-color: #ffffff !important;
-        }
-        
-        .stChatInput > div > div {
-            background-color: #ffffff !important;
-            border: 1px solid #d1d5db !important;
-        }
-        
-        .stChatInput input, .stChatInput textarea {
-            background-color: #ffffff !important;
-            color: #262730 !important;
-            border: 1px solid #d1d5db !important;
-        }
-        
-        /* Chat input using data-testid */
-        div[data-testid="stChatInput"] {
-            background-color: #ffffff !important;
-        }
-        
-        div[data-testid="stChatInput"] > div {
-            background-color: #ffffff !important;
-        }
-        
-        div[data-testid="stChatInput"] > div > div {
-            background-color: #ffffff !important;
-            border: 1px solid #d1d5db !important;
-        }
-        
-        div[data-testid="stChatInput"] input,
-        div[data-testid="stChatInput"] textarea {
-            background-color: #ffffff !important;
-            color: #262730 !important;
-            border: 1px solid #d1d5db !important;
-        }
-        
-        /* Bottom containers for light theme */
-        .stBottom, .stAppBottom {
-            background-color: #ffffff !important;
-        }
-        
-        .stBottom > div {
-            background-color: #ffffff !important;
-        }
-        
-        /* Chat input form containers */
-        form[data-testid="stChatInput"] {
-            background-color: #ffffff !important;
-        }
-        
-        form[data-testid="stChatInput"] > div {
-            background-color: #ffffff !important;
-        }
-        
-        /* Placeholder text for light theme */
-        div[data-testid="stChatInput"] input::placeholder,
-        div[data-testid="stChatInput"] textarea::placeholder {
-            color: #6b7280 !important;
-        }
-        
-        /* Mobile-specific improvements */
-        @media (max-width: 768px) {
-            .stApp {
-                background-color: #ffffff !important;
-                color: #262730 !important;
-            }
-            
-            /* Ensure all text is visible on mobile */
-            .stMarkdown, .stText, p, h1, h2, h3, h4, h5, h6, span, div,
-            .stChatMessage, .stChatMessage * {
-                color: #262730 !important;
-            }
-            
-            /* Mobile chat input */
-            div[data-testid="stChatInput"] input,
-            div[data-testid="stChatInput"] textarea {
-                background-color: #ffffff !important;
-                color: #262730 !important;
-                border: 2px solid #d1d5db !important;
-            }
-            
-            /* Mobile sidebar */
-            .stSidebar, .stSidebar * {
-                background-color: #f9fafb !important;
-                color: #262730 !important;
-            }
-            
-            /* Mobile buttons */
-            .stButton > button {
-                background-color: #f3f4f6 !important;
-                color: #262730 !important;
-                border: 2px solid #d1d5db !important;
-            }
-        }
-        
-        /* Metrics for light theme */
-        .metric-container {
-            background-color: #f9fafb !important;
-            color: #262730 !important;
-        }
-        
-        /* Dividers for light theme */
-        .stDivider > div {
-            border-color: #e5e7eb !important;
-        }
-        
-        /* Download button for light theme */
-        .stDownloadButton > button {
-            background-color: #ffffff !important;
-            color: #262730 !important;
-            border: 1px solid #d1d5db !important;
-        }
-        
-        /* Info boxes for light theme */
-        .stInfo, .stSuccess, .stWarning, .stError {
-            background-color: #f9fafb !important;
-            color: #262730 !important;
-        }
-        </style>
-        """, unsafe_allow_html=True)
-
-# Apply the selected theme immediately
-apply_theme()
+    return LLMRouter([GroqBackend(groq_api_key, model_name, on_wait=on_wait),
+                      *fallback_backends("groq")])
 
 # =====================================================
-# 📌 SIDEBAR CONFIGURATION & BRANDING
+# 📌 SIDEBAR FRAGMENTS (RERUN INDEPENDENTLY OF THE CHAT)
 # =====================================================
-with st.sidebar:
-    # CHATBOT BRANDING SECTION
-    # Get the path to the image file relative to this script's location
-    current_dir = Path(__file__).parent
-    image_path = current_dir / "assets" / "chatbot.jpg"
-    st.image(str(image_path), width=150)  # 🖼️ Chatbot logo/avatar
-    st.markdown("### CypherNova")               # App name
-    st.caption("Your personal AI assistant 🤖")  # App tagline
+# Each sidebar section is an st.fragment: toggling the theme or moving a
+# slider reruns only that section, not the chat history and prompt pipeline.
+# Model settings are kept in session state (widget keys) so the chat code
+# below reads the current values on the next full run.
+
+def toggle_theme():
+    """Theme button callback: runs before the fragment reruns"""
+    st.session_state.dark_theme = not st.session_state.dark_theme
+
+@timed_fragment("sidebar · theme")
+def sidebar_theme():
+    """Theme toggle; switches the page stylesheet without a full rerun"""
+    # THEME MANAGEMENT SYSTEM (Phase 1 Feature)
+    # Themes are minified static stylesheets (see static_assets.py). The page
+    # stylesheet is only switched when dark_theme changes, not on every rerun.
+    with span("theme css"):
+        apply_theme(st.session_state.dark_theme)
     
-    # THEME TOGGLE SECTION (Phase 1 Feature)
-    st.divider()  # Visual separator
     col1, col2 = st.columns([3, 1])  # Create two columns for layout
     
     with col1:
@@ -456,18 +287,17 @@ with st.sidebar:
     with col2:
         # Dynamic theme toggle button with appropriate icon
         theme_icon = "🌙" if not st.session_state.dark_theme else "☀️"
-        if st.button(theme_icon, key="theme_toggle", help="Toggle between dark and light theme"):
-            # Toggle theme state and trigger app rerun to apply changes
-            st.session_state.dark_theme = not st.session_state.dark_theme
-            st.rerun()  # Refresh app to apply new theme
-    
-    # AI MODEL SELECTION SECTION
-    st.divider()  # Visual separator
+        st.button(theme_icon, key="theme_toggle", on_click=toggle_theme,
+                  help="Toggle between dark and light theme")
+
+@timed_fragment("sidebar · model settings")
+def sidebar_model_settings():
+    """Model choice and generation parameters (stored under their widget keys)"""
     st.markdown("### 🤖 Model Settings")
     
     # Dropdown to select AI model
     # These are currently supported Groq models (updated for 2025)
-    groq_model = st.selectbox(
+    st.selectbox(
         "Choose Groq Model:",
         [
             "llama-3.1-8b-instant",      # Fast, efficient model for general use
@@ -478,96 +308,123 @@ with st.sidebar:
             "gemma2-9b-it"               # Google's Gemma model
         ],
         index=0,  # Default to first model (llama-3.1-8b-instant)
+        key="groq_model",
         help="All models are free to use within Groq's free tier limits"
     )
     
     # AI MODEL PARAMETER CONTROLS
     # Temperature controls randomness/creativity of responses
-    temperature = st.slider(
+    st.slider(
         "Temperature:",
         min_value=0.0,    # Most deterministic (consistent responses)
         max_value=1.0,    # Most creative (varied responses)
         value=0.2,        # Default: slightly creative but mostly consistent
         step=0.1,
+        key="temperature",
         help="Lower = more deterministic, Higher = more creative"
     )
     
     # Max tokens controls length of AI responses
-    max_tokens = st.slider(
+    st.slider(
         "Max Response Length:",
         min_value=100,     # Minimum response length
         max_value=4096,    # Maximum response length
         value=1024,        # Default: moderate length responses
         step=100,
+        key="max_tokens",
         help="Maximum tokens in the response"
     )
     
-    st.divider()  # Visual separator
+    # Context budget limits how much history is replayed to the model
+    st.slider(
+        "Context Budget (tokens):",
+        min_value=1000,    # Only the most recent exchange or two
+        max_value=32000,   # Long memory (uses quota quickly)
+        value=6000,        # Default: leaves headroom in the 10k tokens/minute free tier
+        step=500,
+        key="context_budget",
+        help="Total tokens per request (history + response). Older turns are left out to stay within it."
+    )
+    
+    # Fold turns that age out of the context budget into a running summary
+    st.toggle(
+        "Summarize Old Turns",
+        value=True,        # Default: keep long sessions' prompt size constant
+        key="summarize_history",
+        help=f"Older messages are summarized in the background by {SUMMARY_MODEL}"
+    )
     
+    # Streaming shows tokens as soon as Groq produces them
+    st.toggle(
+        "Stream Responses",
+        value=True,        # Default: show the answer while it is generated
+        key="stream_responses",
+        help="Show the answer token by token instead of waiting for the full response"
+    )
+
+@timed_fragment("sidebar · chat actions")
+def sidebar_chat_actions():
+    """Clear and export buttons"""
     # CHAT MANAGEMENT BUTTONS (Phase 1 Features)
     col1, col2 = st.columns(2)  # Create two columns for buttons
     
     with col1:
         # CLEAR CHAT BUTTON
         if st.button("🗑️ Clear Chat", key="clear_chat"):
-            # Reset chat messages to empty
-            st.session_state.messages = []
-            
-            # Reset analytics for new session (Phase 1 feature)
-            st.session_state.chat_analytics = {
-                "total_messages": 0,
-                "user_messages": 0,
-                "bot_messages": 0,
-                "session_start": datetime.datetime.now(),
-                "models_used": [],
-                "avg_response_time": []
-            }
-            st.rerun()  # Refresh the app to show cleared state
+            # Reset chat messages and analytics (in memory and in the store)
+            if conversation_store is not None:
+                conversation_store.clear(session_id)
+            start_conversation([])
+            st.rerun()  # Full rerun: the chat area changes too
     
     with col2:
         # EXPORT CHAT BUTTON (Phase 1 Feature)
         if st.button("📥 Export Chat", key="export_chat"):
             # Check if there's meaningful chat history to export
-            if len(st.session_state.messages) > 1:
-                # Prepare export data structure (could be used for JSON export in future)
-                export_data = {
-                    "timestamp": datetime.datetime.now().isoformat(),
-                    "model_used": groq_model,
-                    "conversation": st.session_state.messages,
-                    "analytics": st.session_state.chat_analytics
-                }
-                
-                # CREATE TEXT FORMAT FOR DOWNLOAD
-                # Header with export timestamp
-                chat_text = f"CypherNova Chat Export - {datetime.datetime.now().strftime('%Y-%m-%d %H:%M')}\n"
-                chat_text += "=" * 60 + "\n\n"
-                
-                # Add all messages with role indicators
-                for msg in st.session_state.messages:
-                    role_emoji = "👤" if msg["role"] == "user" else "🤖"
-                    chat_text += f"{role_emoji} {msg['role'].upper()}: {msg['content']}\n\n"
-                
-                # ADD ANALYTICS SECTION (Phase 1 feature)
-                chat_text += "\n" + "=" * 60 + "\n"
-                chat_text += "CHAT ANALYTICS:\n"
-                chat_text += f"Total Messages: {st.session_state.chat_analytics['total_messages']}\n"
-                chat_text += f"User Messages: {st.session_state.chat_analytics['user_messages']}\n"
-                chat_text += f"Bot Messages: {st.session_state.chat_analytics['bot_messages']}\n"
-                chat_text += f"Session Duration: {datetime.datetime.now() - st.session_state.chat_analytics['session_start']}\n"
+            if st.session_state.stored_before + len(st.session_state.messages) > 1:
+                # STREAM THE EXPORT (one message at a time, joined once into bytes)
+                # The whole conversation is exported, including older messages
+                # of a resumed session that are only in the store
+                export_format = st.session_state.get("export_format", "Markdown")
+                extension, mime = EXPORT_FORMATS[export_format]
+                chunks = export_chunks(all_messages(), export_header(), export_format)
+                if st.session_state.get("export_gzip"):
+                    chunks = gzip_chunks(chunks)
+                    extension, mime = f"{extension}.gz", "application/gzip"
                 
                 # Create download button with timestamped filename
                 st.download_button(
                     label="Download Chat History",
-                    data=chat_text,
-                    file_name=f"cyphernova_chat_{datetime.datetime.now().strftime('%Y%m%d_%H%M')}.txt",
-                    mime="text/plain",
-                    help="Download your conversation as a text file"
+                    data=export_bytes(chunks),
+                    file_name=f"cyphernova_chat_{datetime.datetime.now().strftime('%Y%m%d_%H%M')}.{extension}",
+                    mime=mime,
+                    help="Download your conversation"
                 )
             else:
                 st.info("No chat history to export")  # Show info if no chat to export
     
+    # EXPORT FORMAT AND IMPORT OF A PREVIOUS EXPORT
+    with st.expander("🗂️ Export Format & Import"):
+        st.radio("Export format:", list(EXPORT_FORMATS), key="export_format", horizontal=True,
+                 help="JSONL keeps all message metadata and can be imported again")
+        st.toggle("Compress (gzip)", key="export_gzip")
+        upload = st.file_uploader("Continue an exported chat:", type=["jsonl", "gz"],
+                                  key="import_file", help="A JSONL export, optionally gzip-compressed")
+        if upload is not None and st.button("♻️ Restore Conversation", key="import_chat"):
+            try:
+                import_conversation(upload)
+            except ValueError as e:
+                st.error(f"❌ Could not import this file: {e}")
+            else:
+                st.rerun()  # Full rerun: show the restored conversation
+    
+    if conversation_store is not None:
+        st.caption(f"💾 Saved as session `{session_id[:8]}` - reload this page's URL to resume")
+
+@timed_fragment("sidebar · analytics")
+def sidebar_analytics():
+    """Session analytics, quota, connection pool, router health and rerun timing"""
     # SIDEBAR ANALYTICS SECTION (Phase 1 Feature)
-    st.divider()  # Visual separator
     st.markdown("### 📊 Chat Analytics")
     
     # Display analytics if there are messages
@@ -584,14 +441,67 @@ with st.sidebar:
             duration = datetime.datetime.now() - st.session_state.chat_analytics["session_start"]
             st.metric("Session", f"{duration.seconds//60}m")
         
-        # Show average response time if we have response time data
-        if st.session_state.chat_analytics["avg_response_time"]:
-            avg_time = sum(st.session_state.chat_analytics["avg_response_time"]) / len(st.session_state.chat_analytics["avg_response_time"])
-            st.metric("Avg Response", f"{avg_time:.1f}s")
+        # Show average response time with its percentiles (constant-memory statistics)
+        response_times = st.session_state.chat_analytics["response_time"]
+        if response_times.count:
+            p50, p95, p99 = response_times.quantiles(0.5, 0.95, 0.99)
+            st.metric("Avg Response", f"{response_times.mean:.1f}s",
+                      help=f"p50 {p50:.1f}s · p95 {p95:.1f}s · p99 {p99:.1f}s")
+        
+        # Show average time to first token (streaming latency as perceived by the user)
+        ttft_times = st.session_state.chat_analytics["time_to_first_token"]
+        if ttft_times.count:
+            p50, p95 = ttft_times.quantiles(0.5, 0.95)
+            st.metric("Avg First Token", f"{ttft_times.mean:.2f}s",
+                      help=f"p50 {p50:.2f}s · p95 {p95:.2f}s")
+        
+        # Show prompt size and build time for the last turn
+        if st.session_state.chat_analytics["prompt_tokens"] is not None:
+            col1, col2 = st.columns(2)
+            with col1:
+                st.metric("Prompt Tokens", st.session_state.chat_analytics["prompt_tokens"])
+            with col2:
+                build_ms = st.session_state.chat_analytics["prompt_build_time"] * 1000
+                st.metric("Prompt Build", f"{build_ms:.1f}ms")
+            if st.session_state.chat_analytics["turns_dropped"]:
+                st.caption(f"{st.session_state.chat_analytics['turns_dropped']} older message(s) "
+                           "left out to fit the context budget")
+        
+        # Show response cache hit rate for this session
+        if st.session_state.chat_analytics["cache_lookups"]:
+            hit_rate = (st.session_state.chat_analytics["cache_hits"]
+                        / st.session_state.chat_analytics["cache_lookups"])
+            st.metric("Cache Hit Rate", f"{hit_rate:.0%}",
+                      help=f"All sessions: {get_response_cache().hit_rate():.0%}")
+        if st.session_state.chat_analytics["semantic_lookup_ms"] is not None:
+            st.caption(f"Semantic lookup: {st.session_state.chat_analytics['semantic_lookup_ms']:.2f}ms "
+                       f"(avg {get_semantic_cache().avg_lookup_ms():.2f}ms)")
+        
+        # Show how many prompt tokens the rolling summary saves on every turn
+        rolling_summary = st.session_state.rolling_summary
+        if rolling_summary.text:
+            st.metric("Summary Saves", f"{rolling_summary.tokens_saved} tok/turn",
+                      help=f"{rolling_summary.summarized_upto} older message(s) replaced by the summary")
+        
+        # Per-model latency percentiles, generation speed and prompt size
+        per_model = st.session_state.chat_analytics["per_model"]
+        if len(per_model):
+            with st.expander("🧮 Per-Model Breakdown"):
+                st.dataframe(per_model.rows(), hide_index=True,
+                             column_config={"Tokens/s": st.column_config.NumberColumn(format="%.0f"),
+                                            "Prompt tokens": st.column_config.NumberColumn(format="%.0f")})
+                st.caption("Percentiles are approximate (within ~1%); cache hits are not included")
     else:
         # Show info message when no chat data is available
         st.info("Start chatting to see analytics!")
     
+    # CONVERSATION SUMMARY SECTION
+    if st.session_state.rolling_summary.text or st.session_state.rolling_summary.busy:
+        with st.expander("🧾 Conversation Summary"):
+            if st.session_state.rolling_summary.busy:
+                st.caption("⏳ Updating summary...")
+            st.markdown(st.session_state.rolling_summary.text or "_No summary yet_")
+    
     # GROQ API INFORMATION SECTION
     st.markdown("---")  # Horizontal line separator
     st.markdown("### ℹ️ Free Tier Info")
@@ -603,6 +513,77 @@ with st.sidebar:
     - 10,000 tokens/minute
     - No credit card required
     """)
+    
+    # Live estimate for the shared (process-wide) quota queue
+    queue_wait = get_rate_limiter().estimate_wait(st.session_state.max_tokens)
+    queued = get_rate_limiter().queue_length()
+    if queue_wait >= 1 or queued:
+        st.caption(f"⏳ Quota queue: {queued} waiting, next request in about {queue_wait:.0f}s")
+    else:
+        st.caption("✅ Quota available - no wait")
+    
+    # CONNECTION POOL COUNTERS (shared across all sessions in this process)
+    with st.expander("🔌 Connection Pool"):
+        pool_stats = get_client_registry().snapshot()
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("Pool Hits", pool_stats["hits"])
+            st.metric("New Connections", pool_stats["connections_opened"])
+        with col2:
+            st.metric("Pool Misses", pool_stats["misses"])
+            st.metric("Reused Connections", pool_stats["connections_reused"])
+        st.caption(f"{pool_stats['clients']} client(s), {pool_stats['requests']} request(s) served")
+    
+    # LIVE BACKEND HEALTH (EWMA latency and error rate used for routing)
+    with st.expander("🧭 Backend Router"):
+        for backend in build_router(st.session_state.groq_model).backends:
+            health = backend_health(backend.name).snapshot()
+            latency = f"{health['latency']:.2f}s" if health["latency"] is not None else "n/a"
+            status = f" · cooling down {health['cooldown']:.0f}s" if health["cooldown"] else ""
+            st.caption(f"**{backend.name}** - first token {latency}, "
+                       f"errors {health['error_rate']:.0%} "
+                       f"({health['failures']}/{health['requests']}){status}")
+    
+    # WHICH PART OF THE PAGE EACH RECENT INTERACTION RE-EXECUTED
+    with st.expander("⏱️ Rerun Timing"):
+        show_rerun_log()
+        st.markdown("**Last full page run by phase**")
+        show_trace_summary(st.session_state.get("last_trace"))
+        st.button("🔄 Refresh", key="refresh_rerun_log",
+                  help="Reruns only this section")
+        show_profile_controls()
+
+# =====================================================
+# 📌 SIDEBAR CONFIGURATION & BRANDING
+# =====================================================
+with st.sidebar:
+    # CHATBOT BRANDING SECTION
+    # Logo resized and re-encoded once per process, served from memory
+    st.image(get_static_assets().logo, width=150)  # 🖼️ Chatbot logo/avatar
+    st.markdown("### CypherNova")               # App name
+    st.caption("Your personal AI assistant 🤖")  # App tagline
+    
+    st.divider()  # Visual separator
+    sidebar_theme()
+    
+    # AI MODEL SELECTION SECTION
+    st.divider()  # Visual separator
+    sidebar_model_settings()
+    
+    st.divider()  # Visual separator
+    sidebar_chat_actions()
+    
+    # Analytics are filled in at the end of the run, after this turn's answer
+    st.divider()  # Visual separator
+    analytics_slot = st.container()
+
+# Current model settings (the settings fragment keeps them in session state)
+groq_model = st.session_state.groq_model
+temperature = st.session_state.temperature
+max_tokens = st.session_state.max_tokens
+context_budget = st.session_state.context_budget
+summarize_history = st.session_state.summarize_history
+stream_responses = st.session_state.stream_responses
 
 # =====================================================
 # 📌 MAIN PAGE HEADER & TITLE
@@ -620,41 +601,36 @@ st.markdown(
 )
 
 # =====================================================
-# 📌 GROQ MODEL INITIALIZATION & CACHING
+# 📌 RESPONSE GENERATION (STREAMING & BLOCKING)
 # =====================================================
-
-def load_groq_model(model_name, temperature, max_tokens):
+def generate_response(chunks, placeholder, start_time, stream=True):
     """
-    Initialize the Groq LLM model
+    Consume the routed response, writing tokens into the placeholder as they arrive
     
     Args:
-        model_name (str): Name of the Groq model to use
-        temperature (float): Controls randomness in responses (0.0-1.0)
-        max_tokens (int): Maximum length of model responses
+        chunks (iterator): Text chunks from LLMRouter.stream()
+        placeholder: Streamlit container (st.empty) that shows the answer
+        start_time (float): time.time() value taken when the request started
+        stream (bool): Show tokens as they arrive instead of the finished answer only
     
     Returns:
-        ChatGroq: Initialized Groq model object or None if error
+        tuple: (final response text, seconds until the first token or None)
     """
+    if not stream:
+        # The whole answer is shown at once (no first-token time to report)
+        return "".join(chunks), None
+    
+    writer = ThrottledMarkdownWriter(placeholder)  # Coalesces tokens into frames
+    first_token_time = None  # Time to first token (TTFT)
     try:
-        # Initialize Groq model with provided parameters
-        llm = ChatGroq(
-            groq_api_key=groq_api_key,    # API key from environment
-            model_name=model_name,         # Selected model
-            temperature=temperature,       # Creativity level
-            max_tokens=max_tokens         # Response length limit
-        )
-        return llm
-    except Exception as e:
-        # Display error if model initialization fails
-        st.error(f"❌ Error initializing Groq model: {str(e)}")
-        return None
-
-# Initialize the model with current settings
-llm = load_groq_model(groq_model, temperature, max_tokens)
-
-# Stop execution if model initialization failed
-if llm is None:
-    st.stop()
+        for text in chunks:
+            if first_token_time is None:
+                first_token_time = time.time() - start_time
+            writer.write(text)
+    finally:
+        response = writer.close()  # Final flush without the cursor
+    
+    return response, first_token_time
 
 # =====================================================
 # 📌 CHAT SYSTEM INITIALIZATION
@@ -662,83 +638,73 @@ if llm is None:
 
 # Initialize chat history in session state
 # Session state persists data across user interactions
+init_span = span("chat init")
 if "messages" not in st.session_state:
-    # Start with a welcome message from the assistant
-    st.session_state.messages = [
-        {
-            "role": "assistant", 
-            "content": "CypherNova is HERE! 🌸 How can I help you today?", 
-            "timestamp": datetime.datetime.now().isoformat()  # Add timestamp for analytics
-        }
-    ]
-
-# Clean up any corrupted messages (response objects instead of strings)
-# This is a one-time cleanup for backward compatibility
-if st.session_state.messages:
-    cleaned_messages = []
-    for msg in st.session_state.messages:
-        if isinstance(msg.get("content"), str):
-            cleaned_messages.append(msg)
-        elif hasattr(msg.get("content"), 'content'):
-            # Extract content from response object
-            cleaned_msg = msg.copy()
-            cleaned_msg["content"] = msg["content"].content
-            cleaned_messages.append(cleaned_msg)
-    st.session_state.messages = cleaned_messages
+    # RESUME A STORED CONVERSATION (only its newest messages are loaded)
+    resumed, first_seq = ([], 0)
+    if conversation_store is not None:
+        resumed, first_seq = conversation_store.load_recent(session_id)
+    if resumed:
+        st.session_state.messages = upgrade_messages(resumed)
+        st.session_state.stored_before = first_seq  # Older messages left in the store
+        role_counts = conversation_store.role_counts(session_id)
+        st.session_state.chat_analytics["user_messages"] = role_counts.get("user", 0)
+        st.session_state.chat_analytics["bot_messages"] = role_counts.get("assistant", 0)
+        st.session_state.chat_analytics["total_messages"] = sum(role_counts.values())
+    else:
+        # Start with a welcome message from the assistant (not stored)
+        st.session_state.messages = [
+            MessageRecord(Role.ASSISTANT, "CypherNova is HERE! 🌸 How can I help you today?")
+        ]
 
-# =====================================================
-# 📌 MESSAGE COPY FUNCTIONALITY (PHASE 1 FEATURE)
-# =====================================================
-def copy_message_button(message_content, message_id):
+# Sessions started by an older version of this page hold plain dicts (possibly
+# with response objects as content); they are converted once. New messages
+# are validated when they are appended, so no clean-up pass runs per rerun.
+if st.session_state.get("message_format") != MESSAGE_FORMAT:
+    st.session_state.messages = upgrade_messages(st.session_state.messages)
+    st.session_state.message_format = MESSAGE_FORMAT
+
+# Prompt cache: every stored message as a ready-to-send LangChain object
+# Rebuilt only if it is missing or out of sync (e.g. session from an older version)
+if ("prompt_cache" not in st.session_state
+        or st.session_state.prompt_cache.synced != len(st.session_state.messages)):
+    st.session_state.prompt_cache = PromptCache()
+    st.session_state.prompt_cache.rebuild(st.session_state.messages)
+    st.session_state.rolling_summary = RollingSummary()  # Indices refer to the old cache
+init_span.end()
+
+# System prompt that defines the AI personality and behavior
+SYSTEM_PROMPT = ("You are CypherNova Chatbot, a friendly and helpful AI assistant. "
+                 "Always answer warmly and conversationally. Keep responses concise and helpful.")
+
+def append_message(message):
     """
-    Create a copy button for each message (currently unused in favor of Streamlit buttons)
+    Store a chat message in the history, the prompt cache and the
+    conversation store
     
-    This function creates JavaScript-based copy functionality.
-    Currently using Streamlit's built-in button functionality instead.
+    Error messages are kept in the history for display but are not added
+    to the prompt cache, so they are never replayed to the model. The
+    message is rendered to HTML here, once; reruns reuse the cached fragment.
     
     Args:
-        message_content (str): The text content to copy
-        message_id (str): Unique identifier for the message
-    
-    Returns:
-        str: HTML/JavaScript code for copy button
-    """
-    copy_script = f"""
-    <script>
-    function copyToClipboard{message_id}() {{
-        navigator.clipboard.writeText(`{message_content.replace('`', '\\`')}`).then(function() {{
-            console.log('Copied to clipboard');
-        }});
-    }}
-    </script>
-    <button onclick="copyToClipboard{message_id}()" class="copy-button" 
-            style="background: transparent; border: 1px solid #ccc; border-radius: 4px; padding: 4px 8px; 
-                   font-size: 12px; cursor: pointer; margin-left: 10px;">
-        📋 Copy
-    </button>
+        message (MessageRecord): Validated message (role, content and metadata)
     """
-    return copy_script
+    st.session_state.messages.append(message)
+    st.session_state.prompt_cache.append(
+        message.role.value, message.content, include=not message.error
+    )
+    get_render_cache().render(message.content)
+    if conversation_store is not None:
+        conversation_store.append(session_id, message.to_dict())  # Committed in the background
 
 # =====================================================
-# 📌 DISPLAY CHAT HISTORY WITH COPY BUTTONS (PHASE 1)
+# 📌 DISPLAY CHAT HISTORY (WINDOWED, CLIENT-SIDE COPY)
 # =====================================================
-# Display all past messages (user + assistant) with copy functionality
-for i, msg in enumerate(st.session_state.messages):
-    # Use Streamlit's chat message container for proper styling
-    with st.chat_message(msg["role"]):
-        # Create two columns: main content and copy button
-        col1, col2 = st.columns([10, 1])  # 10:1 ratio for content vs button
-        
-        with col1:
-            # Display the message content
-            st.markdown(msg["content"])
-        
-        with col2:
-            # Copy button for each message (Phase 1 feature)
-            if st.button("📋", key=f"copy_{i}", help="Copy message"):
-                # Show success notification when button is clicked
-                # Note: Actual clipboard functionality is handled by browser
-                st.toast(f"Message copied! 📋", icon="✅")
+# Only the newest messages are rendered on each rerun ("load older" pages in
+# the rest); copy buttons are added in the browser, one script for all messages
+with span("history render", messages=len(st.session_state.messages)):
+    render_history(st.session_state.messages, older=st.session_state.stored_before,
+                   fetch_older=fetch_stored if conversation_store is not None else None)
 
 # =====================================================
 # 📌 CHAT INPUT HANDLING & USER MESSAGE PROCESSING
@@ -752,59 +718,64 @@ if user_input := st.chat_input("Type your message here..."):
     st.session_state.chat_analytics["user_messages"] += 1
     
     # ADD USER MESSAGE TO CHAT HISTORY
-    # Store message with metadata for future features
-    st.session_state.messages.append({
-        "role": "user", 
-        "content": user_input, 
-        "timestamp": datetime.datetime.now().isoformat()  # For analytics and export
-    })
-    
-    # DISPLAY USER MESSAGE WITH COPY BUTTON
+    # Timestamped (epoch seconds) for analytics and export
+    append_message(MessageRecord(Role.USER, user_input))
+    
+    # DISPLAY USER MESSAGE (copy button is added client-side)
     with st.chat_message("user"):
-        col1, col2 = st.columns([10, 1])  # Layout: content + copy button
-        
-        with col1:
-            st.markdown(user_input)  # Display user's message
-        
-        with col2:
-            # Copy button for user's own message (Phase 1 feature)
-            if st.button("📋", key=f"copy_user_{len(st.session_state.messages)}", help="Copy message"):
-                st.toast(f"Message copied! 📋", icon="✅")
+        show_markdown(user_input)
 
     # =====================================================
     # 📌 PREPARE AI MODEL INPUT & CONVERSATION CONTEXT
     # =====================================================
     
+    # TRACK PROMPT BUILD TIME (history selection from the prompt cache)
+    prompt_start = time.perf_counter()
+    prompt_span = span("prompt build")
+    
     # CREATE CONVERSATION MESSAGES FOR THE AI MODEL
-    # Start with system prompt to define AI personality and behavior
-    conversation_messages = [
-        ("system", "You are CypherNova Chatbot, a friendly and helpful AI assistant. "
-                   "Always answer warmly and conversationally. Keep responses concise and helpful.")
-    ]
-    
-    # ADD CONVERSATION HISTORY FOR CONTEXT
-    # Include all previous messages except the current user input (it's already added separately)
-    for msg in st.session_state.messages[:-1]:  # Exclude the last message (current user input)
-        if msg["role"] in ["user", "assistant"]:
-            # Handle both string content and response objects (for backward compatibility)
-            content = msg["content"]
-            if hasattr(content, 'content'):  # If it's a response object, extract content
-                content = content.content
-            elif not isinstance(content, str):  # If it's not a string, convert it
-                content = str(content)
-            
-            # Escape any curly braces to prevent template variable issues
-            content = content.replace("{", "{{").replace("}", "}}")
-            conversation_messages.append((msg["role"], content))
+    # System prompt defines AI personality and behavior; once older turns have
+    # been summarized, the summary is appended to it and those turns are skipped
+    rolling_summary = st.session_state.rolling_summary
+    if summarize_history:
+        system_message = rolling_summary.system_message(SYSTEM_PROMPT)
+        first_message = rolling_summary.summarized_upto
+    else:
+        system_message = SystemMessage(content=SYSTEM_PROMPT)
+        first_message = 0
     
-    # ADD CURRENT USER INPUT
-    # Escape any curly braces in user input to prevent template variable issues
-    safe_user_input = user_input.replace("{", "{{").replace("}", "}}")
-    conversation_messages.append(("user", safe_user_input))
+    # CONVERSATION HISTORY FROM THE PROMPT CACHE
+    # Messages were normalized and converted once when stored, so no
+    # re-walking, re-escaping or prompt templating is needed here
+    prompt_cache = st.session_state.prompt_cache
+    history = prompt_cache.messages[first_message:-1]  # Exclude the current user input
+    history_tokens = prompt_cache.token_counts(groq_model)[first_message:-1]
     
-    # CREATE LANGCHAIN PROMPT TEMPLATE
-    # This structures the conversation for the AI model
-    prompt = ChatPromptTemplate.from_messages(conversation_messages)
+    # KEEP ONLY THE NEWEST TURNS THAT FIT THE TOKEN BUDGET
+    # Room for the response (max_tokens) is reserved inside the budget
+    context_manager = ContextWindowManager(groq_model, context_budget, max_tokens)
+    formatted_messages, context_stats = context_manager.fit(
+        system_message, history, prompt_cache.messages[-1], history_tokens
+    )
+    
+    # STORE PROMPT ANALYTICS
+    prompt_build_time = time.perf_counter() - prompt_start
+    st.session_state.chat_analytics["prompt_build_time"] = prompt_build_time
+    st.session_state.chat_analytics["prompt_tokens"] = context_stats["prompt_tokens"]
+    st.session_state.chat_analytics["turns_dropped"] = context_stats["dropped"]
+    prompt_span.set("prompt.tokens", context_stats["prompt_tokens"])
+    prompt_span.set("prompt.dropped_messages", context_stats["dropped"])
+    prompt_span.end()
+    
+    # FOLD AGED-OUT TURNS INTO THE SUMMARY (runs in the background)
+    if summarize_history and context_stats["dropped"]:
+        rolling_summary.schedule(
+            get_groq_llm(groq_api_key, SUMMARY_MODEL, 0.0, SUMMARY_MAX_TOKENS),
+            prompt_cache.messages,
+            first_message + context_stats["dropped"],
+            groq_model,
+            get_rate_limiter()  # Summaries use the same Groq quota
+        )
 
     # =====================================================
     # 📌 AI RESPONSE GENERATION & ANALYTICS TRACKING
@@ -820,60 +791,149 @@ if user_input := st.chat_input("Type your message here..."):
             # TRACK RESPONSE TIME (Phase 1 Analytics Feature)
             start_time = time.time()
             
-            # GET AI RESPONSE
-            # Format the prompt and get response from LLM directly
-            formatted_messages = prompt.format_messages()
-            ai_response = llm.invoke(formatted_messages)
+            # CHECK THE RESPONSE CACHE (deterministic, low-temperature requests only)
+            cache_span = span("cache lookup")
+            response_cache = get_response_cache()
+            cache_key = None
+            response = None
+            if temperature <= RESPONSE_CACHE_MAX_TEMPERATURE:
+                cache_key = make_cache_key(formatted_messages, groq_model, temperature, max_tokens)
+                response = response_cache.get(cache_key)
             
-            # Extract just the content from the response object
-            response = ai_response.content
+            # CHECK THE SEMANTIC CACHE (similar standalone questions)
+            semantic_cache = get_semantic_cache()
+            semantic_namespace = f"groq:{groq_model}"
+            use_semantic = (is_standalone(st.session_state.messages)
+                            and temperature <= SEMANTIC_CACHE_MAX_TEMPERATURE)
+            if response is None and use_semantic:
+                response, _, lookup_seconds = semantic_cache.lookup(user_input, semantic_namespace)
+                st.session_state.chat_analytics["semantic_lookup_ms"] = lookup_seconds * 1000
+            
+            if cache_key or use_semantic:
+                st.session_state.chat_analytics["cache_lookups"] += 1
+            cached = response is not None
+            cache_span.set("cache.hit", cached)
+            cache_span.end()
+            response_model = groq_model  # Replaced by the serving backend below
+            
+            if cached:
+                st.session_state.chat_analytics["cache_hits"] += 1
+                record_cache_hit()
+            else:
+                def show_wait(seconds, position):
+                    ahead = f", {position} request(s) ahead" if position else ""
+                    message_placeholder.markdown(
+                        f"⏳ Waiting for Groq free-tier quota... about {seconds:.0f}s{ahead}"
+                    )
+                
+                def show_retry(error, attempt, delay):
+                    message_placeholder.markdown(
+                        f"🔁 Model is busy ({error.kind.replace('_', ' ')}) - "
+                        f"retrying in {delay:.1f}s (attempt {attempt + 1})..."
+                    )
+                
+                def show_fallback(failed, error, fallback):
+                    message_placeholder.markdown(
+                        f"↪️ {failed.label} unavailable ({error.kind.replace('_', ' ')}) - "
+                        f"switching to {fallback.label}..."
+                    )
+                
+                # GET AI RESPONSE THROUGH THE ROUTER
+                # Groq waits for the shared quota, transient failures are retried with
+                # backoff and the router falls back (e.g. to local Ollama) when Groq is
+                # rate limited, failing or its circuit breaker is open
+                router = build_router(groq_model, on_wait=show_wait)
+                with span("llm call", SPAN_KIND_CLIENT, **{
+                        "gen_ai.request.model": groq_model,
+                        "gen_ai.request.max_tokens": max_tokens,
+                        "gen_ai.usage.input_tokens": context_stats["prompt_tokens"]}) as llm_span:
+                    response, first_token_time = generate_response(
+                        instrument_stream(
+                            router.stream(formatted_messages, temperature, max_tokens,
+                                          on_retry=show_retry, on_fallback=show_fallback),
+                            router, prompt_tokens=context_stats["prompt_tokens"]
+                        ),
+                        message_placeholder, start_time, stream_responses
+                    )
+                served_by = router.last_backend
+                llm_span.set("gen_ai.response.model", served_by.label)
+                response_model = served_by.label
+                
+                # Model latency excludes time spent queued for quota
+                queued = getattr(served_by, "last_wait", 0.0)
+                st.session_state.chat_analytics["rate_limit_wait"] += queued
+                start_time += queued
+                if first_token_time is not None:
+                    first_token_time -= queued
+                llm_span.set("llm.quota_wait_seconds", queued)
+                llm_span.set("llm.time_to_first_token_seconds", first_token_time)
+                
+                # Only answers from the selected Groq model are cached under its key
+                if response and served_by is router.backends[0]:
+                    if cache_key:
+                        response_cache.put(cache_key, response, groq_model)
+                    if use_semantic:
+                        semantic_cache.add(user_input, response, semantic_namespace)
             
             # CALCULATE AND STORE RESPONSE TIME
+            # Cache hits are left out so the averages describe the model itself
             response_time = time.time() - start_time
-            st.session_state.chat_analytics["avg_response_time"].append(response_time)
+            if not cached:
+                st.session_state.chat_analytics["response_time"].add(response_time)
+                if first_token_time is not None:
+                    st.session_state.chat_analytics["time_to_first_token"].add(first_token_time)
+                st.session_state.chat_analytics["per_model"].record(
+                    response_model,
+                    response_time=response_time,
+                    time_to_first_token=first_token_time,
+                    output_tokens=count_tokens(response, groq_model),
+                    prompt_tokens=context_stats["prompt_tokens"]
+                )
             st.session_state.chat_analytics["total_messages"] += 1
             st.session_state.chat_analytics["bot_messages"] += 1
             
             # TRACK MODEL USAGE FOR ANALYTICS
-            if groq_model not in st.session_state.chat_analytics["models_used"]:
-                st.session_state.chat_analytics["models_used"].append(groq_model)
+            models_used = st.session_state.chat_analytics["models_used"]
+            models_used[response_model] = models_used.get(response_model, 0) + 1
             
-            # DISPLAY RESPONSE WITH COPY BUTTON (Phase 1 Feature)
-            col1, col2 = st.columns([10, 1])  # Layout: content + copy button
-            
-            with col1:
-                message_placeholder.markdown(response)  # Show AI response
-            
-            with col2:
-                # Copy button for AI response
-                if st.button("📋", key=f"copy_assistant_{len(st.session_state.messages)}", help="Copy message"):
-                    st.toast(f"Message copied! 📋", icon="✅")
+            # DISPLAY RESPONSE (copy button is added client-side)
+            with span("markdown render"):
+                show_markdown(response, message_placeholder)
             
             # ADD RESPONSE TO CHAT HISTORY WITH METADATA
-            st.session_state.messages.append({
-                "role": "assistant", 
-                "content": response, 
-                "timestamp": datetime.datetime.now().isoformat(),  # For export and analytics
-                "response_time": response_time,                    # Performance tracking
-                "model": groq_model                               # Model used for this response
-            })
+            append_message(MessageRecord(
+                Role.ASSISTANT,
+                response,
+                response_time=response_time,  # Performance tracking
+                model=response_model,         # Model that served this response
+                cached=cached                 # Served from the response cache
+            ))
             
         except Exception as e:
             # ERROR HANDLING & LOGGING
-            error_msg = f"❌ Sorry, I encountered an error: {str(e)}"
+            # Classify the failure (rate limit, timeout, outage...) for a helpful message
+            error = classify_error(e)
+            error_msg = user_message(error, groq_model)
+            message_placeholder.empty()  # Remove the typing indicator / partial answer
             st.error(error_msg)  # Display error to user
             
             # ADD ERROR MESSAGE TO CHAT HISTORY
-            st.session_state.messages.append({
-                "role": "assistant", 
-                "content": error_msg, 
-                "timestamp": datetime.datetime.now().isoformat(),
-                "error": True  # Flag to identify error messages
-            })
+            # Error messages are shown in the history but never sent back to the model
+            append_message(MessageRecord(
+                Role.ASSISTANT,
+                error_msg,
+                error_kind=error.kind  # Marks an error: rate_limit, timeout, server, circuit_open...
+            ))
             
             # UPDATE ERROR ANALYTICS
             st.session_state.chat_analytics["total_messages"] += 1
             st.session_state.chat_analytics["bot_messages"] += 1
 
+# =====================================================
+# 📌 SIDEBAR ANALYTICS (AFTER THIS TURN'S ANSWER)
+# =====================================================
+with analytics_slot:
+    sidebar_analytics()
 
-
+record_run(FULL_PAGE, time.perf_counter() - rerun_start)
+st.session_state.last_trace = finish_trace().summary()
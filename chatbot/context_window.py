@@ -0,0 +1,129 @@
+# =====================================================
+# 📌 TOKEN-BUDGETED CONTEXT WINDOW
+# =====================================================
+# Replaying the full chat history makes every turn slower and eventually
+# overflows the model's context window (and Groq's free-tier tokens/minute
+# quota). ContextWindowManager keeps the system prompt and the current user
+# message, then adds the newest history turns until the configured budget is
+# used, always reserving room for the response (max_tokens).
+
+import math
+
+# Context window (tokens) of each model offered in the groq_model selectbox
+MODEL_CONTEXT_WINDOWS = {
+    "llama-3.1-8b-instant": 131072,
+    "llama-3.1-70b-versatile": 131072,
+    "llama-3.2-1b-preview": 8192,
+    "llama-3.2-3b-preview": 8192,
+    "mixtral-8x7b-32768": 32768,
+    "gemma2-9b-it": 8192,
+}
+
+# Average characters per token for each model family's tokenizer.
+# Llama 3 uses a 128k-vocab tiktoken-style BPE, Mixtral the 32k Llama 2
+# SentencePiece vocab, Gemma a 256k SentencePiece vocab. Values are slightly
+# conservative so estimates err on the side of sending less.
+MODEL_CHARS_PER_TOKEN = {
+    "llama-3.1-8b-instant": 3.8,
+    "llama-3.1-70b-versatile": 3.8,
+    "llama-3.2-1b-preview": 3.8,
+    "llama-3.2-3b-preview": 3.8,
+    "mixtral-8x7b-32768": 3.2,
+    "gemma2-9b-it": 4.0,
+}
+
+# Fallbacks for models not listed above
+DEFAULT_CONTEXT_WINDOW = 8192
+DEFAULT_CHARS_PER_TOKEN = 3.5
+
+# Chat-format overhead per message (role header + separators)
+TOKENS_PER_MESSAGE = 4
+
+
+def count_tokens(text, model_name):
+    """
+    Estimate how many tokens a piece of text uses for a given model
+
+    Args:
+        text (str): Text to measure
+        model_name (str): Groq model identifier
+
+    Returns:
+        int: Estimated token count
+    """
+    if not text:
+        return 0
+    chars_per_token = MODEL_CHARS_PER_TOKEN.get(model_name, DEFAULT_CHARS_PER_TOKEN)
+    return math.ceil(len(text) / chars_per_token)
+
+
+def count_message_tokens(content, model_name):
+    """
+    Estimate the tokens used by one chat message including format overhead
+
+    Args:
+        content (str): Message text
+        model_name (str): Groq model identifier
+
+    Returns:
+        int: Estimated token count
+    """
+    return count_tokens(content, model_name) + TOKENS_PER_MESSAGE
+
+
+class ContextWindowManager:
+    """
+    Select the newest conversation turns that fit a token budget
+
+    Args:
+        model_name (str): Groq model identifier (sets window size and tokenizer estimate)
+        budget (int): Total tokens allowed per request (prompt + response)
+        max_tokens (int): Tokens reserved for the model's response
+    """
+
+    def __init__(self, model_name, budget, max_tokens):
+        self.model_name = model_name
+        self.context_window = MODEL_CONTEXT_WINDOWS.get(model_name, DEFAULT_CONTEXT_WINDOW)
+        self.budget = min(budget, self.context_window)
+        self.max_tokens = max_tokens
+
+    @property
+    def prompt_budget(self):
+        """Tokens available for the prompt after reserving room for the response"""
+        return max(self.budget - self.max_tokens, 0)
+
+    def fit(self, system_message, history, current_message, history_tokens=None):
+        """
+        Build the message list to send, newest history first until the budget is used
+
+        The system prompt and the current user message are always included.
+        History is added from newest to oldest and stops at the first turn that
+        no longer fits, so the kept turns are always a contiguous recent window.
+
+        Args:
+            system_message (BaseMessage): System prompt message
+            history (list): Earlier LangChain messages, oldest first
+            current_message (BaseMessage): User message for this turn
+            history_tokens (list): Optional precomputed token count per history message
+
+        Returns:
+            tuple: (messages list, stats dict with prompt_tokens / kept / dropped)
+        """
+        if history_tokens is None:
+            history_tokens = [count_message_tokens(m.content, self.model_name) for m in history]
+
+        used = (count_message_tokens(system_message.content, self.model_name)
+                + count_message_tokens(current_message.content, self.model_name))
+
+        start = len(history)
+        while start > 0 and used + history_tokens[start - 1] <= self.prompt_budget:
+            start -= 1
+            used += history_tokens[start]
+
+        messages = [system_message, *history[start:], current_message]
+        stats = {
+            "prompt_tokens": used,
+            "kept": len(history) - start,
+            "dropped": start,
+        }
+        return messages, stats
@@ -0,0 +1,317 @@
+# =====================================================
+# 📌 DURABLE CONVERSATION STORE (SQLITE, WAL)
+# =====================================================
+# Chat history used to live only in st.session_state, so a server restart or
+# a reconnect lost it, and every message of a long chat stayed in memory.
+# Messages are now also appended to a SQLite database in WAL mode:
+#   - writes are append-only and go through one background writer thread
+#     that commits whatever arrived within STORE_FLUSH_INTERVAL as a single
+#     transaction; with synchronous=NORMAL the WAL is fsynced at checkpoints
+#     rather than on every commit (a crash of the app loses nothing, a power
+#     cut at most the last moments)
+#   - each browser session has an ID kept in the page URL (?session=...), so
+#     reloading the page or reconnecting resumes the conversation
+#   - a resumed session loads only its newest messages; older pages are read
+#     from the database when the history is scrolled back, never kept in RAM
+#
+# ConversationStore is the interface; set CONVERSATION_DB=off to keep history
+# in memory only, as before.
+
+import atexit
+import json
+import logging
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+
+import streamlit as st
+
+logger = logging.getLogger(__name__)
+
+# Database file ("off" disables the store)
+CONVERSATION_DB = os.getenv(
+    "CONVERSATION_DB", str(Path(__file__).parent / ".cache" / "conversations.sqlite3")
+)
+
+# Seconds the writer waits to group appends into one transaction
+STORE_FLUSH_INTERVAL = float(os.getenv("STORE_FLUSH_INTERVAL", "0.05"))
+
+# Most operations committed in one transaction
+STORE_BATCH_SIZE = 256
+
+# Attempts to commit a batch (e.g. while another process holds a lock) before it is dropped
+STORE_WRITE_ATTEMPTS = int(os.getenv("STORE_WRITE_ATTEMPTS", "3"))
+
+# Messages loaded into memory when a session is resumed
+RESUME_WINDOW = int(os.getenv("RESUME_WINDOW", "40"))
+
+SESSION_PARAM = "session"  # URL query parameter holding the session ID
+_SESSION_ID = re.compile(r"[0-9a-f]{32}")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    session_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,      -- Position in the conversation, from 0
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    meta TEXT,                 -- Other message fields (timestamp, model...) as JSON
+    created REAL NOT NULL,
+    PRIMARY KEY (session_id, seq)
+) WITHOUT ROWID;
+"""
+
+
+class ConversationStore:
+    """
+    Interface of a conversation store
+
+    Messages are dicts with "role", "content" and optional metadata. Positions
+    (seq) count from 0 for the oldest message of a session.
+    """
+
+    def append(self, session_id, message):
+        """Queue a message to be stored after the session's last one"""
+        raise NotImplementedError
+
+    def count(self, session_id):
+        """Number of stored messages of a session"""
+        raise NotImplementedError
+
+    def role_counts(self, session_id):
+        """Stored messages per role, e.g. {"user": 3, "assistant": 4}"""
+        raise NotImplementedError
+
+    def load_range(self, session_id, start, stop):
+        """Messages with start <= seq < stop, oldest first"""
+        raise NotImplementedError
+
+    def load_recent(self, session_id, limit=RESUME_WINDOW):
+        """
+        Newest messages of a session
+
+        Returns:
+            tuple: (messages oldest first, seq of the first returned message)
+        """
+        total = self.count(session_id)
+        start = max(total - limit, 0)
+        return self.load_range(session_id, start, total), start
+
+    def iter_messages(self, session_id, page_size=500):
+        """Yield every message of a session, oldest first, one page in memory at a time"""
+        start = 0
+        while True:
+            page = self.load_range(session_id, start, start + page_size)
+            yield from page
+            if len(page) < page_size:
+                return
+            start += page_size
+
+    def clear(self, session_id):
+        """Delete a session's messages"""
+        raise NotImplementedError
+
+    def flush(self):
+        """Wait until queued writes are committed"""
+
+    def close(self):
+        """Commit queued writes and release the database"""
+
+
+def _to_row(message):
+    meta = {k: v for k, v in message.items() if k not in ("role", "content")}
+    return message["role"], message["content"], json.dumps(meta) if meta else None
+
+
+def _from_row(role, content, meta):
+    message = {"role": role, "content": content}
+    if meta:
+        message.update(json.loads(meta))
+    return message
+
+
+class SQLiteConversationStore(ConversationStore):
+    """
+    Conversation store in a SQLite database (WAL mode, group commit)
+
+    Args:
+        path (str): Database file
+        flush_interval (float): Seconds the writer gathers operations into one transaction
+        batch_size (int): Most operations per transaction
+    """
+
+    def __init__(self, path, flush_interval=STORE_FLUSH_INTERVAL, batch_size=STORE_BATCH_SIZE):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = str(path)
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._writer_db = self._connect()
+        self._writer_db.executescript(SCHEMA)
+        self._reader_db = self._connect()
+        self._read_lock = threading.Lock()
+        self._next_seq = {}       # session_id -> seq of its next message (writer thread only)
+        self._queue = queue.Queue()
+        self.stats = {"appends": 0, "transactions": 0}
+        self._thread = threading.Thread(target=self._write_loop, name="conversation-store",
+                                        daemon=True)
+        self._thread.start()
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")  # fsync at checkpoints, not per commit
+        return db
+
+    # ---- write path (background thread) ----
+
+    def append(self, session_id, message):
+        self._queue.put(("append", session_id, _to_row(message), time.time()))
+
+    def clear(self, session_id):
+        self._queue.put(("clear", session_id))
+
+    def _seq(self, session_id):
+        if session_id not in self._next_seq:
+            row = self._writer_db.execute(
+                "SELECT MAX(seq) FROM messages WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            self._next_seq[session_id] = -1 if row[0] is None else row[0]
+        self._next_seq[session_id] += 1
+        return self._next_seq[session_id]
+
+    def _apply(self, operation):
+        if operation[0] == "append":
+            _, session_id, (role, content, meta), created = operation
+            self._writer_db.execute(
+                "INSERT INTO messages (session_id, seq, role, content, meta, created) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (session_id, self._seq(session_id), role, content, meta, created),
+            )
+        elif operation[0] == "clear":
+            self._writer_db.execute("DELETE FROM messages WHERE session_id = ?", (operation[1],))
+            self._next_seq[operation[1]] = -1
+
+    def _write_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get(timeout=max(deadline - time.monotonic(), 0)))
+                except queue.Empty:
+                    break
+            stop = None in batch
+            operations = [op for op in batch if op is not None]
+            try:
+                if operations:
+                    self._commit(operations)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if stop:
+                return
+
+    def _commit(self, operations):
+        """Apply operations in one transaction, retried; logged and dropped if it keeps failing"""
+        appends = sum(operation[0] == "append" for operation in operations)
+        for attempt in range(1, STORE_WRITE_ATTEMPTS + 1):
+            try:
+                self._writer_db.execute("BEGIN")
+                for operation in operations:
+                    self._apply(operation)
+                self._writer_db.execute("COMMIT")
+            except sqlite3.Error as e:
+                if self._writer_db.in_transaction:
+                    self._writer_db.execute("ROLLBACK")
+                self._next_seq.clear()  # Re-read positions from the database
+                if attempt == STORE_WRITE_ATTEMPTS:
+                    logger.error("Conversation store write failed %d times, dropped %d "
+                                 "operation(s) (%d message(s)): %s",
+                                 attempt, len(operations), appends, e)
+                    return
+                logger.warning("Conversation store write failed (attempt %d of %d), "
+                               "retrying: %s", attempt, STORE_WRITE_ATTEMPTS, e)
+                time.sleep(0.1 * attempt)
+            else:
+                self.stats["transactions"] += 1
+                self.stats["appends"] += appends
+                return
+
+    def flush(self):
+        self._queue.join()
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self._writer_db.close()
+        self._reader_db.close()
+
+    # ---- read path ----
+
+    def _read(self, sql, params):
+        self.flush()  # Reads see every message appended before them
+        with self._read_lock:
+            return self._reader_db.execute(sql, params).fetchall()
+
+    def count(self, session_id):
+        return self._read("SELECT COUNT(*) FROM messages WHERE session_id = ?",
+                          (session_id,))[0][0]
+
+    def role_counts(self, session_id):
+        return dict(self._read(
+            "SELECT role, COUNT(*) FROM messages WHERE session_id = ? GROUP BY role",
+            (session_id,),
+        ))
+
+    def load_range(self, session_id, start, stop):
+        rows = self._read(
+            "SELECT role, content, meta FROM messages "
+            "WHERE session_id = ? AND seq >= ? AND seq < ? ORDER BY seq",
+            (session_id, max(start, 0), stop),
+        )
+        return [_from_row(*row) for row in rows]
+
+
+@st.cache_resource(show_spinner=False)
+def get_conversation_store():
+    """Process-wide store (None when CONVERSATION_DB=off)"""
+    if CONVERSATION_DB.lower() in ("", "off", "none"):
+        return None
+    store = SQLiteConversationStore(CONVERSATION_DB)
+    atexit.register(store.close)
+    return store
+
+
+def new_session_id():
+    """A fresh random session ID"""
+    return uuid.uuid4().hex
+
+
+def switch_session(session_id):
+    """Make this browser session continue another conversation (and put its ID in the URL)"""
+    st.session_state.session_id = session_id
+    st.query_params[SESSION_PARAM] = session_id
+
+
+def current_session_id():
+    """
+    ID of this browser session's conversation, kept in the page URL
+
+    A valid ?session=... parameter resumes that conversation; otherwise a new
+    ID is generated and written to the URL, so a reload or reconnect keeps it.
+
+    Returns:
+        str: 32 hex characters
+    """
+    if "session_id" not in st.session_state:
+        session_id = st.query_params.get(SESSION_PARAM, "")
+        if _SESSION_ID.fullmatch(session_id):
+            st.session_state.session_id = session_id
+        else:
+            switch_session(new_session_id())
+    return st.session_state.session_id
@@ -0,0 +1,130 @@
+# =====================================================
+# 📌 PROCESS-WIDE POOLED GROQ CLIENTS
+# =====================================================
+# Streamlit reruns the whole script on every interaction. Building a new
+# ChatGroq each time throws away its HTTP client and the TLS connection to
+# api.groq.com. This module keeps one registry per process (via
+# st.cache_resource) that owns a single keep-alive httpx connection pool and
+# one ChatGroq per model. Per-request settings such as temperature and
+# max_tokens are applied at call time with .bind(), so slider changes never
+# create new clients.
+
+import os
+import threading
+import weakref
+
+import httpx
+import streamlit as st
+from langchain_groq import ChatGroq
+
+# Connection pool sizing (shared by every session in this process)
+POOL_MAX_CONNECTIONS = int(os.getenv("GROQ_POOL_MAX_CONNECTIONS", "20"))
+POOL_MAX_KEEPALIVE = int(os.getenv("GROQ_POOL_MAX_KEEPALIVE", "10"))
+POOL_KEEPALIVE_EXPIRY = float(os.getenv("GROQ_POOL_KEEPALIVE_EXPIRY", "120"))
+
+# Network timeout for Groq requests (seconds)
+GROQ_TIMEOUT = float(os.getenv("GROQ_TIMEOUT", "60"))
+
+# Alternative API endpoint (e.g. a local fake server for testing); None = api.groq.com
+GROQ_API_BASE = os.getenv("GROQ_API_BASE") or None
+
+
+class GroqClientRegistry:
+    """
+    Share ChatGroq clients and one HTTP connection pool across all sessions
+
+    Clients are keyed only by (api_key, model_name); sampling parameters are
+    passed per call so they never multiply the number of clients.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients = {}
+        self._seen_streams = weakref.WeakSet()  # Network streams already used once
+        self.stats = {
+            "hits": 0,                 # Client found in the registry
+            "misses": 0,               # Client had to be created
+            "requests": 0,             # HTTP responses received through the pool
+            "connections_opened": 0,   # Responses served on a brand-new connection
+            "connections_reused": 0,   # Responses served on a kept-alive connection
+        }
+        self.http_client = httpx.Client(
+            limits=httpx.Limits(
+                max_connections=POOL_MAX_CONNECTIONS,
+                max_keepalive_connections=POOL_MAX_KEEPALIVE,
+                keepalive_expiry=POOL_KEEPALIVE_EXPIRY,
+            ),
+            timeout=GROQ_TIMEOUT,
+            event_hooks={"response": [self._record_connection]},
+        )
+
+    def _record_connection(self, response):
+        """httpx response hook: count new vs reused connections"""
+        stream = response.extensions.get("network_stream")
+        with self._lock:
+            self.stats["requests"] += 1
+            if stream is None:
+                return
+            if stream in self._seen_streams:
+                self.stats["connections_reused"] += 1
+            else:
+                self._seen_streams.add(stream)
+                self.stats["connections_opened"] += 1
+
+    def get(self, api_key, model_name):
+        """
+        Return the shared ChatGroq client for a model, creating it on first use
+
+        Args:
+            api_key (str): Groq API key
+            model_name (str): Groq model identifier
+
+        Returns:
+            ChatGroq: Client bound to the shared HTTP connection pool
+        """
+        key = (api_key, model_name)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                self.stats["hits"] += 1
+                return client
+            self.stats["misses"] += 1
+            client = ChatGroq(
+                groq_api_key=api_key,
+                model_name=model_name,
+                groq_api_base=GROQ_API_BASE,
+                http_client=self.http_client,
+                max_retries=0,  # Retries and backoff are handled by resilience.call_with_retries
+            )
+            self._clients[key] = client
+            return client
+
+    def snapshot(self):
+        """Copy of the counters, safe to display while other sessions update them"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["clients"] = len(self._clients)
+            return stats
+
+
+@st.cache_resource(show_spinner=False)
+def get_client_registry():
+    """Process-wide registry shared by every Streamlit session"""
+    return GroqClientRegistry()
+
+
+def get_groq_llm(api_key, model_name, temperature, max_tokens):
+    """
+    Get a pooled Groq client with this request's sampling settings applied
+
+    Args:
+        api_key (str): Groq API key
+        model_name (str): Groq model identifier
+        temperature (float): Sampling temperature for this call
+        max_tokens (int): Maximum tokens in the response for this call
+
+    Returns:
+        Runnable: The shared ChatGroq bound to the per-call parameters
+    """
+    client = get_client_registry().get(api_key, model_name)
+    return client.bind(temperature=temperature, max_tokens=max_tokens)
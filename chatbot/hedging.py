@@ -0,0 +1,204 @@
+# =====================================================
+# 📌 HEDGED STREAMING REQUESTS
+# =====================================================
+# Free inference endpoints are often cold or overloaded: one model can take a
+# long time before its first token while another would answer at once.
+# Instead of trying models strictly one after another, a hedged request fires
+# the primary and, if no token has arrived within a short delay, also starts
+# the next candidate. The first attempt to produce a token wins; every other
+# attempt is cancelled. Each attempt has its own deadline, and a process-wide
+# semaphore bounds the total number of requests in flight.
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+from resilience import LLMCallError
+
+# Start the next candidate if no token arrived within this many seconds
+# ("off" or 0 = sequential: only move on after a failure)
+_hedge_delay = os.getenv("HEDGE_DELAY", "2.0").strip().lower()
+HEDGE_DELAY = None if _hedge_delay in ("", "off", "0", "0.0") else float(_hedge_delay)
+
+# Give up on an attempt that has been silent this long (first token or between tokens)
+HEDGE_MODEL_DEADLINE = float(os.getenv("HEDGE_MODEL_DEADLINE", "20"))
+
+# Attempts racing at the same time for one request
+HEDGE_MAX_PARALLEL = int(os.getenv("HEDGE_MAX_PARALLEL", "3"))
+
+# Requests in flight across all sessions of this process
+HEDGE_MAX_IN_FLIGHT = int(os.getenv("HEDGE_MAX_IN_FLIGHT", "8"))
+
+
+@st.cache_resource(show_spinner=False)
+def get_hedge_pool():
+    """Process-wide worker pool and in-flight semaphore shared by all hedged requests"""
+    executor = ThreadPoolExecutor(max_workers=HEDGE_MAX_IN_FLIGHT, thread_name_prefix="hedge")
+    return executor, threading.BoundedSemaphore(HEDGE_MAX_IN_FLIGHT)
+
+
+class _Attempt:
+    """One racing request: its key, cancel flag and time of last activity"""
+
+    def __init__(self, key):
+        self.key = key
+        self.cancelled = threading.Event()
+        self.started = time.monotonic()
+        self.last_event = self.started
+        self.first_token = None  # Seconds from start to the first token
+
+
+def _run_attempt(attempt, open_stream, events, semaphore):
+    """Worker: stream one attempt into the shared event queue until done or cancelled"""
+    chunks = None
+    try:
+        chunks = open_stream()
+        for text in chunks:
+            if attempt.cancelled.is_set():
+                return
+            if text:
+                events.put((attempt, "token", text))
+        events.put((attempt, "done", None))
+    except Exception as exc:
+        events.put((attempt, "error", exc))
+    finally:
+        semaphore.release()
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            try:
+                close()  # Drop the HTTP stream of a cancelled attempt
+            except Exception:
+                pass
+
+
+class HedgedStream:
+    """
+    Race several streaming attempts, staggered by a hedge delay
+
+    Args:
+        attempts (list): (key, open_stream) pairs in order of preference, where
+            open_stream() returns an iterator of text chunks
+        hedge_delay (float): Seconds without a token before the next attempt
+            starts (None = only after a failure)
+        deadline (float): Seconds an attempt may stay silent before it is abandoned
+        max_parallel (int): Attempts running at the same time
+        on_attempt_end (callable): Called as on_attempt_end(key, error, first_token)
+            for every attempt that finished, failed or was abandoned; error is None
+            for the winner and for attempts cancelled after losing the race
+
+    Attributes:
+        winner: Key of the attempt that produced the response
+        launched (int): Attempts started for this request
+    """
+
+    def __init__(self, attempts, hedge_delay=HEDGE_DELAY, deadline=HEDGE_MODEL_DEADLINE,
+                 max_parallel=HEDGE_MAX_PARALLEL, on_attempt_end=None):
+        self.attempts = list(attempts)
+        self.hedge_delay = hedge_delay
+        self.deadline = deadline
+        self.max_parallel = max(1, max_parallel)
+        self.on_attempt_end = on_attempt_end
+        self.winner = None
+        self.launched = 0
+
+    def _finish(self, attempt, error):
+        if self.on_attempt_end is not None:
+            self.on_attempt_end(attempt.key, error, attempt.first_token)
+
+    def __iter__(self):
+        executor, semaphore = get_hedge_pool()
+        events = queue.Queue()
+        pending = list(self.attempts)
+        active = []
+        winner = None
+        last_error = None
+        next_hedge = None  # monotonic time at which the next attempt may start
+
+        def launch(block):
+            nonlocal next_hedge
+            if not semaphore.acquire(timeout=self.deadline if block else 0):
+                if block:
+                    raise LLMCallError("Too many model requests in flight", kind="timeout")
+                return  # At capacity - hedge later
+            key, open_stream = pending.pop(0)
+            attempt = _Attempt(key)
+            active.append(attempt)
+            self.launched += 1
+            executor.submit(_run_attempt, attempt, open_stream, events, semaphore)
+            if self.hedge_delay is not None:
+                next_hedge = time.monotonic() + self.hedge_delay
+
+        try:
+            while True:
+                if not active:
+                    if winner is not None:
+                        return
+                    if not pending:
+                        raise last_error or LLMCallError("No model returned a response",
+                                                         kind="server")
+                    launch(block=True)
+
+                # Wake up for the next event, the next hedge or the nearest deadline
+                now = time.monotonic()
+                wake = min(a.last_event + self.deadline for a in active)
+                can_hedge = (winner is None and pending and next_hedge is not None
+                             and len(active) < self.max_parallel)
+                if can_hedge:
+                    wake = min(wake, next_hedge)
+                try:
+                    attempt, kind, payload = events.get(timeout=max(wake - now, 0.0))
+                except queue.Empty:
+                    now = time.monotonic()
+                    for stalled in [a for a in active if now - a.last_event >= self.deadline]:
+                        stalled.cancelled.set()
+                        active.remove(stalled)
+                        error = LLMCallError(f"{stalled.key} timed out", kind="timeout")
+                        self._finish(stalled, error)
+                        if stalled is winner:
+                            raise error
+                        last_error = error
+                    if can_hedge and now >= next_hedge:
+                        launch(block=False)
+                    continue
+
+                if attempt not in active:
+                    continue  # Late event from a cancelled attempt
+                attempt.last_event = time.monotonic()
+
+                if kind == "token":
+                    if winner is None:
+                        # First good token wins the race - cancel everyone else
+                        winner = attempt
+                        self.winner = attempt.key
+                        attempt.first_token = attempt.last_event - attempt.started
+                        for loser in active:
+                            if loser is not attempt:
+                                loser.cancelled.set()
+                                self._finish(loser, None)
+                        active[:] = [attempt]
+                    yield payload
+                    continue
+
+                active.remove(attempt)
+                if kind == "done":
+                    if attempt is winner:
+                        self._finish(attempt, None)
+                        return
+                    # Finished without a single token - counts as a failure
+                    last_error = LLMCallError(f"{attempt.key} returned an empty answer",
+                                              kind="server")
+                    self._finish(attempt, last_error)
+                else:
+                    self._finish(attempt, payload)
+                    if attempt is winner:
+                        raise payload
+                    last_error = payload
+                if winner is None and pending and len(active) < self.max_parallel:
+                    launch(block=not active)  # A slot opened up - move on at once
+        finally:
+            for attempt in active:  # Consumer stopped early or an error was raised
+                attempt.cancelled.set()
@@ -1,13 +1,36 @@
 # =====================================================
 # 📌 Import Required Libraries
 # =====================================================
-from huggingface_hub import InferenceClient
 import os
+import time
 import streamlit as st
 from dotenv import load_dotenv
 
+from llm_backends import HF_MODELS, HuggingFaceBackend, fallback_backends
+from model_scoreboard import get_model_scoreboard
+from llm_router import LLMRouter
+from metrics_registry import instrument_stream, observe_rerun, track_page
+from prompt_cache import to_langchain_message
+from streaming import ThrottledMarkdownWriter
+from render_cache import install_code_styles, show_markdown
+
 load_dotenv()
 
+# Process-wide metrics: this session is active, and the page run is timed
+page_start = track_page()
+
+# Sampling temperature for all Hugging Face models (above the semantic cache's
+# SEMANTIC_CACHE_MAX_TEMPERATURE: sampled answers are not reused, so this page
+# has no semantic cache)
+HF_TEMPERATURE = 0.7
+HF_MAX_TOKENS = 500
+
+SYSTEM_PROMPT = ("You are CypherNova, a helpful and intelligent AI assistant. "
+                 "Provide detailed, accurate, and helpful responses.")
+
+# Reply shown when every model fails
+FALLBACK_RESPONSE = "I'm here to help! What specific information are you looking for?"
+
 # Get Hugging Face token
 try:
     hf_token = st.secrets["HF_API_TOKEN"]
@@ -28,6 +51,11 @@ with st.sidebar:
         st.session_state.messages = []
         st.rerun()
 
+    # Debug panel: current model order (re-sorted from the scoreboard on every request)
+    with st.expander("🏁 Model Ranking"):
+        st.dataframe(get_model_scoreboard().table(HF_MODELS), hide_index=True)
+        st.caption("Success rate and latency decay over time; the API default model is always tried last.")
+
 st.markdown(
     """
     <div style='text-align: center; margin-bottom: 20px;'>
@@ -46,75 +74,55 @@ if "messages" not in st.session_state:
         {"role": "assistant", "content": "CypherNova is HERE! 🌸 I'm powered by state-of-the-art AI models. How can I help you today?"}
     ]
 
+install_code_styles()
 for msg in st.session_state.messages:
     with st.chat_message(msg["role"]):
-        st.markdown(msg["content"])
+        show_markdown(msg["content"])  # Rendered to HTML once, then served from the cache
 
-def get_llm_response(user_input):
-    """Use the best performing free Hugging Face models"""
+def get_llm_response(placeholder):
+    """
+    Stream an answer from the best performing free Hugging Face models
+
+    Args:
+        placeholder: Streamlit container (st.empty) that shows the answer
+
+    Returns:
+        tuple: (answer or FALLBACK_RESPONSE, winning model or None, models raced)
+    """
+    # Last 3 exchanges (the newest message is the current question)
+    messages = [to_langchain_message("system", SYSTEM_PROMPT),
+                *[to_langchain_message(m["role"], m["content"])
+                  for m in st.session_state.messages[-6:] if m["role"] in ("user", "assistant")]]
+
+    # Models are raced: the next one joins if no token arrived within HEDGE_DELAY
+    backend = HuggingFaceBackend(hf_token)
+    router = LLMRouter([backend, *fallback_backends("huggingface")])
+    writer = ThrottledMarkdownWriter(placeholder)
     try:
-        client = InferenceClient(token=hf_token)
-        
-        # Build conversation history
-        conversation = ""
-        for msg in st.session_state.messages[-6:]:  # Last 3 exchanges
-            if msg["role"] == "user":
-                conversation += f"User: {msg['content']}\n"
-            elif msg["role"] == "assistant":
-                conversation += f"Assistant: {msg['content']}\n"
-        
-        prompt = f"""You are CypherNova, a helpful and intelligent AI assistant. Provide detailed, accurate, and helpful responses.
-
-{conversation}User: {user_input}
-Assistant:"""
-        
-        # Try the best performing models in order
-        high_performance_models = [
-            "mistralai/Mistral-7B-Instruct-v0.3",  # Newest Mistral - excellent
-            "mistralai/Mistral-7B-Instruct-v0.2",  # Very reliable
-            "HuggingFaceH4/zephyr-7b-beta",        # High quality
-            "google/gemma-7b-it",                  # Google's model
-            "meta-llama/Llama-2-7b-chat-hf",       # Llama 2
-        ]
-        
-        for model in high_performance_models:
-            try:
-                response = client.text_generation(
-                    prompt=prompt,
-                    model=model,
-                    max_new_tokens=500,
-                    temperature=0.7,
-                    do_sample=True,
-                    return_full_text=False
-                )
-                
-                if response and response.strip():
-                    return response.strip()
-                    
-            except Exception as e:
-                continue  # Try next model
-        
-        # If specific models fail, try without model specification
-        response = client.text_generation(
-            prompt=prompt,
-            max_new_tokens=400,
-            temperature=0.7
-        )
-        return response.strip()
-        
-    except Exception as e:
+        for text in instrument_stream(router.stream(messages, HF_TEMPERATURE, HF_MAX_TOKENS),
+                                      router, messages):
+            writer.write(text)
+    except Exception:
         # Simple fallback that doesn't mention errors
-        return "I'm here to help! What specific information are you looking for?"
+        writer.close()
+        return FALLBACK_RESPONSE, None, backend.last_launched
+    model = backend.last_model if router.last_backend is backend else router.last_backend.label
+    return writer.close().strip() or FALLBACK_RESPONSE, model, backend.last_launched
 
 # Chat logic
 if user_input := st.chat_input("Type your message here..."):
     st.session_state.messages.append({"role": "user", "content": user_input})
     with st.chat_message("user"):
-        st.markdown(user_input)
+        show_markdown(user_input)
 
     with st.chat_message("assistant"):
-        with st.spinner("Generating response..."):
-            response = get_llm_response(user_input)
-        st.markdown(response)
+        placeholder = st.empty()
+        placeholder.markdown("⏳ Generating response...")
+        response, model, raced = get_llm_response(placeholder)
+        show_markdown(response, placeholder)
+        if model:
+            st.caption(f"🤖 {model} · {raced} model(s) raced")
+
+    st.session_state.messages.append({"role": "assistant", "content": response})
 
-    st.session_state.messages.append({"role": "assistant", "content": response})
\ No newline at end of file
+observe_rerun(time.perf_counter() - page_start)
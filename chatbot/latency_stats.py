@@ -0,0 +1,204 @@
+# =====================================================
+# 📌 CONSTANT-MEMORY LATENCY STATISTICS
+# =====================================================
+# Session analytics used to keep every response time in a list and re-sum it
+# on each rerun to show one average. StreamingStats keeps a running mean and
+# variance (Welford's method) plus a log-bucketed histogram in the style of
+# HdrHistogram: bucket boundaries grow by 2%, so any percentile is within ~1%
+# of the true value, and memory is bounded by the range of values (a few
+# hundred buckets for latencies between milliseconds and minutes) rather
+# than by how many were recorded.
+#
+# PerModelStats keeps one set of these per model: time to first token, total
+# response time, output tokens per second and prompt tokens.
+
+import math
+
+# Relative width of a histogram bucket (percentile error is half of it)
+HISTOGRAM_GROWTH = 1.02
+_LOG_GROWTH = math.log(HISTOGRAM_GROWTH)
+
+# Smallest value told apart from zero
+HISTOGRAM_MIN = 1e-6
+
+
+class StreamingStats:
+    """
+    Running count, mean, variance, min/max and approximate percentiles
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0        # Sum of squared differences from the mean (Welford)
+        self.min = None
+        self.max = None
+        self._zeros = 0       # Values below HISTOGRAM_MIN
+        self._buckets = {}    # Bucket index -> count
+
+    def add(self, value):
+        """Record one value"""
+        value = float(value)
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        if value < HISTOGRAM_MIN:
+            self._zeros += 1
+        else:
+            index = int(math.log(value / HISTOGRAM_MIN) / _LOG_GROWTH)
+            self._buckets[index] = self._buckets.get(index, 0) + 1
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def variance(self):
+        """Sample variance (0 with fewer than two values)"""
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def stdev(self):
+        return math.sqrt(self.variance)
+
+    def quantiles(self, *fractions):
+        """
+        Approximate nearest-rank percentiles, in one pass over the buckets
+
+        Args:
+            *fractions (float): 0.5 for the median, 0.95 for p95...
+
+        Returns:
+            list: One value per fraction (None values if nothing was recorded)
+        """
+        if not self.count:
+            return [None] * len(fractions)
+        wanted = sorted((max(math.ceil(f * self.count), 1), i) for i, f in enumerate(fractions))
+        results = [self.max] * len(fractions)
+        seen = self._zeros
+        pending = 0
+        while pending < len(wanted) and seen >= wanted[pending][0]:
+            results[wanted[pending][1]] = self.min
+            pending += 1
+        buckets = self._buckets
+        for index in sorted(buckets):
+            if pending == len(wanted):
+                break
+            seen += buckets[index]
+            if seen < wanted[pending][0]:
+                continue
+            value = HISTOGRAM_MIN * HISTOGRAM_GROWTH ** (index + 0.5)  # Bucket midpoint
+            value = min(max(value, self.min), self.max)
+            while pending < len(wanted) and seen >= wanted[pending][0]:
+                results[wanted[pending][1]] = value
+                pending += 1
+        return results
+
+    def quantile(self, fraction):
+        """Approximate nearest-rank percentile (None if nothing was recorded)"""
+        return self.quantiles(fraction)[0]
+
+    def summary(self):
+        """Mean and p50/p95/p99 as a dict (None values if empty)"""
+        p50, p95, p99 = self.quantiles(0.5, 0.95, 0.99)
+        return {"count": self.count, "mean": self.mean if self.count else None,
+                "p50": p50, "p95": p95, "p99": p99}
+
+    def to_dict(self):
+        """JSON-friendly state (for exports)"""
+        return {"count": self.count, "mean": self.mean, "m2": self._m2, "min": self.min,
+                "max": self.max, "zeros": self._zeros,
+                "buckets": {str(k): v for k, v in self._buckets.items()}}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild from to_dict() output"""
+        stats = cls()
+        stats.count = int(data["count"])
+        stats.mean = float(data["mean"])
+        stats._m2 = float(data["m2"])
+        stats.min = data.get("min")
+        stats.max = data.get("max")
+        stats._zeros = int(data.get("zeros", 0))
+        stats._buckets = {int(k): int(v) for k, v in data.get("buckets", {}).items()}
+        return stats
+
+
+# Metrics tracked per model
+MODEL_METRICS = ("time_to_first_token", "response_time", "tokens_per_second", "prompt_tokens")
+
+# Shorter generation windows give meaningless speeds (e.g. the whole answer in one chunk)
+MIN_GENERATION_SECONDS = 0.05
+
+
+class PerModelStats:
+    """
+    StreamingStats for each model that answered in this session
+    """
+
+    def __init__(self):
+        self.models = {}  # model -> {metric name -> StreamingStats}
+
+    def record(self, model, response_time=None, time_to_first_token=None,
+               output_tokens=None, prompt_tokens=None):
+        """
+        Record one answer
+
+        Args:
+            model (str): Model (or backend label) that answered
+            response_time (float): Seconds for the whole answer
+            time_to_first_token (float): Seconds until the first token
+            output_tokens (int): Tokens in the answer
+            prompt_tokens (int): Tokens sent in the prompt
+        """
+        stats = self.models.setdefault(model, {name: StreamingStats() for name in MODEL_METRICS})
+        if time_to_first_token is not None:
+            stats["time_to_first_token"].add(time_to_first_token)
+        if response_time is not None:
+            stats["response_time"].add(response_time)
+            # Generation speed: tokens over the time spent producing them
+            # (the whole response time when the answer was not streamed)
+            generating = (response_time if time_to_first_token is None
+                          else response_time - time_to_first_token)
+            if output_tokens and generating >= MIN_GENERATION_SECONDS:
+                stats["tokens_per_second"].add(output_tokens / generating)
+        if prompt_tokens is not None:
+            stats["prompt_tokens"].add(prompt_tokens)
+
+    def __len__(self):
+        return len(self.models)
+
+    def rows(self):
+        """One table row per model (for st.dataframe)"""
+        rows = []
+        for model, stats in self.models.items():
+            ttft, total = stats["time_to_first_token"], stats["response_time"]
+            speed, prompt = stats["tokens_per_second"], stats["prompt_tokens"]
+            ttft_p50, ttft_p95 = ttft.quantiles(0.5, 0.95)
+            total_p50, total_p95, total_p99 = total.quantiles(0.5, 0.95, 0.99)
+            rows.append({
+                "Model": model,
+                "Answers": total.count,
+                "TTFT p50 (s)": ttft_p50,
+                "TTFT p95 (s)": ttft_p95,
+                "Total p50 (s)": total_p50,
+                "Total p95 (s)": total_p95,
+                "Total p99 (s)": total_p99,
+                "Tokens/s": speed.mean if speed.count else None,
+                "Prompt tokens": prompt.mean if prompt.count else None,
+            })
+        return rows
+
+    def to_dict(self):
+        return {model: {name: s.to_dict() for name, s in stats.items()}
+                for model, stats in self.models.items()}
+
+    @classmethod
+    def from_dict(cls, data):
+        table = cls()
+        for model, stats in data.items():
+            table.models[model] = {name: StreamingStats.from_dict(stats[name]) if name in stats
+                                   else StreamingStats() for name in MODEL_METRICS}
+        return table
@@ -0,0 +1,319 @@
+# =====================================================
+# 📌 LLM BACKENDS (COMMON STREAMING INTERFACE)
+# =====================================================
+# Every provider used by the CypherNova front-ends is wrapped in a backend
+# with the same interface:
+#
+#     backend.stream(messages, temperature, max_tokens) -> iterator of text chunks
+#
+# `messages` is a list of LangChain message objects (system / human / ai).
+# Provider SDKs are imported lazily so each page only needs the packages for
+# the backends it actually uses.
+
+import os
+
+import streamlit as st
+
+from context_window import count_message_tokens, count_tokens
+from hedging import HEDGE_DELAY, HEDGE_MODEL_DEADLINE, HedgedStream
+from model_scoreboard import get_model_scoreboard
+from resilience import LLM_MAX_RETRIES
+
+# Default local model served by Ollama
+OLLAMA_DEFAULT_MODEL = os.getenv("OLLAMA_MODEL", "llama3.2")
+
+# Hugging Face models (default order; re-ranked from the scoreboard on every request)
+HF_MODELS = [
+    "mistralai/Mistral-7B-Instruct-v0.3",  # Newest Mistral - excellent
+    "mistralai/Mistral-7B-Instruct-v0.2",  # Very reliable
+    "HuggingFaceH4/zephyr-7b-beta",        # High quality
+    "google/gemma-7b-it",                  # Google's model
+    "meta-llama/Llama-2-7b-chat-hf",       # Llama 2
+]
+
+
+class LLMBackend:
+    """
+    Base class for a chat model provider
+
+    Attributes:
+        name (str): Unique key used for health tracking, e.g. "groq:gemma2-9b-it"
+        label (str): Model name shown to users and stored with messages
+        max_retries (int): Retries of transient errors before the router moves on
+        last_wait (float): Seconds the last request queued before it was sent
+    """
+
+    name = "base"
+    label = "base"
+    max_retries = LLM_MAX_RETRIES
+    last_wait = 0.0
+
+    def stream(self, messages, temperature, max_tokens):
+        """
+        Generate a response as a stream of text chunks
+
+        Args:
+            messages (list): LangChain messages, oldest first
+            temperature (float): Sampling temperature
+            max_tokens (int): Maximum tokens in the response
+
+        Yields:
+            str: Non-empty text chunks
+        """
+        raise NotImplementedError
+
+    def queue_delay(self, messages, max_tokens):
+        """Seconds this backend expects to queue before sending (e.g. client-side rate limits)"""
+        return 0.0
+
+
+class LangChainChatBackend(LLMBackend):
+    """Backend for any LangChain chat model that supports .stream()"""
+
+    def _chat_model(self, temperature, max_tokens):
+        raise NotImplementedError
+
+    def stream(self, messages, temperature, max_tokens):
+        for chunk in self._chat_model(temperature, max_tokens).stream(messages):
+            if chunk.content:
+                yield chunk.content
+
+
+class GroqBackend(LangChainChatBackend):
+    """
+    Groq cloud models through the pooled ChatGroq clients and the shared rate limiter
+
+    Args:
+        api_key (str): Groq API key
+        model_name (str): Groq model identifier
+        on_wait (callable): Called as on_wait(seconds, position) while queued for quota
+    """
+
+    def __init__(self, api_key, model_name, on_wait=None):
+        self.api_key = api_key
+        self.model_name = model_name
+        self.on_wait = on_wait
+        self.name = f"groq:{model_name}"
+        self.label = model_name
+        self.last_wait = 0.0  # Seconds the last request spent queued for quota
+
+    def _chat_model(self, temperature, max_tokens):
+        from groq_client import get_groq_llm
+        return get_groq_llm(self.api_key, self.model_name, temperature, max_tokens)
+
+    def _reserve(self, messages, max_tokens):
+        """Tokens to reserve: the prompt plus the largest possible response"""
+        prompt_tokens = sum(count_message_tokens(m.content, self.model_name) for m in messages)
+        return prompt_tokens, prompt_tokens + max_tokens
+
+    def queue_delay(self, messages, max_tokens):
+        from rate_limiter import get_rate_limiter
+        return get_rate_limiter().estimate_wait(self._reserve(messages, max_tokens)[1])
+
+    def stream(self, messages, temperature, max_tokens):
+        from rate_limiter import get_rate_limiter
+
+        # Wait for quota (shared by every session), refund whatever is not used
+        rate_limiter = get_rate_limiter()
+        prompt_tokens, reserved = self._reserve(messages, max_tokens)
+        self.last_wait = rate_limiter.acquire(reserved, on_wait=self.on_wait)
+        used = prompt_tokens
+        try:
+            for text in super().stream(messages, temperature, max_tokens):
+                used += count_tokens(text, self.model_name)
+                yield text
+        finally:
+            rate_limiter.refund(reserved - used)
+
+
+class OllamaBackend(LLMBackend):
+    """
+    Local models served by Ollama, streamed from its native /api/chat endpoint
+
+    Args:
+        model_name (str): Ollama model tag
+
+    Attributes:
+        last_timings (dict): Ollama's load / prompt-eval / generation timings
+            of the last response (see ollama_client.ollama_timings)
+    """
+
+    def __init__(self, model_name=OLLAMA_DEFAULT_MODEL):
+        self.model_name = model_name
+        self.name = f"ollama:{model_name}"
+        self.label = f"ollama:{model_name}"
+        self.last_timings = None
+
+    def stream(self, messages, temperature, max_tokens):
+        from ollama_client import stream_chat
+        self.last_timings = None
+        yield from stream_chat(self.model_name, messages, temperature, max_tokens,
+                               on_done=lambda timings: setattr(self, "last_timings", timings))
+
+
+class OpenAIBackend(LangChainChatBackend):
+    """
+    OpenAI chat models
+
+    Args:
+        model_name (str): OpenAI model identifier
+    """
+
+    def __init__(self, model_name="gpt-3.5-turbo"):
+        self.model_name = model_name
+        self.name = f"openai:{model_name}"
+        self.label = model_name
+
+    def _chat_model(self, temperature, max_tokens):
+        from langchain_openai import ChatOpenAI
+        return ChatOpenAI(model=self.model_name, temperature=temperature,
+                          max_tokens=max_tokens, streaming=True)
+
+
+@st.cache_resource(show_spinner=False)
+def get_inference_client(token):
+    """
+    Process-wide Hugging Face InferenceClient for a token (reuses its HTTP session)
+
+    Args:
+        token (str): Hugging Face API token
+
+    Returns:
+        InferenceClient: Shared client
+    """
+    from huggingface_hub import InferenceClient
+    # The timeout frees worker threads of abandoned attempts
+    return InferenceClient(token=token, timeout=HEDGE_MODEL_DEADLINE)
+
+
+class HuggingFaceBackend(LLMBackend):
+    """
+    Free Hugging Face Inference API text-generation models
+
+    The conversation is flattened into a "User: / Assistant:" prompt. Models
+    are ordered by the shared scoreboard (see model_scoreboard.py) and raced
+    as a hedged request (see hedging.py): the best model starts at once, the
+    next one joins if no token has arrived within the hedge delay, and the
+    first model to produce a token wins. The Inference API's default model is
+    the last candidate.
+
+    Args:
+        token (str): Hugging Face API token
+        models (list): Model ids to try, best first
+        hedge_delay (float): Seconds before the next model joins (None = sequential)
+    """
+
+    name = "huggingface"
+    label = "huggingface"
+    max_retries = 0  # Each request already races several models; a retry would rerun the race
+
+    def __init__(self, token, models=None, hedge_delay=HEDGE_DELAY):
+        self.token = token
+        self.models = list(models or HF_MODELS)
+        self.hedge_delay = hedge_delay
+        self.last_model = None  # Model that produced the last response
+        self.last_launched = 0  # Models started for the last response
+
+    @staticmethod
+    def build_prompt(messages):
+        """
+        Flatten chat messages into a plain text-generation prompt
+
+        Args:
+            messages (list): LangChain messages (system first)
+
+        Returns:
+            str: Prompt ending with "Assistant:"
+        """
+        lines = []
+        for m in messages:
+            if m.type == "system":
+                lines.append(f"{m.content}\n")
+            elif m.type == "human":
+                lines.append(f"User: {m.content}")
+            else:
+                lines.append(f"Assistant: {m.content}")
+        return "\n".join(lines) + "\nAssistant:"
+
+    def ranked_models(self):
+        """Configured models, best first according to the scoreboard"""
+        return get_model_scoreboard().rank(self.models)
+
+    @staticmethod
+    def _record(model, error, first_token):
+        """HedgedStream callback: feed every finished attempt into the scoreboard"""
+        if model is None or (error is None and first_token is None):
+            return  # API default model, or cancelled after losing the race
+        get_model_scoreboard().record(model, error, first_token)
+
+    def stream(self, messages, temperature, max_tokens):
+        client = get_inference_client(self.token)
+        prompt = self.build_prompt(messages)
+
+        def opener(model):
+            return lambda: client.text_generation(
+                prompt=prompt,
+                model=model,  # None = let the API pick its default model
+                max_new_tokens=max_tokens,
+                temperature=temperature,
+                do_sample=True,
+                return_full_text=False,
+                stream=True
+            )
+
+        candidates = [*self.ranked_models(), None]
+        race = HedgedStream([(model, opener(model)) for model in candidates],
+                            hedge_delay=self.hedge_delay, on_attempt_end=self._record)
+        try:
+            yield from race
+        finally:
+            self.last_model = race.winner
+            self.last_launched = race.launched
+
+
+# =====================================================
+# 📌 BACKEND FACTORY
+# =====================================================
+# Backends every page may fall back to, in order (comma-separated env var,
+# e.g. "ollama,groq"; none by default). Backends whose credentials are
+# missing are skipped.
+LLM_FALLBACKS = [name.strip() for name in os.getenv("LLM_FALLBACKS", "").split(",")
+                 if name.strip()]
+
+# Groq model used when Groq is a fallback for another page
+GROQ_FALLBACK_MODEL = os.getenv("GROQ_FALLBACK_MODEL", "llama-3.1-8b-instant")
+
+
+def make_backend(kind):
+    """
+    Create a backend from its short name using credentials from the environment
+
+    Args:
+        kind (str): "groq", "ollama", "huggingface" or "openai"
+
+    Returns:
+        LLMBackend: The backend, or None if it is unknown or not configured
+    """
+    if kind == "groq" and os.getenv("GROQ_API_KEY"):
+        return GroqBackend(os.getenv("GROQ_API_KEY"), GROQ_FALLBACK_MODEL)
+    if kind == "ollama":
+        return OllamaBackend()
+    if kind == "huggingface" and os.getenv("HF_API_TOKEN"):
+        return HuggingFaceBackend(os.getenv("HF_API_TOKEN"))
+    if kind == "openai" and os.getenv("OPENAI_API_KEY"):
+        return OpenAIBackend()
+    return None
+
+
+def fallback_backends(primary_kind):
+    """
+    Configured fallback backends for a page, excluding its own provider
+
+    Args:
+        primary_kind (str): Short name of the page's primary backend
+
+    Returns:
+        list: LLMBackend objects in fallback order
+    """
+    backends = (make_backend(kind) for kind in LLM_FALLBACKS if kind != primary_kind)
+    return [backend for backend in backends if backend is not None]
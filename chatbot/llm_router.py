@@ -0,0 +1,235 @@
+# =====================================================
+# 📌 LATENCY-AWARE LLM ROUTER
+# =====================================================
+# One engine for every front-end. The router keeps a live health record per
+# backend (EWMA of time-to-first-token and error rate, plus a cooldown after
+# rate limiting), ranks the candidate backends on every request and streams
+# from the best one. Each backend gets its own retry budget for transient
+# errors; if it still fails before producing its first token the router
+# falls back to the next one automatically - e.g. to local Ollama while Groq
+# is rate limited. Health is shared by all sessions in the process.
+
+import os
+import threading
+import time
+
+import streamlit as st
+
+from resilience import LLMCallError, call_with_retries, classify_error, get_circuit_breaker
+
+# EWMA smoothing factor (higher = react faster to recent requests)
+ROUTER_EWMA_ALPHA = float(os.getenv("ROUTER_EWMA_ALPHA", "0.3"))
+
+# Assumed time-to-first-token before a backend has been measured (seconds)
+ROUTER_DEFAULT_LATENCY = float(os.getenv("ROUTER_DEFAULT_LATENCY", "1.0"))
+
+# Extra seconds added per preference rank, so the page's own provider wins
+# unless it is clearly slower or failing
+ROUTER_PREFERENCE_PENALTY = float(os.getenv("ROUTER_PREFERENCE_PENALTY", "2.0"))
+
+# How strongly the error rate worsens a backend's score
+ROUTER_ERROR_PENALTY = float(os.getenv("ROUTER_ERROR_PENALTY", "10.0"))
+
+# Cooldown after a rate limit response when no Retry-After is given (seconds)
+ROUTER_RATE_LIMIT_COOLDOWN = float(os.getenv("ROUTER_RATE_LIMIT_COOLDOWN", "10"))
+
+
+class BackendHealth:
+    """
+    Exponentially weighted latency and error statistics for one backend
+
+    Args:
+        alpha (float): EWMA smoothing factor
+    """
+
+    def __init__(self, alpha=ROUTER_EWMA_ALPHA):
+        self.alpha = alpha
+        self.latency = None      # EWMA time to first token (seconds)
+        self.error_rate = 0.0    # EWMA of failures (0 = healthy, 1 = always failing)
+        self.cooldown_until = 0.0
+        self.requests = 0
+        self.failures = 0
+        self.last_error = None
+        self._lock = threading.Lock()
+
+    def record_success(self, ttft):
+        with self._lock:
+            self.requests += 1
+            self.latency = ttft if self.latency is None else (
+                self.alpha * ttft + (1 - self.alpha) * self.latency)
+            self.error_rate *= (1 - self.alpha)
+
+    def record_failure(self, error):
+        with self._lock:
+            self.requests += 1
+            self.failures += 1
+            self.error_rate = self.alpha + (1 - self.alpha) * self.error_rate
+            self.last_error = error.kind
+            if error.kind in ("rate_limit", "quota"):
+                cooldown = error.retry_after or ROUTER_RATE_LIMIT_COOLDOWN
+                self.cooldown_until = time.time() + cooldown
+
+    def score(self, rank, queue_delay=0.0):
+        """
+        Expected cost of sending the next request here (lower is better)
+
+        Args:
+            rank (int): Preference position of the backend on this page (0 = primary)
+            queue_delay (float): Expected client-side queueing before sending
+
+        Returns:
+            float: Score in (roughly) seconds
+        """
+        with self._lock:
+            latency = self.latency if self.latency is not None else ROUTER_DEFAULT_LATENCY
+            cooldown = max(self.cooldown_until - time.time(), 0.0)
+            return ((latency + queue_delay + cooldown) * (1 + ROUTER_ERROR_PENALTY * self.error_rate)
+                    + rank * ROUTER_PREFERENCE_PENALTY)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "latency": self.latency,
+                "error_rate": self.error_rate,
+                "requests": self.requests,
+                "failures": self.failures,
+                "last_error": self.last_error,
+                "cooldown": max(self.cooldown_until - time.time(), 0.0),
+            }
+
+
+@st.cache_resource(show_spinner=False)
+def get_backend_health():
+    """Process-wide health records keyed by backend name"""
+    return {}
+
+
+def backend_health(name):
+    """Shared BackendHealth for a backend name (created on first use)"""
+    health = get_backend_health()
+    record = health.get(name)
+    if record is None:
+        record = health.setdefault(name, BackendHealth())
+    return record
+
+
+class AllBackendsFailed(LLMCallError):
+    """
+    Every candidate backend failed before producing a token
+
+    Args:
+        errors (list): (backend name, LLMCallError) pairs in the page's order of
+            preference; the preferred backend's error is the one reported
+    """
+
+    def __init__(self, errors):
+        preferred = errors[0][1]
+        super().__init__(
+            "; ".join(f"{name}: {error}" for name, error in errors),
+            kind=preferred.kind, retry_after=preferred.retry_after,
+            status_code=preferred.status_code,
+        )
+        self.errors = errors
+
+
+class LLMRouter:
+    """
+    Rank backends by live health and stream from the best, with automatic fallback
+
+    Args:
+        backends (list): Candidate LLMBackend objects in order of preference
+    """
+
+    def __init__(self, backends):
+        self.backends = list(backends)
+        self.last_backend = None  # Backend that served the last response
+        self.fallbacks = 0        # Backends that failed during the last request
+
+    def ranked(self, messages=None, max_tokens=0):
+        """
+        Candidate backends sorted by score (best first)
+
+        Args:
+            messages (list): Prompt, used to estimate client-side queueing
+            max_tokens (int): Response budget, used to estimate client-side queueing
+
+        Returns:
+            list: LLMBackend objects
+        """
+        scored = []
+        for rank, backend in enumerate(self.backends):
+            delay = backend.queue_delay(messages, max_tokens) if messages is not None else 0.0
+            if get_circuit_breaker(backend.name).state == "open":
+                delay += 3600  # Only as a last resort while its circuit is open
+            scored.append((backend_health(backend.name).score(rank, delay), rank, backend))
+        scored.sort(key=lambda item: (item[0], item[1]))
+        return [backend for _, _, backend in scored]
+
+    def stream(self, messages, temperature, max_tokens, on_retry=None, on_fallback=None):
+        """
+        Stream a response from the best available backend
+
+        Transient errors are retried with backoff on each backend (up to its
+        max_retries) before falling through to the next candidate. Once a
+        token has been produced the router is committed to that backend.
+
+        Args:
+            messages (list): LangChain messages, oldest first
+            temperature (float): Sampling temperature
+            max_tokens (int): Maximum tokens in the response
+            on_retry (callable): Called as on_retry(error, attempt, delay)
+            on_fallback (callable): Called as on_fallback(failed_backend, error, next_backend)
+
+        Yields:
+            str: Text chunks
+
+        Raises:
+            AllBackendsFailed: If no backend produced a response
+            LLMCallError: If the chosen backend failed mid-stream
+        """
+        candidates = self.ranked(messages, max_tokens)
+        errors = {}
+        self.fallbacks = 0
+        for index, backend in enumerate(candidates):
+            is_last = index == len(candidates) - 1
+            attempt_start = [0.0]
+
+            def open_stream():
+                attempt_start[0] = time.perf_counter()  # Retry sleeps are not latency
+                chunks = backend.stream(messages, temperature, max_tokens)
+                return chunks, next(chunks, None)
+
+            try:
+                chunks, first = call_with_retries(
+                    open_stream,
+                    breaker=get_circuit_breaker(backend.name),
+                    max_retries=backend.max_retries,
+                    on_retry=on_retry,
+                )
+            except LLMCallError as error:
+                if error.kind != "circuit_open":  # Nothing was sent - not new evidence
+                    backend_health(backend.name).record_failure(error)
+                errors[backend] = error
+                if not is_last:
+                    self.fallbacks += 1
+                    if on_fallback is not None:
+                        on_fallback(backend, error, candidates[index + 1])
+                continue
+
+            # Quota queueing is scored separately (queue_delay), so it is left out here
+            ttft = time.perf_counter() - attempt_start[0] - backend.last_wait
+            backend_health(backend.name).record_success(max(ttft, 0.0))
+            self.last_backend = backend
+            if first is None:
+                return  # Empty answer
+            yield first
+            try:
+                yield from chunks
+            except Exception as exc:
+                error = classify_error(exc)
+                backend_health(backend.name).record_failure(error)
+                raise error from exc
+            return
+
+        raise AllBackendsFailed([(backend.name, errors[backend])
+                                 for backend in self.backends if backend in errors])
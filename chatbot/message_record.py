@@ -0,0 +1,193 @@
+# =====================================================
+# 📌 COMPACT CHAT MESSAGE RECORDS
+# =====================================================
+# Every session keeps its messages in memory, and with many sessions per
+# process plain dicts add up: each one carries a hash table, an isoformat
+# timestamp string and its own copy of repeated texts. MessageRecord stores
+# the same information in __slots__: the role is an enum member, the
+# timestamp an epoch float, model names are interned, and message contents
+# are shared through a bounded pool so identical texts (the welcome message,
+# cached answers, "hi") exist once per process.
+#
+# Records are validated and normalized once, when they are created, so the
+# page no longer needs a clean-up pass over the history on every rerun. They
+# also answer msg["role"] / msg.get("error") like the dicts they replace, so
+# helpers shared with the other pages accept either.
+
+import collections
+import datetime
+import enum
+import os
+import sys
+import threading
+import time
+
+# Distinct message texts shared between sessions
+CONTENT_POOL_SIZE = int(os.getenv("CONTENT_POOL_SIZE", "4096"))
+
+# Bumped when the in-memory message format changes (old sessions are converted once)
+MESSAGE_FORMAT = 1
+
+
+class Role(str, enum.Enum):
+    """Author of a chat message"""
+
+    USER = "user"
+    ASSISTANT = "assistant"
+    SYSTEM = "system"
+
+
+class _ContentPool:
+    """Bounded LRU of message texts, so equal texts share one string object"""
+
+    def __init__(self, capacity=CONTENT_POOL_SIZE):
+        self.capacity = capacity
+        self._texts = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def share(self, text):
+        with self._lock:
+            shared = self._texts.get(text)
+            if shared is not None:
+                self._texts.move_to_end(text)
+                return shared
+            self._texts[text] = text
+            if len(self._texts) > self.capacity:
+                self._texts.popitem(last=False)
+            return text
+
+
+_content_pool = _ContentPool()
+
+
+def _normalize_content(content):
+    """Message text from a string, a LangChain message/response object or None"""
+    if isinstance(content, str):
+        return content
+    if hasattr(content, "content"):  # Response objects stored by older versions
+        return _normalize_content(content.content)
+    if content is None:
+        return ""
+    return str(content)
+
+
+def _normalize_timestamp(value):
+    """Epoch seconds from a float, an isoformat string, a datetime or None (now)"""
+    if value is None:
+        return time.time()
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, datetime.datetime):
+        return value.timestamp()
+    return datetime.datetime.fromisoformat(value).timestamp()
+
+
+class MessageRecord:
+    """
+    One chat message
+
+    Args:
+        role (Role | str): Message author
+        content (str): Message text (response objects are unwrapped)
+        timestamp (float | str): Epoch seconds or isoformat (default: now)
+        model (str): Model that produced an assistant answer
+        response_time (float): Seconds the answer took
+        cached (bool): Answer came from the response cache
+        error_kind (str): Set for error messages (rate_limit, timeout...)
+
+    Raises:
+        ValueError: For an unknown role or an unreadable timestamp
+    """
+
+    __slots__ = ("role", "content", "timestamp", "model", "response_time", "cached",
+                 "error_kind")
+
+    def __init__(self, role, content, timestamp=None, model=None, response_time=None,
+                 cached=False, error_kind=None):
+        self.role = Role(role)
+        self.content = _content_pool.share(_normalize_content(content))
+        self.timestamp = _normalize_timestamp(timestamp)
+        self.model = sys.intern(model) if model else None
+        self.response_time = float(response_time) if response_time is not None else None
+        self.cached = bool(cached)
+        self.error_kind = error_kind
+
+    @property
+    def error(self):
+        """True for error notices (shown in the chat, never sent to the model)"""
+        return self.error_kind is not None
+
+    @property
+    def iso_timestamp(self):
+        return datetime.datetime.fromtimestamp(self.timestamp).isoformat()
+
+    @classmethod
+    def from_dict(cls, message):
+        """
+        Build a record from a message dict (older sessions, stored or imported messages)
+
+        Args:
+            message (dict): "role", "content" and optional metadata
+
+        Returns:
+            MessageRecord: The validated record
+        """
+        if isinstance(message, cls):
+            return message
+        error_kind = message.get("error_kind") or ("unknown" if message.get("error") else None)
+        return cls(message["role"], message.get("content"), message.get("timestamp"),
+                   message.get("model"), message.get("response_time"),
+                   message.get("cached", False), error_kind)
+
+    def to_dict(self):
+        """Plain dict with only the fields that are set (for storage and export)"""
+        message = {"role": self.role.value, "content": self.content, "timestamp": self.timestamp}
+        if self.model is not None:
+            message["model"] = self.model
+        if self.response_time is not None:
+            message["response_time"] = self.response_time
+        if self.cached:
+            message["cached"] = True
+        if self.error_kind is not None:
+            message["error"] = True
+            message["error_kind"] = self.error_kind
+        return message
+
+    # Read access like the message dicts used elsewhere (msg["role"], msg.get("error"))
+    def get(self, key, default=None):
+        if key == "role":
+            return self.role.value
+        if key == "error":
+            return self.error
+        if key in self.__slots__:
+            return getattr(self, key)
+        return default
+
+    def __getitem__(self, key):
+        if key not in self.__slots__ and key != "error":
+            raise KeyError(key)
+        return self.get(key)
+
+    def __repr__(self):
+        preview = self.content if len(self.content) <= 40 else self.content[:37] + "..."
+        return f"MessageRecord({self.role.value}, {preview!r})"
+
+
+def upgrade_messages(messages):
+    """
+    Convert a session's message list to records (once, for sessions started by
+    an older version of the page)
+
+    Args:
+        messages (list): Message dicts and/or records
+
+    Returns:
+        list: Records; messages that cannot be read are dropped
+    """
+    records = []
+    for message in messages:
+        try:
+            records.append(MessageRecord.from_dict(message))
+        except (AttributeError, KeyError, TypeError, ValueError):
+            continue
+    return records
@@ -0,0 +1,347 @@
+# =====================================================
+# 📌 PROCESS-WIDE METRICS (PROMETHEUS TEXT FORMAT)
+# =====================================================
+# chat_analytics lives in one browser session and disappears with it. This
+# registry is shared by every session and every front-end running in the
+# process (chatbot.py, myollama.py, hgf.py, app.py) and, when METRICS_PORT is
+# set, served in the Prometheus text format on that side port at /metrics:
+#   - LLM requests, errors by kind, request duration and time-to-first-token
+#     histograms, input/output tokens per model
+#   - answers served from a cache
+#   - active sessions and page/fragment rerun durations
+#
+# Updates are lock-free: each thread writes to its own shard (plain dicts,
+# only ever touched by that thread), and a scrape merges the shards. The lock
+# is only taken when a thread writes its first sample and during a scrape.
+# Streamlit runs every script run in a new thread, so shards of finished
+# threads are folded into one "retired" shard instead of piling up.
+#
+# The front-end label is taken from the running script's file name.
+
+import bisect
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import streamlit as st
+
+from context_window import count_message_tokens, count_tokens
+from resilience import classify_error
+
+try:
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+except ImportError:  # Very old Streamlit: no session information
+    get_script_run_ctx = None
+
+logger = logging.getLogger(__name__)
+
+# Port of the /metrics endpoint (e.g. 9464; unset or "off" = no endpoint)
+METRICS_PORT = os.getenv("METRICS_PORT", "off")
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+
+# A session counts as active if it ran the page within this many seconds
+METRICS_SESSION_TTL = float(os.getenv("METRICS_SESSION_TTL", "300"))
+
+# Histogram buckets (seconds)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+RERUN_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# name -> (type, help text, histogram buckets)
+METRICS = {
+    "chatbot_llm_requests_total": (
+        "counter", "LLM answers completed", None),
+    "chatbot_llm_errors_total": (
+        "counter", "LLM requests that failed, by error kind", None),
+    "chatbot_llm_request_duration_seconds": (
+        "histogram", "Time from starting a request to the end of the answer (includes quota waits)",
+        LATENCY_BUCKETS),
+    "chatbot_llm_time_to_first_token_seconds": (
+        "histogram", "Time from starting a request to the first streamed token", LATENCY_BUCKETS),
+    "chatbot_llm_input_tokens_total": (
+        "counter", "Estimated prompt tokens sent", None),
+    "chatbot_llm_output_tokens_total": (
+        "counter", "Estimated tokens received", None),
+    "chatbot_cache_hits_total": (
+        "counter", "Answers served from a response or semantic cache", None),
+    "chatbot_active_sessions": (
+        "gauge", f"Sessions that ran a page in the last {METRICS_SESSION_TTL:.0f}s", None),
+    "chatbot_rerun_duration_seconds": (
+        "histogram", "Wall time of page and fragment script runs", RERUN_BUCKETS),
+}
+
+FULL_PAGE = "full page"
+
+
+class _Shard:
+    """Samples written by one thread"""
+
+    def __init__(self):
+        self.counters = {}    # (name, labels) -> value
+        self.histograms = {}  # (name, labels) -> [bucket counts..., +Inf count, sum]
+
+    def merge(self, other):
+        for key, value in other.counters.items():
+            self.counters[key] = self.counters.get(key, 0) + value
+        for key, values in other.histograms.items():
+            mine = self.histograms.get(key)
+            if mine is None:
+                self.histograms[key] = list(values)
+            else:
+                for i, value in enumerate(values):
+                    mine[i] += value
+
+
+def _format_value(value):
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _escape(value):
+    """Label value escaping required by the text format"""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels, extra=()):
+    pairs = [*labels, *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+class MetricsRegistry:
+    """
+    Counters and histograms shared by all sessions, with per-thread shards
+    """
+
+    def __init__(self, metrics=METRICS):
+        self.metrics = metrics
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards = []          # (thread, shard) for threads that wrote samples
+        self._retired = _Shard()   # Samples of threads that have finished
+        self._sessions = {}        # session id -> (front-end, last seen)
+
+    def _shard(self):
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = _Shard()
+            with self._lock:
+                self._retire_finished()
+                self._shards.append((threading.current_thread(), shard))
+        return shard
+
+    def _retire_finished(self):
+        """Fold shards of finished threads into the retired shard (lock held)"""
+        alive = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                alive.append((thread, shard))
+            else:
+                self._retired.merge(shard)
+        self._shards = alive
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    def inc(self, name, value=1, **labels):
+        """Add to a counter"""
+        counters = self._shard().counters
+        key = self._key(name, labels)
+        counters[key] = counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        """Record one histogram sample"""
+        histograms = self._shard().histograms
+        key = self._key(name, labels)
+        buckets = self.metrics[name][2]
+        values = histograms.get(key)
+        if values is None:
+            values = histograms[key] = [0] * (len(buckets) + 2)
+        values[bisect.bisect_left(buckets, value)] += 1
+        values[-1] += value
+
+    def touch_session(self, session_id, frontend):
+        """Mark a session as active (a single dict store, no lock)"""
+        self._sessions[session_id] = (frontend, time.time())
+
+    def active_sessions(self):
+        """Active session count per front-end (forgets sessions idle for too long)"""
+        cutoff = time.time() - METRICS_SESSION_TTL
+        counts = {}
+        for session_id, (frontend, seen) in list(self._sessions.items()):
+            if seen < cutoff:
+                self._sessions.pop(session_id, None)
+            else:
+                counts[frontend] = counts.get(frontend, 0) + 1
+        return counts
+
+    def snapshot(self):
+        """Merged counters and histograms of every thread"""
+        merged = _Shard()
+        with self._lock:
+            self._retire_finished()
+            merged.merge(self._retired)
+            shards = [shard for _, shard in self._shards]
+        for shard in shards:
+            # dict.copy() is atomic under the GIL; the owning thread may keep writing
+            live = _Shard()
+            live.counters = shard.counters.copy()
+            live.histograms = {key: list(values) for key, values in shard.histograms.copy().items()}
+            merged.merge(live)
+        return merged
+
+    def exposition(self):
+        """
+        All metrics in the Prometheus text exposition format (version 0.0.4)
+
+        Returns:
+            str: Text for a /metrics response
+        """
+        merged = self.snapshot()
+        sessions = self.active_sessions()
+        lines = []
+        for name, (kind, help_text, buckets) in self.metrics.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind == "counter":
+                for (metric, labels), value in sorted(merged.counters.items()):
+                    if metric == name:
+                        lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+            elif kind == "histogram":
+                for (metric, labels), values in sorted(merged.histograms.items()):
+                    if metric != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip((*buckets, "+Inf"), values[:-1]):
+                        cumulative += count
+                        le = bound if bound == "+Inf" else _format_value(bound)
+                        lines.append(f"{name}_bucket{_format_labels(labels, (('le', le),))} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(values[-1])}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+            elif name == "chatbot_active_sessions":
+                for frontend, count in sorted(sessions.items()):
+                    lines.append(f"{name}{_format_labels((('frontend', frontend),))} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def _serve(registry):
+    """Serve registry.exposition() on METRICS_HOST:METRICS_PORT from a daemon thread"""
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            body = registry.exposition().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):  # Keep scrapes out of the app log
+            pass
+
+    try:
+        server = ThreadingHTTPServer((METRICS_HOST, int(METRICS_PORT)), MetricsHandler)
+    except (OSError, ValueError) as e:
+        # Another process (e.g. a second front-end) already serves this port
+        logger.warning("Metrics endpoint not started on port %s: %s", METRICS_PORT, e)
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+@st.cache_resource(show_spinner=False)
+def get_metrics():
+    """Process-wide metrics registry (starts the /metrics endpoint once)"""
+    registry = MetricsRegistry()
+    if METRICS_PORT.lower() not in ("off", "none", "0", ""):
+        registry.server = _serve(registry)
+    return registry
+
+
+# =====================================================
+# 📌 HELPERS FOR THE FRONT-ENDS
+# =====================================================
+
+def current_frontend():
+    """Name of the running page script (chatbot, myollama, hgf, app)"""
+    ctx = get_script_run_ctx() if get_script_run_ctx else None
+    path = getattr(ctx, "main_script_path", None)
+    return Path(path).stem if path else "unknown"
+
+
+def track_page():
+    """
+    Call at the top of a page: marks this session as active
+
+    Returns:
+        float: perf_counter() start time for observe_rerun()
+    """
+    ctx = get_script_run_ctx() if get_script_run_ctx else None
+    if ctx is not None:
+        get_metrics().touch_session(ctx.session_id, current_frontend())
+    return time.perf_counter()
+
+
+def observe_rerun(seconds, scope=FULL_PAGE):
+    """Record the wall time of a page or fragment run"""
+    get_metrics().observe("chatbot_rerun_duration_seconds", seconds,
+                          frontend=current_frontend(), scope=scope)
+
+
+def record_cache_hit():
+    """Count an answer served from a cache instead of a model"""
+    get_metrics().inc("chatbot_cache_hits_total", frontend=current_frontend())
+
+
+def instrument_stream(chunks, router, messages=None, prompt_tokens=None):
+    """
+    Pass an LLM stream through unchanged while recording it in the registry
+
+    Records the request, its duration and time to first token, and the
+    estimated input/output tokens under the model that served it, or the
+    error kind if the stream fails.
+
+    Args:
+        chunks (iterator): Text chunks, e.g. router.stream(...)
+        router (LLMRouter): The router producing the stream (for the model label)
+        messages (list): Prompt messages (used to estimate prompt_tokens)
+        prompt_tokens (int): Prompt size if already known
+
+    Yields:
+        str: The chunks
+    """
+    registry = get_metrics()
+    frontend = current_frontend()
+    start = time.perf_counter()
+    first_token = None
+    parts = []
+    try:
+        for text in chunks:
+            if first_token is None:
+                first_token = time.perf_counter() - start
+            parts.append(text)
+            yield text
+    except Exception as exc:
+        registry.inc("chatbot_llm_errors_total", frontend=frontend, kind=classify_error(exc).kind)
+        raise
+    duration = time.perf_counter() - start
+
+    model = router.last_backend.label if router.last_backend is not None else "unknown"
+    if prompt_tokens is None and messages is not None:
+        prompt_tokens = sum(count_message_tokens(m.content, model) for m in messages)
+    registry.inc("chatbot_llm_requests_total", frontend=frontend, model=model)
+    registry.observe("chatbot_llm_request_duration_seconds", duration, frontend=frontend, model=model)
+    if first_token is not None:
+        registry.observe("chatbot_llm_time_to_first_token_seconds", first_token,
+                         frontend=frontend, model=model)
+    if prompt_tokens:
+        registry.inc("chatbot_llm_input_tokens_total", prompt_tokens, frontend=frontend, model=model)
+    registry.inc("chatbot_llm_output_tokens_total", count_tokens("".join(parts), model),
+                 frontend=frontend, model=model)
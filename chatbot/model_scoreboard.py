@@ -0,0 +1,234 @@
+# =====================================================
+# 📌 PERSISTENT PER-MODEL HEALTH SCOREBOARD
+# =====================================================
+# Free Hugging Face models come and go: one is cold for an hour, another is
+# overloaded. The scoreboard remembers, per model, how often it answered, how
+# fast its first token arrived (p50/p95) and when it last failed. Old evidence
+# decays with a half-life so a model that failed an hour ago gets another
+# chance. The HF backend re-sorts its candidates from this ranking on every
+# request. Scores are shared by all sessions and saved to disk, so a restart
+# does not forget which models are currently healthy.
+
+import json
+import math
+import os
+import threading
+import time
+from pathlib import Path
+
+import streamlit as st
+
+# Where the scoreboard is saved between restarts
+SCOREBOARD_PATH = Path(os.getenv(
+    "SCOREBOARD_PATH", Path(__file__).parent / ".cache" / "model_scoreboard.json"
+))
+
+# Evidence loses half its weight after this many seconds
+SCOREBOARD_HALF_LIFE = float(os.getenv("SCOREBOARD_HALF_LIFE", "3600"))
+
+# Assumed first-token latency of a model that has not answered yet (seconds)
+SCOREBOARD_DEFAULT_LATENCY = float(os.getenv("SCOREBOARD_DEFAULT_LATENCY", "2.0"))
+
+# Seconds added for a failure that just happened (decays with the half-life)
+SCOREBOARD_FAILURE_PENALTY = float(os.getenv("SCOREBOARD_FAILURE_PENALTY", "30"))
+
+# Latency samples kept per model for the percentiles
+SCOREBOARD_SAMPLES = 64
+
+# Save at most this often (seconds)
+SCOREBOARD_SAVE_INTERVAL = 5.0
+
+
+def percentile(values, fraction):
+    """
+    Nearest-rank percentile of a list of numbers
+
+    Args:
+        values (list): Numbers (unsorted)
+        fraction (float): 0.5 for the median, 0.95 for p95...
+
+    Returns:
+        float: The percentile, or None for an empty list
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(math.ceil(fraction * len(ordered)) - 1, 0)
+    return ordered[index]
+
+
+class ModelScore:
+    """
+    Decayed success/failure counts and recent first-token latencies for one model
+    """
+
+    def __init__(self):
+        self.successes = 0.0     # Decayed count of answered requests
+        self.failures = 0.0      # Decayed count of failed requests
+        self.updated = time.time()
+        self.latencies = []      # [timestamp, seconds] of recent successes
+        self.last_failure = None
+        self.last_error = None
+
+    def decay(self, now):
+        """Age the counts to `now`"""
+        factor = 0.5 ** (max(now - self.updated, 0.0) / SCOREBOARD_HALF_LIFE)
+        self.successes *= factor
+        self.failures *= factor
+        self.updated = now
+
+    @property
+    def success_rate(self):
+        # One imaginary success and failure keep unknown models in the middle
+        return (self.successes + 1) / (self.successes + self.failures + 2)
+
+    def latency(self, fraction):
+        return percentile([seconds for _, seconds in self.latencies], fraction)
+
+    def score(self, now):
+        """
+        Expected cost of trying this model first (lower is better)
+
+        Args:
+            now (float): Current time.time()
+
+        Returns:
+            float: Roughly the seconds until a usable first token
+        """
+        p50 = self.latency(0.5)
+        cost = (p50 if p50 is not None else SCOREBOARD_DEFAULT_LATENCY) / self.success_rate
+        if self.last_failure is not None:
+            age = max(now - self.last_failure, 0.0)
+            cost += SCOREBOARD_FAILURE_PENALTY * 0.5 ** (age / SCOREBOARD_HALF_LIFE)
+        return cost
+
+    def to_dict(self):
+        return dict(vars(self))
+
+    @classmethod
+    def from_dict(cls, data):
+        score = cls()
+        for name in vars(score):
+            if name in data:
+                setattr(score, name, data[name])
+        return score
+
+
+class ModelScoreboard:
+    """
+    Ranking of interchangeable models, shared by all sessions and saved to disk
+
+    Args:
+        path (Path): JSON file the scores are loaded from and saved to (None = memory only)
+    """
+
+    def __init__(self, path=SCOREBOARD_PATH):
+        self.path = Path(path) if path else None
+        self.scores = {}
+        self._lock = threading.Lock()
+        self._last_save = 0.0
+        self._load()
+
+    def _load(self):
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            data = json.loads(self.path.read_text())
+            self.scores = {model: ModelScore.from_dict(item) for model, item in data.items()}
+        except (OSError, ValueError, TypeError, AttributeError):
+            self.scores = {}  # Unreadable file - start fresh
+
+    def save(self, force=False):
+        """Write the scores to disk (atomically, at most every few seconds)"""
+        if self.path is None:
+            return
+        with self._lock:
+            now = time.time()
+            if not force and now - self._last_save < SCOREBOARD_SAVE_INTERVAL:
+                return
+            self._last_save = now
+            data = {model: score.to_dict() for model, score in self.scores.items()}
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temp = self.path.with_suffix(".tmp")
+            temp.write_text(json.dumps(data))
+            os.replace(temp, self.path)
+        except OSError:
+            pass  # Read-only deployments keep the in-memory scores
+
+    def record(self, model, error=None, latency=None):
+        """
+        Record the outcome of one request
+
+        Args:
+            model (str): Model id
+            error (Exception): The failure, or None if the model answered
+            latency (float): Seconds until the first token (successes only)
+        """
+        now = time.time()
+        with self._lock:
+            score = self.scores.setdefault(model, ModelScore())
+            score.decay(now)
+            if error is None:
+                score.successes += 1
+                if latency is not None:
+                    score.latencies = (score.latencies + [[now, latency]])[-SCOREBOARD_SAMPLES:]
+            else:
+                score.failures += 1
+                score.last_failure = now
+                score.last_error = getattr(error, "kind", None) or type(error).__name__
+        self.save()
+
+    def rank(self, models):
+        """
+        Sort models by current score (best first); ties keep the given order
+
+        Args:
+            models (list): Model ids in default preference order
+
+        Returns:
+            list: The same ids, re-ordered
+        """
+        now = time.time()
+        with self._lock:
+            costs = {}
+            for model in models:
+                score = self.scores.get(model) or ModelScore()  # Unknown = 50% success
+                score.decay(now)
+                costs[model] = score.score(now)
+        return sorted(models, key=lambda model: costs[model])
+
+    def table(self, models):
+        """
+        Rows describing the current ranking (for a debug panel)
+
+        Args:
+            models (list): Model ids to include
+
+        Returns:
+            list: Dicts with rank, model, score, success rate, p50, p95 and last failure
+        """
+        now = time.time()
+        rows = []
+        for rank, model in enumerate(self.rank(models), start=1):
+            with self._lock:
+                score = self.scores.get(model) or ModelScore()
+                p50, p95 = score.latency(0.5), score.latency(0.95)
+                failed = score.last_failure
+                rows.append({
+                    "rank": rank,
+                    "model": model,
+                    "score": round(score.score(now), 2),
+                    "success": f"{score.success_rate:.0%}",
+                    "p50 (s)": round(p50, 2) if p50 is not None else None,
+                    "p95 (s)": round(p95, 2) if p95 is not None else None,
+                    "last failure": (f"{(now - failed) / 60:.0f} min ago ({score.last_error})"
+                                     if failed else "never"),
+                })
+        return rows
+
+
+@st.cache_resource(show_spinner=False)
+def get_model_scoreboard():
+    """Process-wide scoreboard loaded from disk on first use"""
+    return ModelScoreboard()
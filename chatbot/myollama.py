@@ -1,16 +1,34 @@
 # =====================================================
 # 📌 Import Required Libraries
 # =====================================================
-from langchain.prompts import ChatPromptTemplate   # ✅ fixed import
-from langchain_core.output_parsers import StrOutputParser
-from langchain_community.llms import Ollama
-
+import collections
 import os
+import time
 import streamlit as st
 from dotenv import load_dotenv
 
+from llm_backends import OllamaBackend, fallback_backends
+from llm_router import LLMRouter
+from metrics_registry import instrument_stream, observe_rerun, record_cache_hit, track_page
+from ollama_client import OLLAMA_KEEP_ALIVE, get_ollama_warmer
+from prompt_cache import to_langchain_message
+from semantic_cache import SEMANTIC_CACHE_MAX_TEMPERATURE, get_semantic_cache, is_standalone
+from streaming import ThrottledMarkdownWriter
+from render_cache import install_code_styles, show_markdown
+
 load_dotenv()
 
+# Process-wide metrics: this session is active, and the page run is timed
+page_start = track_page()
+
+# Local model settings
+OLLAMA_MODEL = "llama3.2"
+OLLAMA_TEMPERATURE = 0.2
+OLLAMA_MAX_TOKENS = int(os.getenv("OLLAMA_MAX_TOKENS", "1024"))
+
+SYSTEM_PROMPT = ("You are CypherNova Chatbot, a friendly and helpful AI assistant. "
+                 "Always answer warmly and conversationally.")
+
 # =====================================================
 # 📌 Environment Variables (Optional Setup)
 # =====================================================
@@ -41,6 +59,47 @@ with st.sidebar:
         st.session_state.messages = []
         st.rerun()
 
+# Preload the model once per process and keep it resident (heartbeat runs in the background)
+warmer = get_ollama_warmer(OLLAMA_MODEL)
+
+# First-token latency of this session's newest answers, split by whether the model was loaded
+OLLAMA_LATENCY_SAMPLES = 100
+if "ollama_latency" not in st.session_state:
+    st.session_state.ollama_latency = {kind: collections.deque(maxlen=OLLAMA_LATENCY_SAMPLES)
+                                       for kind in ("cold", "warm")}
+
+with st.sidebar:
+    st.markdown("### 🔥 Model Warm-up")
+    warm_stats = warmer.snapshot()
+    if warm_stats["warmed"]:
+        st.caption(f"✅ {OLLAMA_MODEL} preloaded in {warm_stats['startup_seconds']:.2f}s "
+                   f"(load {warm_stats['startup_load']:.2f}s) · keep-alive {OLLAMA_KEEP_ALIVE} · "
+                   f"{warm_stats['heartbeats']} heartbeat(s)")
+    elif warm_stats["errors"]:
+        st.caption(f"⚠️ Ollama not reachable yet: {warm_stats['last_error']}")
+    else:
+        st.caption(f"⏳ Loading {OLLAMA_MODEL}...")
+
+    col1, col2 = st.columns(2)
+    for column, kind, label in ((col1, "cold", "Cold Start"), (col2, "warm", "Warm")):
+        samples = st.session_state.ollama_latency[kind]
+        with column:
+            st.metric(label, f"{sum(samples) / len(samples):.2f}s" if samples else "N/A",
+                      help=f"Average time to first token over {len(samples)} answer(s)")
+
+    # Last turn as timed by Ollama (prompt eval only covers tokens missing from its KV cache)
+    last_timings = st.session_state.get("ollama_timings")
+    if last_timings:
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("Prompt Eval", f"{last_timings['prompt_eval']:.2f}s",
+                      help=f"{last_timings['prompt_tokens']} prompt token(s) evaluated last turn")
+        with col2:
+            speed = (last_timings["eval_tokens"] / last_timings["eval"]
+                     if last_timings["eval"] else 0.0)
+            st.metric("Generation", f"{last_timings['eval']:.2f}s",
+                      help=f"{last_timings['eval_tokens']} token(s) at {speed:.0f} tok/s last turn")
+
 # Centered title & subtitle
 st.markdown(
     """
@@ -64,41 +123,83 @@ if "messages" not in st.session_state:
     ]
 
 # Display past messages (user + assistant)
+install_code_styles()
 for msg in st.session_state.messages:
     with st.chat_message(msg["role"]):
-        st.markdown(msg["content"])
+        show_markdown(msg["content"])  # Rendered to HTML once, then served from the cache
 
 # Chat input box
 if user_input := st.chat_input("Type your message here..."):
     # Add user message
     st.session_state.messages.append({"role": "user", "content": user_input})
     with st.chat_message("user"):
-        st.markdown(user_input)
-
-    # Create chatbot prompt dynamically with history
-    prompt = ChatPromptTemplate.from_messages(
-        [
-            ("system", "You are CypherNova Chatbot, a friendly and helpful AI assistant. "
-                       "Always answer warmly and conversationally."),
-            *[(m["role"], m["content"]) for m in st.session_state.messages if m["role"] != "system"]
-        ]
-    )
-
-    # LLM + chain
-    llm = Ollama(model="llama3.2", temperature=0.2)
-    output_parser = StrOutputParser()
-    chain = prompt | llm | output_parser
-
-    # Get response
-    response = chain.invoke({"Question": user_input})
+        show_markdown(user_input)
+
+    # Conversation as chat messages (no prompt template, so braces in user text are safe)
+    messages = [to_langchain_message("system", SYSTEM_PROMPT),
+                *[to_langchain_message(m["role"], m["content"])
+                  for m in st.session_state.messages if m["role"] != "system"]]
+
+    # Answer similar standalone questions from the local semantic cache
+    semantic_cache = get_semantic_cache()
+    semantic_namespace = f"ollama:{OLLAMA_MODEL}"
+    use_semantic = (is_standalone(st.session_state.messages)
+                    and OLLAMA_TEMPERATURE <= SEMANTIC_CACHE_MAX_TEMPERATURE)
+    response = None
+    if use_semantic:
+        response, _, lookup_seconds = semantic_cache.lookup(user_input, semantic_namespace)
+    cached = response is not None
 
     # Show response
     with st.chat_message("assistant"):
-        st.markdown(response)
+        placeholder = st.empty()
+        if not cached:
+            # Local Ollama first; other backends only if configured with LLM_FALLBACKS
+            # The system prompt and history never change once sent, so each request
+            # shares its prefix with the previous one and Ollama reuses its KV cache
+            ollama = OllamaBackend(OLLAMA_MODEL)
+            router = LLMRouter([ollama, *fallback_backends("ollama")])
+            writer = ThrottledMarkdownWriter(placeholder)
+            warm = warmer.expected_loaded()  # Cold = the model has to be loaded for this answer
+            warmer.touch()
+            start_time = time.perf_counter()
+            first_token_time = None
+            try:
+                for text in instrument_stream(
+                        router.stream(messages, OLLAMA_TEMPERATURE, OLLAMA_MAX_TOKENS),
+                        router, messages):
+                    if first_token_time is None:
+                        first_token_time = time.perf_counter() - start_time
+                    writer.write(text)
+            finally:
+                response = writer.close()
+            if use_semantic and router.last_backend is router.backends[0]:
+                semantic_cache.add(user_input, response, semantic_namespace)
+        else:
+            record_cache_hit()
+        show_markdown(response, placeholder)
+        if not cached and first_token_time is not None and router.last_backend is router.backends[0]:
+            warmer.mark_resident()  # The answer refreshed the model's keep-alive
+            st.session_state.ollama_latency["warm" if warm else "cold"].append(first_token_time)
+            timings = ollama.last_timings
+            details = ""
+            if timings:
+                # Ollama's own split: prompt evaluation (new tokens only) vs generation
+                st.session_state.ollama_timings = timings
+                details = (f" · prompt eval {timings['prompt_tokens']} tok in "
+                           f"{timings['prompt_eval']:.2f}s · generation {timings['eval_tokens']} tok in "
+                           f"{timings['eval']:.2f}s")
+            st.caption(f"{'🔥 Warm' if warm else '❄️ Cold start'} · "
+                       f"first token {first_token_time:.2f}s{details}")
+        if use_semantic:
+            st.caption(f"{'⚡ Cached answer · ' if cached else ''}"
+                       f"semantic lookup {lookup_seconds * 1000:.2f}ms")
 
     # Add response to history
     st.session_state.messages.append({"role": "assistant", "content": response})
 
+observe_rerun(time.perf_counter() - page_start)
+
 # redeploy fix
 
 # =====================================================
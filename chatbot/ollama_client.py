@@ -0,0 +1,293 @@
+# =====================================================
+# 📌 OLLAMA CHAT STREAMING, WARM-UP & KEEP-ALIVE
+# =====================================================
+# Ollama unloads an idle model after a few minutes; the next message then pays
+# the full load time (often several seconds for llama3.2). The warmer preloads
+# the model when the app starts (an empty prompt makes Ollama load the model
+# without generating anything), asks Ollama to keep it resident for
+# OLLAMA_KEEP_ALIVE, and runs a background heartbeat that re-sends the preload
+# while sessions are active so the model never goes cold mid-conversation.
+# Chat requests go straight to Ollama's native streaming /api/chat endpoint.
+# The server address is configurable, so everything can be exercised against
+# a local stub (see benchmarks/ollama_stub.py).
+
+import json
+import os
+import re
+import threading
+import time
+
+import httpx
+import streamlit as st
+
+from resilience import LLMCallError
+
+# Ollama server (point at a stub server for testing)
+OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434").rstrip("/")
+
+# How long Ollama keeps the model loaded after a request ("30m", "1h", seconds, or -1 = forever)
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+
+# Seconds between heartbeats while sessions are active
+OLLAMA_HEARTBEAT_INTERVAL = float(os.getenv("OLLAMA_HEARTBEAT_INTERVAL", "120"))
+
+# Stop the heartbeat after this many seconds without chat activity
+OLLAMA_ACTIVE_WINDOW = float(os.getenv("OLLAMA_ACTIVE_WINDOW", "900"))
+
+# Timeout for preload requests (loading a model from disk can be slow)
+OLLAMA_LOAD_TIMEOUT = float(os.getenv("OLLAMA_LOAD_TIMEOUT", "300"))
+
+# Context window requested from Ollama (unset = model default). Every request,
+# including the preload, must use the same value: a different num_ctx makes
+# Ollama reload the model and throw its KV cache away.
+OLLAMA_NUM_CTX = int(os.getenv("OLLAMA_NUM_CTX", "0")) or None
+
+# Chat roles for LangChain message types
+OLLAMA_ROLES = {"system": "system", "human": "user", "ai": "assistant"}
+
+
+def keep_alive_value(value=OLLAMA_KEEP_ALIVE):
+    """Ollama accepts durations ("30m") or plain seconds (number)"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def keep_alive_seconds(value=OLLAMA_KEEP_ALIVE):
+    """
+    Residency requested by a keep_alive value, in seconds
+
+    Args:
+        value (str or int): Duration ("30m", "1h", "90s"), seconds, or a negative number
+
+    Returns:
+        float: Seconds, or None for "keep loaded forever" (negative values)
+    """
+    match = re.fullmatch(r"(-?\d+(?:\.\d+)?)([smh]?)", str(value).strip())
+    if not match:
+        return 300.0  # Ollama's default: 5 minutes
+    number = float(match.group(1))
+    if number < 0:
+        return None
+    return number * {"": 1, "s": 1, "m": 60, "h": 3600}[match.group(2)]
+
+
+def model_options(**options):
+    """Per-request model options with the shared num_ctx (keeps the KV cache valid)"""
+    if OLLAMA_NUM_CTX:
+        options["num_ctx"] = OLLAMA_NUM_CTX
+    return options
+
+
+def ollama_timings(final):
+    """
+    Convert the timing fields of Ollama's final response chunk to seconds
+
+    Args:
+        final (dict): Last chunk of an /api/chat or /api/generate response
+
+    Returns:
+        dict: load, prompt_eval and eval seconds, prompt/eval token counts, total seconds
+    """
+    return {
+        "load": final.get("load_duration", 0) / 1e9,
+        "prompt_tokens": final.get("prompt_eval_count", 0),  # Only tokens not in the KV cache
+        "prompt_eval": final.get("prompt_eval_duration", 0) / 1e9,
+        "eval_tokens": final.get("eval_count", 0),
+        "eval": final.get("eval_duration", 0) / 1e9,
+        "total": final.get("total_duration", 0) / 1e9,
+    }
+
+
+@st.cache_resource(show_spinner=False)
+def get_ollama_http(base_url=OLLAMA_BASE_URL):
+    """Process-wide keep-alive HTTP client for an Ollama server"""
+    return httpx.Client(base_url=base_url,
+                        timeout=httpx.Timeout(OLLAMA_LOAD_TIMEOUT, connect=5.0))
+
+
+def stream_chat(model, messages, temperature, max_tokens, on_done=None, http=None):
+    """
+    Stream an answer from Ollama's native /api/chat endpoint
+
+    The messages are sent exactly as given, oldest first. As long as callers
+    only ever append to the conversation, every request starts with the same
+    prefix as the previous one and Ollama reuses its KV cache for it: only
+    the new turn has to be evaluated.
+
+    Args:
+        model (str): Ollama model tag
+        messages (list): LangChain messages, oldest first
+        temperature (float): Sampling temperature
+        max_tokens (int): Maximum tokens in the response
+        on_done (callable): Called with ollama_timings() of the finished response
+        http (httpx.Client): Client to use (default: the shared client)
+
+    Yields:
+        str: Text chunks
+    """
+    body = {
+        "model": model,
+        "messages": [{"role": OLLAMA_ROLES.get(m.type, "user"), "content": m.content}
+                     for m in messages],
+        "stream": True,
+        "keep_alive": keep_alive_value(),
+        "options": model_options(temperature=temperature, num_predict=max_tokens),
+    }
+    with (http or get_ollama_http()).stream("POST", "/api/chat", json=body) as response:
+        if response.is_error:
+            response.read()  # Ollama explains errors (e.g. unknown model) in the body
+            response.raise_for_status()
+        for line in response.iter_lines():
+            if not line:
+                continue
+            data = json.loads(line)
+            if data.get("error"):
+                raise LLMCallError(f"Ollama error: {data['error']}", kind="server")
+            text = (data.get("message") or {}).get("content")
+            if text:
+                yield text
+            if data.get("done") and on_done is not None:
+                on_done(ollama_timings(data))
+
+
+class OllamaWarmer:
+    """
+    Keep one Ollama model loaded while the app is in use
+
+    Args:
+        model (str): Ollama model tag
+        base_url (str): Ollama server address
+        keep_alive (str): Residency requested from Ollama after each request
+        heartbeat_interval (float): Seconds between keep-alive preloads
+        active_window (float): Heartbeat only while there was activity this recently
+    """
+
+    def __init__(self, model, base_url=OLLAMA_BASE_URL, keep_alive=OLLAMA_KEEP_ALIVE,
+                 heartbeat_interval=OLLAMA_HEARTBEAT_INTERVAL, active_window=OLLAMA_ACTIVE_WINDOW):
+        self.model = model
+        self.base_url = base_url.rstrip("/")
+        self.keep_alive = keep_alive_value(keep_alive)
+        self.heartbeat_interval = heartbeat_interval
+        self.active_window = active_window
+        self.http = get_ollama_http(self.base_url)  # Same connection pool as the chat requests
+        self.last_activity = time.time()
+        self.resident_until = 0.0  # Expected unload time after the last request (None = never)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.stats = {
+            "warmed": False,          # Startup preload finished
+            "startup_seconds": None,  # Wall time of the startup preload
+            "startup_load": None,     # Part of it spent loading the model (Ollama's load_duration)
+            "heartbeats": 0,
+            "last_heartbeat": None,
+            "errors": 0,
+            "last_error": None,
+        }
+
+    def preload(self):
+        """
+        Load the model (or refresh its keep-alive) with an empty prompt
+
+        Returns:
+            float: Seconds Ollama spent loading the model (0 if it was already resident)
+        """
+        response = self.http.post("/api/generate", json={
+            "model": self.model,
+            "prompt": "",
+            "keep_alive": self.keep_alive,
+            "options": model_options(),
+            "stream": False,
+        })
+        response.raise_for_status()
+        self.mark_resident()
+        return response.json().get("load_duration", 0) / 1e9  # Nanoseconds
+
+    def mark_resident(self):
+        """Record a successful request: Ollama keeps the model loaded for keep_alive from now"""
+        seconds = keep_alive_seconds(self.keep_alive)
+        with self._lock:
+            self.resident_until = None if seconds is None else time.time() + seconds
+
+    def expected_loaded(self):
+        """
+        Whether the model should be resident, judging by the last preload or answer
+        (no request to the server, so it is cheap enough to check before every answer)
+
+        Returns:
+            bool: True if a request within keep_alive kept the model loaded
+        """
+        with self._lock:
+            return self.resident_until is None or self.resident_until > time.time()
+
+    def touch(self):
+        """Mark chat activity, keeping the heartbeat running"""
+        with self._lock:
+            self.last_activity = time.time()
+
+    def _record_error(self, error):
+        with self._lock:
+            self.stats["errors"] += 1
+            self.stats["last_error"] = str(error)
+
+    def warm_up(self):
+        """Startup preload; failures are recorded, not raised (Ollama may start later)"""
+        start = time.perf_counter()
+        try:
+            load = self.preload()
+        except (httpx.HTTPError, ValueError) as e:
+            self._record_error(e)
+            return False
+        with self._lock:
+            self.stats["warmed"] = True
+            self.stats["startup_seconds"] = time.perf_counter() - start
+            self.stats["startup_load"] = load
+        return True
+
+    def _heartbeat_loop(self):
+        warmed = self.warm_up()
+        while not self._stop.wait(self.heartbeat_interval):
+            with self._lock:
+                active = time.time() - self.last_activity < self.active_window
+            if not active:
+                continue  # Let Ollama unload the model once nobody is chatting
+            start = time.perf_counter()
+            try:
+                load = self.preload()
+            except (httpx.HTTPError, ValueError) as e:
+                self._record_error(e)
+                continue
+            with self._lock:
+                self.stats["heartbeats"] += 1
+                self.stats["last_heartbeat"] = time.time()
+            if not warmed:
+                warmed = True
+                with self._lock:  # Ollama came up after startup: this was the warm-up
+                    self.stats["warmed"] = True
+                    self.stats["startup_seconds"] = time.perf_counter() - start
+                    self.stats["startup_load"] = load
+
+    def start(self):
+        """Run the startup warm-up and heartbeat on a daemon thread (idempotent)"""
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._heartbeat_loop, name=f"ollama-heartbeat-{self.model}", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def snapshot(self):
+        """Copy of the counters, safe to display while the heartbeat updates them"""
+        with self._lock:
+            return dict(self.stats)
+
+
+@st.cache_resource(show_spinner=False)
+def get_ollama_warmer(model):
+    """Process-wide warmer for a model, started on first use (i.e. at app startup)"""
+    return OllamaWarmer(model).start()
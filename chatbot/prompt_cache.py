@@ -0,0 +1,115 @@
+# =====================================================
+# 📌 INCREMENTAL PROMPT CACHE
+# =====================================================
+# Each chat message is normalized and converted to a LangChain message object
+# exactly once, when it is stored. Building the prompt for a new turn then
+# only needs the cached objects (and cached token counts) instead of walking,
+# re-escaping and re-templating the whole history every time.
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from context_window import count_message_tokens
+
+# Chat roles mapped to their LangChain message classes
+MESSAGE_CLASSES = {
+    "system": SystemMessage,
+    "user": HumanMessage,
+    "assistant": AIMessage,
+}
+
+
+def normalize_content(content):
+    """
+    Turn stored message content into plain text
+
+    Args:
+        content: A string, a LangChain response object or any other value
+
+    Returns:
+        str: Text content of the message
+    """
+    if isinstance(content, str):
+        return content
+    if hasattr(content, "content"):  # Response object from an older session
+        return content.content
+    return str(content)
+
+
+def to_langchain_message(role, content):
+    """
+    Convert a chat role and text into a LangChain message object
+
+    Args:
+        role (str): "system", "user" or "assistant"
+        content (str): Message text (no escaping needed - no template is involved)
+
+    Returns:
+        BaseMessage: SystemMessage, HumanMessage or AIMessage
+    """
+    return MESSAGE_CLASSES[role](content=content)
+
+
+class PromptCache:
+    """
+    Append-only mirror of the chat history as LangChain messages
+
+    Token counts are computed lazily per model and extended incrementally, so
+    each new turn only counts the messages added since the previous one.
+    """
+
+    def __init__(self):
+        self.messages = []        # LangChain message objects, oldest first
+        self.synced = 0           # Stored chat messages seen (including skipped ones)
+        self._token_counts = {}   # model_name -> list of per-message token counts
+
+    def __len__(self):
+        return len(self.messages)
+
+    def append(self, role, content, include=True):
+        """
+        Store one chat message
+
+        Args:
+            role (str): "user" or "assistant"
+            content: Message content (normalized to text here, once)
+            include (bool): False to only count the message (e.g. error messages,
+                which are displayed but never sent back to the model)
+
+        Returns:
+            BaseMessage: The cached LangChain message, or None if skipped
+        """
+        self.synced += 1
+        if not include:
+            return None
+        message = to_langchain_message(role, normalize_content(content))
+        self.messages.append(message)
+        return message
+
+    def token_counts(self, model_name):
+        """
+        Per-message token estimates for a model, aligned with self.messages
+
+        Args:
+            model_name (str): Groq model identifier
+
+        Returns:
+            list: Token count of each cached message
+        """
+        counts = self._token_counts.setdefault(model_name, [])
+        for message in self.messages[len(counts):]:
+            counts.append(count_message_tokens(message.content, model_name))
+        return counts
+
+    def rebuild(self, stored_messages):
+        """
+        Re-create the cache from stored chat messages (e.g. after a code upgrade)
+
+        Args:
+            stored_messages (list): Message dicts with "role" and "content"
+        """
+        self.messages = []
+        self.synced = 0
+        self._token_counts = {}
+        for msg in stored_messages:
+            include = msg["role"] in MESSAGE_CLASSES and not msg.get("error")
+            self.append(msg["role"], msg["content"], include=include)
@@ -0,0 +1,183 @@
+# =====================================================
+# 📌 CLIENT-SIDE GROQ RATE LIMITER
+# =====================================================
+# Groq's free tier allows 50 requests/minute and 10,000 tokens/minute per API
+# key. Every session in this process shares that key, so bursts from several
+# users quickly hit HTTP 429. DualTokenBucket enforces both limits before a
+# request is sent: one bucket for requests, one for tokens, both refilled
+# continuously. Waiting requests are served strictly first-in first-out so a
+# large request cannot be starved by a stream of small ones.
+
+import collections
+import itertools
+import os
+import threading
+import time
+
+import streamlit as st
+
+from resilience import LLMCallError
+
+# Free-tier limits (keep slightly below the real quota)
+GROQ_REQUESTS_PER_MINUTE = float(os.getenv("GROQ_REQUESTS_PER_MINUTE", "50"))
+GROQ_TOKENS_PER_MINUTE = float(os.getenv("GROQ_TOKENS_PER_MINUTE", "10000"))
+
+# Give up instead of waiting longer than this (seconds)
+RATE_LIMIT_MAX_WAIT = float(os.getenv("RATE_LIMIT_MAX_WAIT", "120"))
+
+
+class RateLimitTimeout(LLMCallError):
+    """Raised when a request would have to wait longer than the allowed time"""
+
+    def __init__(self, message, wait):
+        super().__init__(message, kind="quota", retry_after=wait)
+
+
+class DualTokenBucket:
+    """
+    Requests-per-minute and tokens-per-minute buckets with a fair FIFO queue
+
+    Args:
+        requests_per_minute (float): Request bucket capacity and refill rate
+        tokens_per_minute (float): Token bucket capacity and refill rate
+        clock (callable): Monotonic clock, replaceable for testing
+    """
+
+    def __init__(self, requests_per_minute=GROQ_REQUESTS_PER_MINUTE,
+                 tokens_per_minute=GROQ_TOKENS_PER_MINUTE, clock=time.monotonic):
+        self.request_capacity = requests_per_minute
+        self.token_capacity = tokens_per_minute
+        self.request_rate = requests_per_minute / 60.0  # Refill per second
+        self.token_rate = tokens_per_minute / 60.0
+        self.clock = clock
+
+        self._requests = requests_per_minute  # Start full
+        self._tokens = tokens_per_minute
+        self._updated = clock()
+        self._condition = threading.Condition()
+        self._queue = collections.deque()   # Tickets waiting, in arrival order
+        self._tickets = itertools.count()
+        self._costs = {}                    # ticket -> token cost
+        self.stats = {"granted": 0, "waited": 0, "timeouts": 0, "wait_seconds": 0.0}
+
+    def _refill(self):
+        """Add the tokens earned since the last update (caller holds the lock)"""
+        now = self.clock()
+        elapsed = now - self._updated
+        self._updated = now
+        self._requests = min(self.request_capacity, self._requests + elapsed * self.request_rate)
+        self._tokens = min(self.token_capacity, self._tokens + elapsed * self.token_rate)
+
+    def _cost(self, tokens):
+        """A request can never need more than a full bucket"""
+        return min(tokens, self.token_capacity)
+
+    def estimate_wait(self, tokens):
+        """
+        Estimate how long a new request would wait behind the current queue
+
+        Args:
+            tokens (int): Estimated tokens of the new request (prompt + max response)
+
+        Returns:
+            float: Seconds until it could be sent (0.0 if it can go now)
+        """
+        with self._condition:
+            self._refill()
+            needed_requests = 1 + len(self._queue)
+            needed_tokens = self._cost(tokens) + sum(self._costs[t] for t in self._queue)
+            request_wait = max(needed_requests - self._requests, 0) / self.request_rate
+            token_wait = max(needed_tokens - self._tokens, 0) / self.token_rate
+            return max(request_wait, token_wait)
+
+    def queue_length(self):
+        """Number of requests currently waiting"""
+        with self._condition:
+            return len(self._queue)
+
+    def acquire(self, tokens, timeout=RATE_LIMIT_MAX_WAIT, on_wait=None):
+        """
+        Block until one request and `tokens` tokens are available, in FIFO order
+
+        Args:
+            tokens (int): Estimated tokens of the request (prompt + max response)
+            timeout (float): Maximum seconds to wait
+            on_wait (callable): Called as on_wait(seconds_left, position) while queued
+
+        Returns:
+            float: Seconds spent waiting
+
+        Raises:
+            RateLimitTimeout: If the request could not be admitted within timeout
+        """
+        cost = self._cost(tokens)
+        start = self.clock()
+        with self._condition:
+            ticket = next(self._tickets)
+            self._queue.append(ticket)
+            self._costs[ticket] = cost
+            try:
+                while True:
+                    self._refill()
+                    if (self._queue[0] == ticket
+                            and self._requests >= 1 and self._tokens >= cost):
+                        self._requests -= 1
+                        self._tokens -= cost
+                        break
+
+                    # Time until this ticket could be served (everyone ahead goes first)
+                    position = self._queue.index(ticket)
+                    ahead = itertools.islice(self._queue, position + 1)
+                    needed_tokens = sum(self._costs[t] for t in ahead)
+                    wait = max(
+                        max(position + 1 - self._requests, 0) / self.request_rate,
+                        max(needed_tokens - self._tokens, 0) / self.token_rate,
+                    )
+                    remaining = timeout - (self.clock() - start)
+                    if wait > remaining:
+                        self.stats["timeouts"] += 1
+                        raise RateLimitTimeout(
+                            f"Rate limit queue is full - estimated wait {wait:.0f}s", wait
+                        )
+                    if on_wait is not None:
+                        # The callback redraws the page: other sessions must not
+                        # wait on it for estimate_wait() or refund()
+                        self._condition.release()
+                        try:
+                            on_wait(wait, position)
+                        finally:
+                            self._condition.acquire()
+                        self._refill()
+                        if (self._queue[0] == ticket
+                                and self._requests >= 1 and self._tokens >= cost):
+                            continue  # Admitted while the callback ran
+                    self._condition.wait(timeout=min(max(wait, 0.05), 1.0))
+            finally:
+                self._queue.remove(ticket)
+                self._costs.pop(ticket, None)
+                self._condition.notify_all()  # Next ticket may be at the head now
+
+        waited = self.clock() - start
+        self.stats["granted"] += 1
+        if waited > 0.01:
+            self.stats["waited"] += 1
+            self.stats["wait_seconds"] += waited
+        return waited
+
+    def refund(self, tokens):
+        """
+        Return unused tokens once the real usage is known
+
+        Args:
+            tokens (int): Tokens reserved but not consumed (may be negative to charge extra)
+        """
+        with self._condition:
+            self._refill()
+            self._tokens = min(self.token_capacity, self._tokens + tokens)
+            self._condition.notify_all()
+
+
+@st.cache_resource(show_spinner=False)
+def get_rate_limiter():
+    """Process-wide limiter shared by all sessions and every ChatGroq call"""
+    return DualTokenBucket()
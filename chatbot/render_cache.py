@@ -0,0 +1,184 @@
+# =====================================================
+# 📌 MEMOIZED MARKDOWN → SANITIZED HTML RENDERING
+# =====================================================
+# Stored chat messages never change, yet st.markdown ships the raw markdown
+# to the browser and it is parsed again on every rerun. Each message is
+# instead rendered to HTML once - when it is appended - with code blocks
+# highlighted by Pygments at the same step, sanitized, and kept in a bounded
+# LRU keyed by a hash of the content. Reruns just emit the cached fragment.
+# The cache is process-wide, so identical answers (e.g. the welcome message
+# or cached responses) are rendered once for every session.
+#
+# Markdown is parsed as CommonMark (plus GFM tables and strikethrough) like
+# st.markdown does, so lists right after a line of text and 2-space nested
+# lists render the same. Needs the optional `markdown-it-py` and `nh3`
+# packages; without them messages fall back to plain st.markdown. Code is
+# highlighted when `pygments` is installed.
+
+import collections
+import functools
+import hashlib
+import os
+import threading
+from html import escape
+
+import streamlit as st
+
+try:
+    import nh3
+    from markdown_it import MarkdownIt
+except ImportError:  # Optional - plain st.markdown is used instead
+    MarkdownIt = None
+    nh3 = None
+
+try:
+    from pygments import highlight
+    from pygments.formatters import HtmlFormatter
+    from pygments.lexers import TextLexer, get_lexer_by_name
+    from pygments.util import ClassNotFound
+except ImportError:  # Optional - code blocks are shown without highlighting
+    highlight = None
+
+# Rendered messages kept in memory (shared by all sessions)
+RENDER_CACHE_SIZE = int(os.getenv("RENDER_CACHE_SIZE", "2048"))
+
+# Pygments style for code blocks: it brings its own dark background, and the
+# theme stylesheets leave .codehilite colours alone, so it reads in both themes
+CODE_STYLE = os.getenv("CODE_STYLE", "monokai")
+
+# Tags and attributes allowed to reach the page (model output is untrusted)
+if nh3 is not None:
+    ALLOWED_ATTRIBUTES = {tag: set(attrs) for tag, attrs in nh3.ALLOWED_ATTRIBUTES.items()}
+    for tag in ("span", "div", "pre", "code"):
+        ALLOWED_ATTRIBUTES.setdefault(tag, set()).add("class")  # Pygments token classes
+
+
+def _render_code(self, tokens, idx, options, env):
+    """markdown-it rule for fenced and indented code: a Pygments .codehilite block"""
+    token = tokens[idx]
+    language = token.info.strip().split(maxsplit=1)[0] if token.info else ""
+    try:
+        lexer = get_lexer_by_name(language) if language else TextLexer()
+    except ClassNotFound:
+        lexer = TextLexer()
+    return highlight(token.content, lexer, HtmlFormatter(cssclass="codehilite"))
+
+
+@functools.lru_cache(maxsize=1)
+def markdown_parser():
+    """CommonMark parser with GFM tables and strikethrough (built once per process)"""
+    # Raw HTML in model output is shown as text, as st.markdown does
+    parser = MarkdownIt("commonmark", {"html": False}).enable(["table", "strikethrough"])
+    if highlight is not None:
+        parser.add_render_rule("fence", _render_code)
+        parser.add_render_rule("code_block", _render_code)
+    return parser
+
+
+def markdown_to_html(text):
+    """
+    Render markdown to sanitized HTML with highlighted code blocks
+
+    Args:
+        text (str): Message content (markdown)
+
+    Returns:
+        str: Safe HTML fragment
+    """
+    html = markdown_parser().render(text)
+    return nh3.clean(html, attributes=ALLOWED_ATTRIBUTES)
+
+
+@functools.lru_cache(maxsize=1)
+def code_stylesheet():
+    """Pygments CSS for .codehilite blocks (built once per process)"""
+    return (HtmlFormatter(style=CODE_STYLE).get_style_defs(".codehilite")
+            + "\n.codehilite { padding: 0.5em 1em; border-radius: 6px; overflow-x: auto; }")
+
+
+class RenderCache:
+    """
+    Bounded LRU of rendered HTML keyed by a hash of the markdown
+
+    Args:
+        capacity (int): Maximum number of rendered messages kept
+    """
+
+    def __init__(self, capacity=RENDER_CACHE_SIZE):
+        self.capacity = capacity
+        self._entries = collections.OrderedDict()  # content hash -> html
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    @staticmethod
+    def key(text):
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+    def render(self, text):
+        """
+        Return the HTML for a message, rendering it only the first time
+
+        Args:
+            text (str): Message content (markdown)
+
+        Returns:
+            str: Sanitized HTML, or None if the optional renderer is not installed
+        """
+        if MarkdownIt is None:
+            return None
+        key = self.key(text)
+        with self._lock:
+            html = self._entries.get(key)
+            if html is not None:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return html
+            self.stats["misses"] += 1
+        html = markdown_to_html(text)  # Outside the lock: other sessions keep going
+        with self._lock:
+            self._entries[key] = html
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+        return html
+
+    def __len__(self):
+        return len(self._entries)
+
+
+@st.cache_resource(show_spinner=False)
+def get_render_cache():
+    """Process-wide render cache shared by every page and session"""
+    return RenderCache()
+
+
+def _emit_html(container, html):
+    if hasattr(container, "html"):
+        container.html(html)
+    else:  # Streamlit < 1.33
+        container.markdown(html, unsafe_allow_html=True)
+
+
+def install_code_styles():
+    """Add the Pygments stylesheet used by the cached code blocks"""
+    if MarkdownIt is not None and highlight is not None:
+        _emit_html(st, f"<style>{code_stylesheet()}</style>")
+
+
+def show_markdown(text, container=None):
+    """
+    Display a message from the render cache (rendering it now if needed)
+
+    The markdown source travels along in a hidden .cn-source element, so the
+    copy buttons (chat_history.py) copy what was written, not the rendered text.
+
+    Args:
+        text (str): Message content (markdown)
+        container: Streamlit container or placeholder (default: current position)
+    """
+    container = container if container is not None else st
+    html = get_render_cache().render(text)
+    if html is None:
+        container.markdown(text)
+    else:
+        _emit_html(container, f'{html}<div class="cn-source" hidden>{escape(text)}</div>')
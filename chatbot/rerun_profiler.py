@@ -0,0 +1,138 @@
+# =====================================================
+# 📌 OPT-IN PROFILER FOR A SINGLE RERUN
+# =====================================================
+# Tracing spans show which phase of a run is slow; a profile shows why. With
+# PROFILER set, the "Rerun Timing" panel offers a button that profiles the
+# next full page run of this session only:
+#   - PROFILER=cprofile: cProfile, downloadable as a .prof file (pstats format,
+#     opens in snakeviz) with the top functions shown in the sidebar
+#   - PROFILER=pyinstrument: pyinstrument's HTML report, if it is installed
+#     (falls back to cProfile otherwise)
+# Nothing is profiled unless a session asks for it. The profiled run is the
+# page that streamlit_app.py runs inside profiled_run(), so the profiler is
+# stopped however that run ends (chatbot.py started on its own is never
+# profiled).
+
+import contextlib
+import cProfile
+import io
+import marshal
+import os
+import pstats
+import time
+
+import streamlit as st
+
+try:
+    from pyinstrument import Profiler as PyinstrumentProfiler
+except ImportError:  # Optional: cProfile is used instead
+    PyinstrumentProfiler = None
+
+# "cprofile", "pyinstrument" or "off" (no profiling controls)
+PROFILER = os.getenv("PROFILER", "off").lower()
+
+# Functions listed in the sidebar summary
+PROFILE_TOP = int(os.getenv("PROFILE_TOP", "25"))
+
+
+def profiler_enabled():
+    return PROFILER not in ("off", "none", "")
+
+
+def request_profile():
+    """Profile this session's next full page run"""
+    st.session_state.profile_next_run = True
+
+
+def start_profile():
+    """
+    Start profiling if this session asked for it
+
+    Returns:
+        Profiler object to pass to finish_profile(), or None
+    """
+    if not profiler_enabled() or not st.session_state.pop("profile_next_run", False):
+        return None
+    if PROFILER == "pyinstrument" and PyinstrumentProfiler is not None:
+        profiler = PyinstrumentProfiler()
+    else:
+        profiler = cProfile.Profile()
+    try:
+        if isinstance(profiler, cProfile.Profile):
+            profiler.enable()
+        else:
+            profiler.start()
+    except (RuntimeError, ValueError) as e:  # Another session is being profiled
+        st.session_state.profile_result = {"error": str(e)}
+        return None
+    return profiler
+
+
+def finish_profile(profiler):
+    """Stop the profiler and keep its report in the session for download"""
+    if profiler is None:
+        return
+    stamp = time.strftime("%Y%m%d_%H%M%S")
+    if isinstance(profiler, cProfile.Profile):
+        profiler.disable()
+        profiler.create_stats()
+        data = marshal.dumps(profiler.stats)  # Same bytes as Profile.dump_stats()
+        summary = io.StringIO()  # (pstats takes the stats over, so dump them first)
+        pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(PROFILE_TOP)
+        st.session_state.profile_result = {
+            "data": data,
+            "file_name": f"cyphernova_rerun_{stamp}.prof",
+            "mime": "application/octet-stream",
+            "summary": summary.getvalue(),
+        }
+    else:
+        profiler.stop()
+        st.session_state.profile_result = {
+            "data": profiler.output_html().encode("utf-8"),
+            "file_name": f"cyphernova_rerun_{stamp}.html",
+            "mime": "text/html",
+            "summary": profiler.output_text(),
+        }
+
+
+@contextlib.contextmanager
+def profiled_run():
+    """
+    Profile the enclosed page run if this session asked for it
+
+    The profiler is stopped even when the run ends early: st.rerun(),
+    st.stop() and errors unwind through here.
+    """
+    profiler = start_profile()
+    try:
+        yield
+    finally:
+        finish_profile(profiler)
+
+
+def show_profile_controls():
+    """Button that profiles the next full rerun (only with PROFILER set)"""
+    if not profiler_enabled():
+        return
+    if st.button("🔬 Profile Next Rerun", key="profile_rerun",
+                 help=f"Captures one full page run with {PROFILER}"):
+        request_profile()
+        st.rerun()  # Full page run, profiled
+
+
+def show_profile_result():
+    """Download button and summary for this session's last profile"""
+    result = st.session_state.get("profile_result")
+    if not profiler_enabled() or not result:
+        return
+    with st.expander("🔬 Rerun Profile", expanded=True):
+        if "error" in result:
+            st.warning(f"Profiler unavailable: {result['error']}")
+            return
+        st.download_button("Download Profile", data=result["data"],
+                           file_name=result["file_name"], mime=result["mime"],
+                           key="profile_download", on_click="ignore")
+        st.code(result["summary"], language=None)
+        if st.button("✖️ Dismiss", key="profile_dismiss"):
+            del st.session_state.profile_result
+            st.rerun()
@@ -0,0 +1,97 @@
+# =====================================================
+# 📌 RERUN TIMING (FULL PAGE vs FRAGMENT RERUNS)
+# =====================================================
+# Sidebar sections run as st.fragment: a widget inside one reruns only that
+# function instead of the whole page (chat history, prompt pipeline, router
+# construction...). timed_fragment() wraps st.fragment and records how long
+# each fragment-only rerun took; full page runs are recorded separately. The
+# newest entries are kept per session and shown in the sidebar, so it is easy
+# to see which part of the page an interaction actually re-executed. Every
+# run is also added to the process-wide rerun duration histogram.
+
+import collections
+import functools
+import os
+import time
+
+import streamlit as st
+
+from metrics_registry import FULL_PAGE, observe_rerun  # Process-wide rerun histogram
+from tracing import finish_trace, span, start_trace  # Fragment phases and fragment-only traces
+
+try:
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+except ImportError:  # Very old Streamlit: every run is a full page run
+    get_script_run_ctx = None
+
+# Recent runs kept per session for the timing panel
+RERUN_LOG_SIZE = int(os.getenv("RERUN_LOG_SIZE", "15"))
+
+# st.fragment (Streamlit >= 1.37) or its experimental predecessor
+_fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
+
+
+def rerun_log():
+    """Newest runs of this session, oldest first (dicts with scope, ms, at)"""
+    if "rerun_log" not in st.session_state:
+        st.session_state.rerun_log = collections.deque(maxlen=RERUN_LOG_SIZE)
+    return st.session_state.rerun_log
+
+
+def record_run(scope, seconds):
+    """
+    Add a finished run to this session's log
+
+    Args:
+        scope (str): FULL_PAGE or the fragment name
+        seconds (float): Wall time of the run
+    """
+    rerun_log().append({"scope": scope, "ms": seconds * 1000, "at": time.time()})
+    observe_rerun(seconds, scope)
+
+
+def is_fragment_rerun():
+    """True while Streamlit is rerunning only fragments, not the whole page"""
+    ctx = get_script_run_ctx() if get_script_run_ctx else None
+    return bool(ctx and getattr(ctx, "fragment_ids_this_run", None))
+
+
+def timed_fragment(name):
+    """
+    Decorator: run the function as an st.fragment and time its own reruns
+
+    Runs that are part of a full page run are not recorded separately (they
+    are included in the page time, as a span of its trace); fragment-only
+    reruns get a trace of their own. Without fragment support the function is
+    simply called on every page run, as before.
+
+    Args:
+        name (str): Label shown in the timing panel
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            if not is_fragment_rerun():
+                with span(name):  # A phase of the page run's trace
+                    return func(*args, **kwargs)
+            start = time.perf_counter()
+            start_trace(name)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record_run(name, time.perf_counter() - start)
+                finish_trace()
+        return _fragment(timed) if _fragment else timed
+    return decorator
+
+
+def show_rerun_log(limit=8):
+    """Render the newest runs, most recent first"""
+    entries = list(rerun_log())[-limit:]
+    if not entries:
+        st.caption("No runs recorded yet")
+        return
+    now = time.time()
+    lines = [f"- **{e['scope']}** {e['ms']:.1f} ms · {now - e['at']:.0f}s ago"
+             for e in reversed(entries)]
+    st.markdown("\n".join(lines))
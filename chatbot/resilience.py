@@ -0,0 +1,322 @@
+# =====================================================
+# 📌 RETRIES, BACKOFF & CIRCUIT BREAKER FOR LLM CALLS
+# =====================================================
+# Transient failures (HTTP 429, 5xx, timeouts, dropped connections) are
+# retried with exponential backoff and full jitter, honoring the server's
+# Retry-After header when present (a Retry-After longer than LLM_BACKOFF_MAX
+# fails fast instead, so the page never sleeps for minutes). A circuit breaker
+# per model stops sending requests while the provider is degraded, so users
+# get an immediate answer instead of waiting through every retry. Errors are
+# classified into a small set of kinds so the UI can show a helpful message.
+#
+# benchmarks/groq_stub.py is a local fake Groq server for exercising all of
+# this (see benchmarks/bench_resilience.py).
+
+import email.utils
+import os
+import random
+import threading
+import time
+
+import httpx
+import streamlit as st
+
+# Retry policy
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))   # Seconds before the 1st retry
+LLM_BACKOFF_MAX = float(os.getenv("LLM_BACKOFF_MAX", "20"))      # Longest single wait
+
+# Circuit breaker policy
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_TIMEOUT = float(os.getenv("BREAKER_RESET_TIMEOUT", "30"))
+
+# Error kinds that are worth retrying
+RETRYABLE_KINDS = {"rate_limit", "server", "timeout", "connection"}
+
+
+class LLMCallError(Exception):
+    """
+    A failed LLM call, classified for retrying and for the user message
+
+    Attributes:
+        kind (str): rate_limit, server, timeout, connection, client, circuit_open,
+            quota (client-side rate limit queue full) or unknown
+        retry_after (float): Server-requested delay in seconds, if any
+        status_code (int): HTTP status code, if any
+    """
+
+    def __init__(self, message, kind="unknown", retry_after=None, status_code=None):
+        super().__init__(message)
+        self.kind = kind
+        self.retry_after = retry_after
+        self.status_code = status_code
+
+    @property
+    def retryable(self):
+        return self.kind in RETRYABLE_KINDS
+
+
+class CircuitOpenError(LLMCallError):
+    """Raised without calling the provider while its circuit breaker is open"""
+
+    def __init__(self, name, retry_in):
+        super().__init__(f"{name} is temporarily unavailable", kind="circuit_open",
+                         retry_after=retry_in)
+        self.name = name
+
+
+def parse_retry_after(value):
+    """
+    Parse a Retry-After header (delta seconds or HTTP date)
+
+    Args:
+        value (str): Header value
+
+    Returns:
+        float: Seconds to wait, or None if missing or malformed
+    """
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(when.timestamp() - time.time(), 0.0)
+
+
+def classify_error(exc):
+    """
+    Convert any exception from an LLM client into an LLMCallError
+
+    Works with the Groq/OpenAI SDK error classes (status_code / response
+    attributes), httpx errors and built-in timeouts without importing the SDKs.
+
+    Args:
+        exc (Exception): Exception raised by the client
+
+    Returns:
+        LLMCallError: Classified error (exc itself if already classified)
+    """
+    if isinstance(exc, LLMCallError):
+        return exc
+
+    response = getattr(exc, "response", None)
+    status = getattr(exc, "status_code", None) or getattr(response, "status_code", None)
+    headers = getattr(response, "headers", None) or {}
+    retry_after = parse_retry_after(headers.get("retry-after"))
+    name = type(exc).__name__
+
+    if status == 429:
+        kind = "rate_limit"
+    elif status is not None and status >= 500:
+        kind = "server"
+    elif status is not None:
+        kind = "client"
+    elif isinstance(exc, (TimeoutError, httpx.TimeoutException)) or "Timeout" in name:
+        kind = "timeout"
+    elif isinstance(exc, (ConnectionError, httpx.TransportError)) or "Connection" in name:
+        kind = "connection"
+    else:
+        kind = "unknown"
+
+    error = LLMCallError(str(exc) or name, kind=kind, retry_after=retry_after, status_code=status)
+    error.__cause__ = exc
+    return error
+
+
+def backoff_delay(attempt, retry_after=None, base=LLM_BACKOFF_BASE, cap=LLM_BACKOFF_MAX):
+    """
+    Exponential backoff with full jitter, never shorter than Retry-After
+
+    Args:
+        attempt (int): Retry number starting at 0
+        retry_after (float): Server-requested delay, if any
+        base (float): Delay scale for the first retry
+        cap (float): Maximum delay, including a requested Retry-After
+
+    Returns:
+        float: Seconds to sleep before the next attempt
+    """
+    delay = random.uniform(0, min(cap, base * (2 ** attempt)))
+    if retry_after is not None:
+        delay = min(max(delay, retry_after), cap)
+    return delay
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after repeated failures -> half-open trial -> closed
+
+    Args:
+        name (str): Provider/model name shown in errors
+        failure_threshold (int): Consecutive failures that open the circuit
+        reset_timeout (float): Seconds to stay open before allowing a trial request
+        clock (callable): Monotonic clock, replaceable for testing
+    """
+
+    def __init__(self, name, failure_threshold=BREAKER_FAILURE_THRESHOLD,
+                 reset_timeout=BREAKER_RESET_TIMEOUT, clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return "closed"
+        if self.clock() - self._opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def before_call(self):
+        """
+        Check that a request may be sent
+
+        Raises:
+            CircuitOpenError: While open, or while another half-open trial is running
+        """
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return
+            if state == "half_open" and not self._trial_running:
+                self._trial_running = True  # Let exactly one request probe the provider
+                return
+            retry_in = max(self.reset_timeout - (self.clock() - self._opened_at), 0.0)
+            raise CircuitOpenError(self.name, retry_in)
+
+    def release_trial(self):
+        """Give up a half-open trial without a verdict (the call was abandoned)"""
+        with self._lock:
+            self._trial_running = False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = self.clock()  # (Re)open the circuit
+
+
+@st.cache_resource(show_spinner=False)
+def get_circuit_breakers():
+    """Process-wide circuit breakers keyed by provider/model name"""
+    return {}
+
+
+def get_circuit_breaker(name):
+    """
+    Get the shared circuit breaker for a provider/model
+
+    Args:
+        name (str): e.g. "groq:llama-3.1-8b-instant"
+
+    Returns:
+        CircuitBreaker: Breaker shared by all sessions
+    """
+    breakers = get_circuit_breakers()
+    breaker = breakers.get(name)
+    if breaker is None:
+        breaker = breakers.setdefault(name, CircuitBreaker(name))
+    return breaker
+
+
+def call_with_retries(fn, breaker=None, max_retries=LLM_MAX_RETRIES, can_retry=None,
+                      on_retry=None, sleep=time.sleep):
+    """
+    Run fn() with retries on transient errors, guarded by a circuit breaker
+
+    Args:
+        fn (callable): The LLM call
+        breaker (CircuitBreaker): Breaker for this provider/model, if any
+        max_retries (int): Retries after the first attempt
+        can_retry (callable): Extra check called with the original exception,
+            e.g. "no tokens were streamed yet"
+        on_retry (callable): Called as on_retry(error, attempt, delay) before sleeping
+        sleep (callable): Sleep function, replaceable for testing
+
+    Returns:
+        Whatever fn() returns
+
+    Raises:
+        LLMCallError: Classified error once retries are exhausted or not allowed
+    """
+    attempt = 0
+    while True:
+        if breaker is not None:
+            breaker.before_call()
+        try:
+            result = fn()
+        except Exception as exc:
+            error = classify_error(exc)
+            if breaker is not None:
+                if error.kind == "client":
+                    breaker.record_success()  # A 4xx answer means the provider is up
+                else:
+                    breaker.record_failure()
+            if (not error.retryable or attempt >= max_retries
+                    or (error.retry_after or 0.0) > LLM_BACKOFF_MAX  # Not worth blocking the page
+                    or (can_retry is not None and not can_retry(exc))):
+                raise error from exc
+            delay = backoff_delay(attempt, error.retry_after)
+            if on_retry is not None:
+                on_retry(error, attempt + 1, delay)
+            sleep(delay)
+            attempt += 1
+            continue
+        except BaseException:
+            # Streamlit's rerun/stop signals (e.g. raised by a quota-wait redraw)
+            # abandon the call: a half-open trial must not stay claimed forever
+            if breaker is not None:
+                breaker.release_trial()
+            raise
+        if breaker is not None:
+            breaker.record_success()
+        return result
+
+
+def user_message(error, model_name):
+    """
+    Friendly chat message for a classified error
+
+    Args:
+        error (LLMCallError): Classified error
+        model_name (str): Model shown to the user
+
+    Returns:
+        str: Message for the chat window
+    """
+    if error.kind == "circuit_open":
+        return (f"🚧 {model_name} is temporarily unavailable - the provider looks degraded. "
+                f"Try another model or wait about {error.retry_after:.0f}s.")
+    if error.kind == "quota":
+        return (f"⏳ Too many requests are queued for the free-tier quota right now "
+                f"(about {error.retry_after:.0f}s wait). Please try again shortly.")
+    if error.kind == "rate_limit":
+        return f"⏳ {model_name} is rate limiting requests right now. Please try again in a few seconds."
+    if error.kind == "timeout":
+        return f"⌛ The request to {model_name} timed out. Please try again."
+    if error.kind == "connection":
+        return f"📡 Could not reach {model_name}. Please check the connection and try again."
+    if error.kind == "server":
+        return f"❌ {model_name} returned a server error. Please try again shortly."
+    return f"❌ Sorry, I encountered an error: {error}"
@@ -0,0 +1,186 @@
+# =====================================================
+# 📌 EXACT-MATCH RESPONSE CACHE
+# =====================================================
+# Many users send exactly the same prompt (onboarding questions, "what can
+# you do?"). For low-temperature requests the answer is effectively
+# deterministic, so it can be served from cache instead of spending a Groq
+# round trip and quota. Two tiers:
+#   1. In-memory LRU (per process, shared by all sessions)
+#   2. On-disk SQLite with TTL and total-size eviction (survives restarts)
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import streamlit as st
+
+# Only cache requests at or below this temperature
+RESPONSE_CACHE_MAX_TEMPERATURE = float(os.getenv("RESPONSE_CACHE_MAX_TEMPERATURE", "0.3"))
+
+# Disk tier location, lifetime and size limit
+RESPONSE_CACHE_PATH = os.getenv(
+    "RESPONSE_CACHE_PATH", str(Path(__file__).parent / ".cache" / "responses.sqlite3")
+)
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", str(7 * 24 * 3600)))  # 7 days
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+
+# Number of entries kept in the in-memory LRU tier
+RESPONSE_CACHE_MEMORY_ENTRIES = int(os.getenv("RESPONSE_CACHE_MEMORY_ENTRIES", "512"))
+
+
+def normalize_text(text):
+    """Collapse whitespace and case so trivially different prompts share an entry"""
+    return " ".join(text.split()).casefold()
+
+
+def make_cache_key(messages, model_name, temperature, max_tokens):
+    """
+    Build the cache key for a request
+
+    Args:
+        messages (list): LangChain messages exactly as they will be sent
+        model_name (str): Groq model identifier
+        temperature (float): Sampling temperature
+        max_tokens (int): Maximum tokens in the response
+
+    Returns:
+        str: SHA-256 hex digest identifying the request
+    """
+    payload = {
+        "messages": [(m.type, normalize_text(m.content)) for m in messages],
+        "model": model_name,
+        "temperature": round(float(temperature), 2),
+        "max_tokens": int(max_tokens),
+    }
+    encoded = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class ResponseCache:
+    """
+    Two-tier (memory LRU + SQLite) cache of model responses
+
+    Args:
+        db_path (str): SQLite database file for the disk tier
+        memory_entries (int): Maximum entries in the in-memory LRU
+        ttl (float): Seconds before an entry expires
+        max_bytes (int): Maximum total size of cached responses on disk
+    """
+
+    def __init__(self, db_path=RESPONSE_CACHE_PATH, memory_entries=RESPONSE_CACHE_MEMORY_ENTRIES,
+                 ttl=RESPONSE_CACHE_TTL, max_bytes=RESPONSE_CACHE_MAX_BYTES):
+        self.memory_entries = memory_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()  # key -> (response, created)
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, response TEXT NOT NULL, model TEXT,"
+            " created REAL NOT NULL, accessed REAL NOT NULL, size INTEGER NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        self._db.commit()
+
+    def get(self, key):
+        """
+        Look up a cached response
+
+        Args:
+            key (str): Key from make_cache_key()
+
+        Returns:
+            str: Cached response, or None on a miss
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and now - entry[1] < self.ttl:
+                self._memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return entry[0]
+
+            row = self._db.execute(
+                "SELECT response, created FROM responses WHERE key = ? AND created > ?",
+                (key, now - self.ttl),
+            ).fetchone()
+            if row is None:
+                self._memory.pop(key, None)  # Expired in memory too
+                self.stats["misses"] += 1
+                return None
+
+            self._db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self._db.commit()
+            self._remember(key, row[0], row[1])
+            self.stats["disk_hits"] += 1
+            return row[0]
+
+    def put(self, key, response, model_name=None):
+        """
+        Store a response in both tiers and evict expired / oversized entries
+
+        Args:
+            key (str): Key from make_cache_key()
+            response (str): Model response to cache
+            model_name (str): Model that produced it (for inspection only)
+        """
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        with self._lock:
+            self._remember(key, response, now)
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, response, model, created, accessed, size)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, response, model_name, now, now, size),
+            )
+            self._evict(now)
+            self._db.commit()
+
+    def _remember(self, key, response, created):
+        """Insert into the memory LRU, dropping the least recently used entry if full"""
+        self._memory[key] = (response, created)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict(self, now):
+        """Delete expired rows, then least recently used rows until under max_bytes"""
+        expired = self._db.execute(
+            "DELETE FROM responses WHERE created <= ?", (now - self.ttl,)
+        ).rowcount
+        self.stats["evictions"] += max(expired, 0)
+
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._db.execute("SELECT key, size FROM responses ORDER BY accessed").fetchall()
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._memory.pop(key, None)
+            total -= size
+            self.stats["evictions"] += 1
+
+    def hit_rate(self):
+        """Fraction of lookups served from either tier (0.0 when unused)"""
+        with self._lock:
+            hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+            lookups = hits + self.stats["misses"]
+        return hits / lookups if lookups else 0.0
+
+
+@st.cache_resource(show_spinner=False)
+def get_response_cache():
+    """Process-wide response cache shared by every Streamlit session"""
+    return ResponseCache()
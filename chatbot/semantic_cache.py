@@ -0,0 +1,214 @@
+# =====================================================
+# 📌 LOCAL SEMANTIC RESPONSE CACHE
+# =====================================================
+# Answers near-duplicate questions ("what can you do?" vs "What can you do
+# for me?") from cache. Questions are embedded on the CPU with a signed
+# hashing vectorizer (word unigrams + bigrams + character trigrams), kept in
+# a preallocated NumPy matrix, and matched with a single cosine-similarity
+# matrix-vector product. Memory is bounded by a fixed capacity; the least
+# recently used entry is overwritten when full.
+#
+# The embedding is lexical, not semantic: "world cup 2018" and "world cup
+# 2014" or "is it safe" and "is it not safe" look almost the same to it. So
+# politeness filler is dropped before embedding, a hit needs near-identical
+# wording (SEMANTIC_CACHE_THRESHOLD), and the numbers and negations of both
+# questions must match exactly.
+#
+# Only standalone questions (no earlier user turn in the conversation) are
+# looked up, because a follow-up like "and in Python?" means something
+# different in every conversation.
+
+import os
+import re
+import threading
+import time
+import zlib
+
+import numpy as np
+import streamlit as st
+
+# Embedding size (hash buckets) and maximum number of cached questions
+SEMANTIC_CACHE_DIM = int(os.getenv("SEMANTIC_CACHE_DIM", "1024"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "4096"))
+
+# Cosine similarity needed to reuse an answer
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+
+# Only reuse answers for requests at or below this temperature (same as the exact cache)
+SEMANTIC_CACHE_MAX_TEMPERATURE = float(os.getenv("SEMANTIC_CACHE_MAX_TEMPERATURE", "0.3"))
+
+WORD_PATTERN = re.compile(r"\w+")
+
+# Words that do not change what is being asked
+FILLER_PATTERN = re.compile(
+    r"\b(?:please|pls|kindly|thanks|thank you|hi|hello|hey|for me|to me)\b")
+
+# Tokens that flip or pin down the meaning: they must match for a hit
+NUMBER_PATTERN = re.compile(r"\d+(?:[.,]\d+)*")
+NEGATIONS = frozenset({"not", "no", "never", "none", "nothing", "nor", "without", "cannot"})
+
+
+def normalize(text):
+    """Casefolded words of a question without filler ("n't" becomes "not")"""
+    text = FILLER_PATTERN.sub(" ", text.casefold().replace("n't", " not"))
+    return WORD_PATTERN.findall(text)
+
+
+def guard_key(words):
+    """
+    Numbers and negations of a question, in order, as one hashable key
+
+    Args:
+        words (list): Words from normalize()
+
+    Returns:
+        int: CRC32 of the guard tokens (questions only match with equal keys)
+    """
+    guards = [("not" if w in NEGATIONS else w) for w in words
+              if w in NEGATIONS or NUMBER_PATTERN.fullmatch(w)]
+    return zlib.crc32(" ".join(guards).encode("utf-8"))
+
+
+def embed(text, dim=SEMANTIC_CACHE_DIM, words=None):
+    """
+    Embed text with a signed hashing vectorizer
+
+    Args:
+        text (str): Question to embed
+        dim (int): Number of hash buckets
+        words (list): Words from normalize(text), if already computed
+
+    Returns:
+        numpy.ndarray: L2-normalized float32 vector (all zeros for empty text)
+    """
+    if words is None:
+        words = normalize(text)
+    features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    joined = " ".join(words)
+    features += [f"#{joined[i:i + 3]}" for i in range(len(joined) - 2)]
+
+    vector = np.zeros(dim, dtype=np.float32)
+    for feature in features:
+        h = zlib.crc32(feature.encode("utf-8"))
+        vector[h % dim] += 1.0 if (h >> 31) & 1 else -1.0
+
+    norm = np.linalg.norm(vector)
+    if norm:
+        vector /= norm
+    return vector
+
+
+class SemanticCache:
+    """
+    Fixed-capacity nearest-neighbour cache of question -> answer
+
+    Args:
+        capacity (int): Maximum number of cached questions
+        dim (int): Embedding size
+        threshold (float): Minimum cosine similarity for a hit
+    """
+
+    def __init__(self, capacity=SEMANTIC_CACHE_MAX_ENTRIES, dim=SEMANTIC_CACHE_DIM,
+                 threshold=SEMANTIC_CACHE_THRESHOLD):
+        self.capacity = capacity
+        self.dim = dim
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self._namespaces = np.full(capacity, -1, dtype=np.int32)  # -1 marks an empty slot
+        self._guards = np.zeros(capacity, dtype=np.uint32)  # guard_key() of each question
+        self._last_used = np.zeros(capacity, dtype=np.float64)
+        self._answers = [None] * capacity
+        self._namespace_ids = {}
+        self._size = 0
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0,
+                      "lookups": 0, "lookup_seconds": 0.0, "last_lookup_seconds": 0.0}
+
+    def _namespace_id(self, namespace):
+        return self._namespace_ids.setdefault(namespace, len(self._namespace_ids))
+
+    def lookup(self, question, namespace):
+        """
+        Find a cached answer for a similar question
+
+        Args:
+            question (str): User question
+            namespace (str): Front-end/model the answer must come from (e.g. "groq:gemma2-9b-it")
+
+        Returns:
+            tuple: (answer or None, best similarity, lookup seconds)
+        """
+        start = time.perf_counter()
+        words = normalize(question)
+        query = embed(question, self.dim, words)
+        guard = guard_key(words)
+        with self._lock:
+            answer, best = None, 0.0
+            if self._size and query.any():
+                scores = self._vectors[:self._size] @ query  # Cosine (rows are normalized)
+                scores[(self._namespaces[:self._size] != self._namespace_id(namespace))
+                       | (self._guards[:self._size] != guard)] = -1.0
+                index = int(np.argmax(scores))
+                best = float(scores[index])
+                if best >= self.threshold:
+                    answer = self._answers[index]
+                    self._last_used[index] = time.time()
+
+            elapsed = time.perf_counter() - start
+            self.stats["hits" if answer is not None else "misses"] += 1
+            self.stats["lookups"] += 1
+            self.stats["lookup_seconds"] += elapsed
+            self.stats["last_lookup_seconds"] = elapsed
+        return answer, best, elapsed
+
+    def add(self, question, answer, namespace):
+        """
+        Cache an answer, overwriting the least recently used slot when full
+
+        Args:
+            question (str): User question
+            answer (str): Model answer
+            namespace (str): Front-end/model that produced the answer
+        """
+        words = normalize(question)
+        vector = embed(question, self.dim, words)
+        if not vector.any() or not answer:
+            return
+        with self._lock:
+            if self._size < self.capacity:
+                index = self._size
+                self._size += 1
+            else:
+                index = int(np.argmin(self._last_used))
+                self.stats["evictions"] += 1
+            self._vectors[index] = vector
+            self._namespaces[index] = self._namespace_id(namespace)
+            self._guards[index] = guard_key(words)
+            self._last_used[index] = time.time()
+            self._answers[index] = answer
+
+    def avg_lookup_ms(self):
+        """Mean lookup latency in milliseconds (0.0 before the first lookup)"""
+        with self._lock:
+            if not self.stats["lookups"]:
+                return 0.0
+            return self.stats["lookup_seconds"] / self.stats["lookups"] * 1000
+
+
+@st.cache_resource(show_spinner=False)
+def get_semantic_cache():
+    """Process-wide semantic cache shared by every Streamlit session and front-end"""
+    return SemanticCache()
+
+
+def is_standalone(messages):
+    """
+    True when the newest user message is the first user turn of the conversation
+
+    Args:
+        messages (list): Stored message dicts including the current user message
+
+    Returns:
+        bool: Whether the question can be answered without conversation context
+    """
+    return sum(1 for m in messages if m["role"] == "user") == 1
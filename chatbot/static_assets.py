@@ -0,0 +1,197 @@
+# =====================================================
+# 📌 STATIC ASSET PIPELINE (THEME CSS & LOGO)
+# =====================================================
+# The theme stylesheets used to be pushed through st.markdown on every rerun
+# (~8 KB of unminified CSS per interaction) and the sidebar logo was re-read
+# from disk each time. Both are now built once per process:
+#   - each theme is minified and written to chatbot/static/ under a
+#     content-hashed name, served by Streamlit's static file server (enabled
+#     in .streamlit/config.toml) so the browser caches it
+#   - the browser is told to switch stylesheets only when the session's
+#     dark_theme setting actually changes; other reruns send nothing
+#   - the logo is resized to its display size and re-encoded (WebP, PNG
+#     fallback) into memory
+# If static serving is disabled or the folder is read-only, the minified CSS
+# is injected inline instead - still only when the theme changes.
+
+import functools
+import hashlib
+import io
+import json
+import re
+from pathlib import Path
+
+import streamlit as st
+import streamlit.components.v1 as components
+
+ASSETS_DIR = Path(__file__).parent / "assets"
+STATIC_DIR = Path(__file__).parent / "static"  # Served at app/static/ by Streamlit
+
+THEME_SOURCES = {
+    "dark": ASSETS_DIR / "theme_dark.css",
+    "light": ASSETS_DIR / "theme_light.css",
+}
+
+LOGO_PATH = ASSETS_DIR / "chatbot.jpg"
+LOGO_WIDTH = 150  # Display width in the sidebar (pixels)
+LOGO_SCALE = 2    # Pixel density for sharp rendering on high-DPI screens
+
+
+def minify_css(css):
+    """
+    Strip comments and redundant whitespace from a stylesheet
+
+    Args:
+        css (str): Source CSS
+
+    Returns:
+        str: Equivalent minified CSS
+    """
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)  # Comments
+    css = re.sub(r"\s+", " ", css)                    # Collapse whitespace
+    css = re.sub(r"\s*([{}:;,>])\s*", r"\1", css)     # Spaces around punctuation
+    css = css.replace(";}", "}")                      # Last semicolon in a block
+    return css.strip()
+
+
+def run_page_script(script):
+    """
+    Run a <script> snippet in the app page (not in a sandboxed iframe)
+
+    Args:
+        script (str): HTML containing the <script> element
+    """
+    try:
+        st.html(script, unsafe_allow_javascript=True)
+    except (AttributeError, TypeError):
+        # Older Streamlit: a zero-height component iframe reaching into its parent page
+        components.html(script, height=0)
+
+
+def _write_static(stem, suffix, data):
+    """Write a content-hashed file to STATIC_DIR; returns its URL or None if read-only"""
+    digest = hashlib.sha256(data).hexdigest()[:12]
+    filename = f"{stem}.{digest}{suffix}"
+    try:
+        STATIC_DIR.mkdir(exist_ok=True)
+        target = STATIC_DIR / filename
+        if not target.exists():
+            target.write_bytes(data)
+        for stale in STATIC_DIR.glob(f"{stem}.*{suffix}"):  # Older builds of this asset
+            if stale.name != filename:
+                stale.unlink(missing_ok=True)
+    except OSError:
+        return None
+    return f"app/static/{filename}"
+
+
+def build_logo(path=LOGO_PATH, width=LOGO_WIDTH * LOGO_SCALE):
+    """
+    Resize and re-encode the logo for the sidebar
+
+    Args:
+        path (Path): Source image
+        width (int): Target width in pixels
+
+    Returns:
+        bytes: WebP (or PNG if WebP is unavailable) image data
+    """
+    from PIL import Image
+
+    with Image.open(path) as image:
+        image = image.convert("RGB")
+        if image.width > width:
+            height = round(image.height * width / image.width)
+            image = image.resize((width, height), Image.LANCZOS)
+        buffer = io.BytesIO()
+        try:
+            image.save(buffer, format="WEBP", quality=82, method=6)
+        except (KeyError, OSError):  # Pillow built without WebP
+            buffer = io.BytesIO()
+            image.save(buffer, format="PNG", optimize=True)
+    return buffer.getvalue()
+
+
+class StaticAssets:
+    """
+    Minified themes and the encoded logo, built once per process
+
+    Attributes:
+        themes (dict): "dark"/"light" -> {"css": minified CSS, "url": static URL or None}
+        logo (bytes): Sidebar logo
+        sizes (dict): Source and built sizes in bytes (for the payload comparison)
+    """
+
+    def __init__(self):
+        self.themes = {}
+        self.sizes = {}
+        for name, source in THEME_SOURCES.items():
+            raw = source.read_text(encoding="utf-8")
+            css = minify_css(raw)
+            self.themes[name] = {
+                "css": css,
+                "url": _write_static(f"theme-{name}", ".min.css", css.encode("utf-8")),
+            }
+            self.sizes[f"theme_{name}"] = (len(raw.encode("utf-8")), len(css.encode("utf-8")))
+        self.logo = build_logo()
+        self.sizes["logo"] = (LOGO_PATH.stat().st_size, len(self.logo))
+
+
+@st.cache_resource(show_spinner=False)
+def get_static_assets():
+    """Process-wide assets, built at startup"""
+    return StaticAssets()
+
+
+@functools.lru_cache(maxsize=4)
+def _theme_script(name, href, css):
+    """Script that swaps the page's #cn-theme stylesheet (old one removed once the new loads)"""
+    payload = json.dumps({"href": href, "css": css}).replace("</", "<\\/")
+    return f"""
+<script>
+(function () {{
+  const doc = window.parent.document;
+  const theme = {payload};
+  const old = doc.getElementById("cn-theme");
+  let node;
+  if (theme.href) {{
+    node = doc.createElement("link");
+    node.rel = "stylesheet";
+    node.href = new URL(theme.href, doc.baseURI).href;
+    node.onload = function () {{ if (old) old.remove(); }};
+    node.onerror = function () {{ node.remove(); if (old) old.id = "cn-theme"; }};
+  }} else {{
+    node = doc.createElement("style");
+    node.textContent = theme.css;
+    if (old) old.remove();
+  }}
+  if (old) old.id = "cn-theme-old";
+  node.id = "cn-theme";
+  node.dataset.theme = "{name}";
+  doc.head.appendChild(node);
+}})();
+</script>
+"""
+
+
+def apply_theme(dark_theme):
+    """
+    Switch the page stylesheet if this browser tab does not have the wanted theme yet
+
+    Nothing is sent on reruns where the theme did not change: the stylesheet
+    lives in the page <head>, outside the elements Streamlit redraws.
+
+    Args:
+        dark_theme (bool): True for the dark theme
+
+    Returns:
+        bool: True if the stylesheet was (re)injected on this rerun
+    """
+    name = "dark" if dark_theme else "light"
+    if st.session_state.get("applied_theme") == name:
+        return False
+    theme = get_static_assets().themes[name]
+    href = theme["url"] if st.get_option("server.enableStaticServing") else None
+    run_page_script(_theme_script(name, href, None if href else theme["css"]))
+    st.session_state.applied_theme = name
+    return True
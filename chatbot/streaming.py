@@ -0,0 +1,105 @@
+# =====================================================
+# 📌 THROTTLED STREAMING OUTPUT
+# =====================================================
+# Streamlit re-sends the whole markdown string every time a placeholder is
+# updated. Writing on every token therefore costs O(n²) bytes for an answer
+# of n tokens. ThrottledMarkdownWriter coalesces tokens and only redraws the
+# placeholder at a fixed frame rate (or when enough new text has piled up),
+# and always performs one final flush so the complete answer is shown.
+
+import time
+
+# Default redraw rate for streamed answers (frames per second)
+DEFAULT_FPS = 12
+
+# Flush early once this many new bytes are waiting, even inside a frame
+DEFAULT_FLUSH_BYTES = 512
+
+# Cursor appended while the answer is still being generated
+STREAM_CURSOR = "▌"
+
+
+class ThrottledMarkdownWriter:
+    """
+    Buffer streamed tokens and render them into a Streamlit container at a capped rate
+
+    Args:
+        container: Streamlit element with a .markdown() method (usually st.empty())
+        fps (float): Maximum number of redraws per second (0 disables time-based flushing)
+        flush_bytes (int): Redraw early once this many new bytes are buffered (0 disables)
+        cursor (str): Text appended to intermediate frames to show generation is ongoing
+        clock (callable): Monotonic clock, replaceable for benchmarks
+    """
+
+    def __init__(self, container, fps=DEFAULT_FPS, flush_bytes=DEFAULT_FLUSH_BYTES,
+                 cursor=STREAM_CURSOR, clock=time.monotonic):
+        self.container = container
+        self.frame_interval = 1.0 / fps if fps else float("inf")
+        self.flush_bytes = flush_bytes or float("inf")
+        self.cursor = cursor
+        self.clock = clock
+
+        self._text = ""          # Text already rendered
+        self._pending = []       # Tokens received since the last redraw
+        self._pending_bytes = 0  # Size of the pending tokens in bytes
+        self._last_flush = clock()
+        self._closed = False
+
+        # Counters for benchmarks and analytics
+        self.render_calls = 0
+        self.bytes_sent = 0
+
+    @property
+    def text(self):
+        """Full text received so far (rendered + pending)"""
+        if self._pending:
+            return self._text + "".join(self._pending)
+        return self._text
+
+    def write(self, token):
+        """
+        Add a token and redraw if the frame interval or byte threshold is reached
+
+        Args:
+            token (str): Newly generated text chunk
+        """
+        if not token:
+            return
+        self._pending.append(token)
+        self._pending_bytes += len(token.encode("utf-8"))
+
+        if (self._pending_bytes >= self.flush_bytes
+                or self.clock() - self._last_flush >= self.frame_interval):
+            self.flush()
+
+    def flush(self, final=False):
+        """
+        Render the buffered text into the container
+
+        Args:
+            final (bool): Render without the cursor (used for the last frame)
+        """
+        if self._pending:
+            self._text += "".join(self._pending)
+            self._pending = []
+            self._pending_bytes = 0
+        elif not final:
+            return  # Nothing new to draw
+
+        frame = self._text if final else self._text + self.cursor
+        self.container.markdown(frame)
+        self.render_calls += 1
+        self.bytes_sent += len(frame.encode("utf-8"))
+        self._last_flush = self.clock()
+
+    def close(self):
+        """
+        Perform the final flush exactly once and return the complete text
+
+        Returns:
+            str: The full streamed answer
+        """
+        if not self._closed:
+            self._closed = True
+            self.flush(final=True)
+        return self._text
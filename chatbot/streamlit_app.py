@@ -0,0 +1,20 @@
+# =====================================================
+# 📌 CYPHERNOVA ENTRY POINT
+# =====================================================
+# Runs the chat page (chatbot.py) as one call inside profiled_run(), so an
+# opt-in rerun profile (PROFILER, see rerun_profiler.py) is always stopped,
+# however the page run ends. Start the app with:
+#     streamlit run chatbot/streamlit_app.py
+
+import streamlit as st
+
+from rerun_profiler import profiled_run, show_profile_result
+
+page = st.navigation([st.Page("chatbot.py", title="CypherNova", default=True)],
+                     position="hidden")
+with profiled_run():
+    page.run()
+
+# Offer the report of a profiled run for download
+with st.sidebar:
+    show_profile_result()
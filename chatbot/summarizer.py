@@ -0,0 +1,152 @@
+# =====================================================
+# 📌 ROLLING CONVERSATION SUMMARY
+# =====================================================
+# When older turns no longer fit the context budget they are folded into a
+# running summary by a small, cheap model. The summary is sent as part of the
+# system prompt instead of the raw turns, so the prompt size stays roughly
+# constant no matter how long the session runs. Summarization runs on a
+# background thread so it never delays the chat response.
+
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from context_window import count_message_tokens
+
+logger = logging.getLogger(__name__)
+
+# Cheap model used to write the summary
+SUMMARY_MODEL = os.getenv("SUMMARY_MODEL", "llama-3.2-1b-preview")
+
+# Maximum length of the summary (tokens)
+SUMMARY_MAX_TOKENS = int(os.getenv("SUMMARY_MAX_TOKENS", "400"))
+
+# Fold at least this many aged-out messages at once (one user + assistant exchange)
+SUMMARY_MIN_BATCH = 2
+
+SUMMARY_INSTRUCTIONS = (
+    "You maintain a running summary of a conversation between a user and "
+    "CypherNova, an AI assistant. Update the summary with the new messages. "
+    "Keep names, facts, preferences, decisions and open questions; drop small talk. "
+    "Write at most 200 words in the third person. Reply with the summary only."
+)
+
+
+@st.cache_resource(show_spinner=False)
+def get_summary_executor():
+    """Process-wide background worker pool for summarization jobs"""
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="summarizer")
+
+
+class RollingSummary:
+    """
+    Running summary of the oldest part of a conversation
+
+    Attributes:
+        text (str): Current summary ("" until the first fold)
+        summarized_upto (int): Number of leading cached messages folded into the summary
+        covered_tokens (int): Estimated tokens of the raw messages the summary replaces
+        summary_tokens (int): Estimated tokens of the summary itself
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.summarized_upto = 0
+        self.covered_tokens = 0
+        self.summary_tokens = 0
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._pending = None  # Future of the running summarization job
+
+    @property
+    def busy(self):
+        """True while a background summarization job is running"""
+        return self._pending is not None and not self._pending.done()
+
+    @property
+    def tokens_saved(self):
+        """Prompt tokens saved on every turn by sending the summary instead of raw turns"""
+        return max(self.covered_tokens - self.summary_tokens, 0)
+
+    def system_message(self, base_prompt):
+        """
+        Build the system message with the summary appended
+
+        Args:
+            base_prompt (str): Normal system prompt text
+
+        Returns:
+            SystemMessage: System prompt, plus the summary once one exists
+        """
+        with self._lock:
+            if not self.text:
+                return SystemMessage(content=base_prompt)
+            return SystemMessage(
+                content=f"{base_prompt}\n\nSummary of the earlier conversation:\n{self.text}"
+            )
+
+    def schedule(self, llm, messages, upto, model_name, rate_limiter=None):
+        """
+        Fold messages[summarized_upto:upto] into the summary in the background
+
+        Does nothing if a job is already running or too few messages aged out;
+        the next turn will pick them up.
+
+        Args:
+            llm (Runnable): Cheap chat model used for summarization
+            messages (list): Cached LangChain messages, oldest first
+            upto (int): Fold all messages before this index
+            model_name (str): Chat model whose token estimates are used for savings
+            rate_limiter (DualTokenBucket): Shared Groq quota limiter, if any
+
+        Returns:
+            bool: True if a job was started
+        """
+        start = self.summarized_upto
+        if upto - start < SUMMARY_MIN_BATCH or self.busy:
+            return False
+
+        new_messages = list(messages[start:upto])  # Snapshot for the worker thread
+        self._pending = get_summary_executor().submit(
+            self._fold, llm, new_messages, upto, model_name, rate_limiter
+        )
+        return True
+
+    def _fold(self, llm, new_messages, upto, model_name, rate_limiter):
+        """Worker thread: ask the model for an updated summary and store it"""
+        transcript = "\n".join(
+            f"{'USER' if m.type == 'human' else 'ASSISTANT'}: {m.content}" for m in new_messages
+        )
+        request = [
+            SystemMessage(content=SUMMARY_INSTRUCTIONS),
+            HumanMessage(content=f"Current summary:\n{self.text or '(none yet)'}\n\n"
+                                 f"New messages:\n{transcript}"),
+        ]
+        reserved = sum(count_message_tokens(m.content, SUMMARY_MODEL) for m in request)
+        reserved += SUMMARY_MAX_TOKENS
+        acquired = False
+        try:
+            if rate_limiter is not None:
+                rate_limiter.acquire(reserved)
+                acquired = True
+            summary = llm.invoke(request).content.strip()
+        except Exception as e:
+            if acquired:
+                rate_limiter.refund(SUMMARY_MAX_TOKENS)  # Nothing was generated
+            logger.warning("Conversation summary failed: %s", e)
+            self.last_error = str(e)  # Raw turns are simply dropped until the next try
+            return
+        if rate_limiter is not None:
+            rate_limiter.refund(SUMMARY_MAX_TOKENS - count_message_tokens(summary, SUMMARY_MODEL))
+
+        covered = sum(count_message_tokens(m.content, model_name) for m in new_messages)
+        with self._lock:
+            self.text = summary
+            self.summarized_upto = upto
+            self.covered_tokens += covered
+            self.summary_tokens = count_message_tokens(summary, model_name)
+            self.last_error = None
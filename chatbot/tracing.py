@@ -0,0 +1,293 @@
+# =====================================================
+# 📌 HOT-PATH TRACING SPANS (OPENTELEMETRY JSON)
+# =====================================================
+# A slow turn can spend its time in theme CSS, the history render, the prompt
+# build, the network or the final markdown render. Each script run records a
+# trace: a root span for the run and one child span per phase, timed with
+# time.time_ns() (a few microseconds each, no dependencies).
+#
+# Finished traces are:
+#   - summarized for the "Rerun Timing" panel (newest full page run)
+#   - optionally appended to TRACE_FILE, one OTLP/JSON ExportTraceServiceRequest
+#     per line (the format of the OpenTelemetry Collector file exporter), by a
+#     background thread so the page never waits for the disk
+#
+# Spans are kept per thread: Streamlit runs each script run in its own thread.
+
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from pathlib import Path
+
+import streamlit as st
+
+logger = logging.getLogger(__name__)
+
+# OTLP/JSON lines file for finished traces ("off" = keep traces in memory only)
+TRACE_FILE = os.getenv("TRACE_FILE", "off")
+
+# service.name resource attribute of exported spans
+TRACE_SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "cyphernova-chatbot")
+
+# OpenTelemetry span kinds and status codes
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_CLIENT = 3
+STATUS_ERROR = 2
+
+_local = threading.local()
+
+
+def _otlp_value(value):
+    """OTLP AnyValue for an attribute"""
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class Span:
+    """One timed phase of a script run (usable as a context manager)"""
+
+    __slots__ = ("trace", "name", "span_id", "parent_id", "kind", "start_ns", "end_ns",
+                 "attributes", "error")
+
+    def __init__(self, trace, name, parent_id, kind, attributes):
+        self.trace = trace
+        self.name = name
+        self.span_id = random.getrandbits(64)  # Formatted as hex only when exported
+        self.parent_id = parent_id
+        self.kind = kind
+        self.attributes = attributes
+        self.error = None
+        self.end_ns = None
+        self.start_ns = time.time_ns()
+
+    def set(self, key, value):
+        """Add an attribute (None values are skipped)"""
+        if value is not None:
+            self.attributes[key] = value
+
+    def end(self):
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            self.trace._close(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Exceptions mark the span as failed; Streamlit's rerun/stop signals
+        # are BaseExceptions, not errors
+        if exc_type is not None and issubclass(exc_type, Exception):
+            self.error = f"{exc_type.__name__}: {exc}"
+        self.end()
+
+    @property
+    def ms(self):
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def to_otlp(self, trace_id):
+        span = {
+            "traceId": trace_id,
+            "spanId": f"{self.span_id:016x}",
+            "parentSpanId": f"{self.parent_id:016x}" if self.parent_id is not None else "",
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or self.start_ns),
+            "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in self.attributes.items()],
+        }
+        if self.error:
+            span["status"] = {"code": STATUS_ERROR, "message": self.error}
+        return span
+
+
+class _NoSpan:
+    """Stand-in when no trace is active (e.g. code running outside a page)"""
+
+    def set(self, key, value):
+        pass
+
+    def end(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        pass
+
+
+_NO_SPAN = _NoSpan()
+
+
+class Trace:
+    """
+    Spans of one script run
+
+    Args:
+        name (str): Root span name
+        **attributes: Root span attributes
+    """
+
+    def __init__(self, name, **attributes):
+        self.trace_id = f"{random.getrandbits(128):032x}"
+        self.spans = []
+        self._open = []  # Stack of spans that have not ended
+        self.root = self.start_span(name, **attributes)
+
+    def start_span(self, name, kind=SPAN_KIND_INTERNAL, **attributes):
+        parent = self._open[-1].span_id if self._open else None
+        span = Span(self, name, parent, kind, attributes)
+        self.spans.append(span)
+        self._open.append(span)
+        return span
+
+    def _close(self, span):
+        if span in self._open:
+            # Spans left open inside it (e.g. after an exception) end with it
+            while self._open:
+                top = self._open.pop()
+                if top.end_ns is None:
+                    top.end_ns = span.end_ns
+                if top is span:
+                    break
+
+    def finish(self):
+        self.root.end()
+
+    def summary(self):
+        """Rows (name, depth, ms) in start order, for the timing panel"""
+        depth = {None: -1}
+        rows = []
+        for span in self.spans:
+            depth[span.span_id] = depth.get(span.parent_id, -1) + 1
+            rows.append((span.name, depth[span.span_id], span.ms))
+        return rows
+
+    def to_otlp(self):
+        """OTLP/JSON ExportTraceServiceRequest with this trace's spans"""
+        return {"resourceSpans": [{
+            "resource": {"attributes": [
+                {"key": "service.name", "value": {"stringValue": TRACE_SERVICE_NAME}}]},
+            "scopeSpans": [{
+                "scope": {"name": "cyphernova.tracing"},
+                "spans": [span.to_otlp(self.trace_id) for span in self.spans],
+            }],
+        }]}
+
+
+class TraceFileExporter:
+    """
+    Append traces to an OTLP/JSON lines file from a background thread
+
+    Args:
+        path (str): Output file (parent directories are created)
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, trace):
+        """Queue a finished trace (serialized and written on the exporter thread)"""
+        self._queue.put(trace)
+
+    def _run(self):
+        while True:
+            trace = self._queue.get()
+            if trace is None:
+                return
+            traces = [trace]
+            while not self._queue.empty():  # Write whatever else is waiting at once
+                trace = self._queue.get()
+                if trace is None:
+                    break
+                traces.append(trace)
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    for finished in traces:
+                        f.write(json.dumps(finished.to_otlp(), separators=(",", ":")) + "\n")
+            except OSError as e:
+                logger.warning("Could not write traces to %s: %s", self.path, e)
+            if trace is None:
+                return
+
+    def close(self, timeout=2.0):
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+
+@st.cache_resource(show_spinner=False)
+def get_trace_exporter():
+    """Process-wide trace file exporter, or None when TRACE_FILE is off"""
+    if TRACE_FILE.lower() in ("off", "none", ""):
+        return None
+    exporter = TraceFileExporter(TRACE_FILE)
+    atexit.register(exporter.close)
+    return exporter
+
+
+# =====================================================
+# 📌 PAGE API
+# =====================================================
+
+def start_trace(name, **attributes):
+    """Begin the trace of this script run (replaces any unfinished one)"""
+    _local.trace = Trace(name, **attributes)
+    return _local.trace
+
+
+def current_trace():
+    return getattr(_local, "trace", None)
+
+
+def finish_trace():
+    """
+    End this run's trace and hand it to the exporter
+
+    Returns:
+        Trace: The finished trace, or None if none was started
+    """
+    trace = current_trace()
+    if trace is None:
+        return None
+    _local.trace = None
+    trace.finish()
+    exporter = get_trace_exporter()
+    if exporter is not None:
+        exporter.export(trace)
+    return trace
+
+
+def span(name, kind=SPAN_KIND_INTERNAL, **attributes):
+    """
+    Begin a span in this run's trace
+
+    Use it as `with span("history render"):` (ends with the block; exceptions
+    mark it as failed) or call .end() on it when the phase is done.
+
+    Returns:
+        Span: The span (a no-op stand-in if no trace is active)
+    """
+    trace = current_trace()
+    return trace.start_span(name, kind, **attributes) if trace is not None else _NO_SPAN
+
+
+def show_trace_summary(rows):
+    """Render a trace summary (Trace.summary()) as an indented list"""
+    if not rows:
+        st.caption("No trace recorded yet")
+        return
+    st.markdown("\n".join(f"{'  ' * depth}- {name} **{ms:.1f} ms**" for name, depth, ms in rows))